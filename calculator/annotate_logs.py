@@ -0,0 +1,297 @@
+"""
+Log Annotator
+Non-interactive bulk annotation of IP addresses in log and CSV files
+
+Usage:
+    python annotate_logs.py --networks networks.txt access.log -o annotated.log
+    python annotate_logs.py --networks networks.txt access.log -o annotated.log --workers 8
+"""
+
+import argparse
+import io
+import mmap
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from ip_calculator import IPCalculator, network_flags, parse_ip_int
+from route_table import RouteTable
+
+# Candidate tokens; every match is confirmed with inet_pton before use
+IP_TOKEN = re.compile(
+    rb'(?<![0-9.])(?:\d{1,3}\.){3}\d{1,3}(?![0-9.])'
+    rb'|(?<![0-9A-Fa-f:.])(?:[0-9A-Fa-f]{0,4}:){2,7}'
+    rb'(?:\d{1,3}(?:\.\d{1,3}){3}|[0-9A-Fa-f]{0,4})(?![0-9A-Fa-f:.])'
+)
+
+_CACHE_LIMIT = 65536
+DEFAULT_CHUNK_SIZE = 8 << 20  # Bytes per shard in parallel mode
+
+
+def peak_rss_bytes(children: bool = False) -> Optional[int]:
+    """Peak resident set size of this process (or of its largest child)
+
+    Returns None where the resource module is unavailable.
+    """
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def read_networks(path: str) -> List[str]:
+    """Read one network per line, skipping blanks and '#' comments"""
+    with open(path, 'r', encoding='utf-8') as handle:
+        return [line.split('#', 1)[0].strip() for line in handle if line.split('#', 1)[0].strip()]
+
+
+class LogAnnotator:
+    """Classify every IP token in a file against a network list
+
+    Each output line is the input line followed by the delimiter and a
+    ';'-separated list of ``ip=network[,flag...]`` annotations, where
+    ``network`` is the most specific supplied network containing the
+    address (or '-') and the flags come from the same private/multicast/
+    reserved checks as ``IPCalculator.subnet_info``.
+    """
+
+    def __init__(self, networks: Iterable[str], delimiter: str = '\t', calc: IPCalculator = None):
+        self.calc = calc or IPCalculator()
+        networks = list(networks)
+        self.table = RouteTable()
+        for network_str in networks:
+            info = self.calc.subnet_info(network_str)
+            network = f"{info['network_address']}/{info['prefix_length']}"
+            self.table.insert(network, network.encode('ascii'))
+        self.delimiter = delimiter.encode('utf-8')
+        self._annotations: Dict[bytes, Optional[Tuple[bytes, bool]]] = {}
+        self.stats = {'lines': 0, 'addresses': 0, 'matched': 0, 'bytes': 0}
+
+    def classify(self, token: bytes) -> Optional[Tuple[bytes, bool]]:
+        """(annotation, matched) for one candidate token, or None if it is not an IP"""
+        try:
+            return self._annotations[token]
+        except KeyError:
+            pass
+        try:
+            version, value = parse_ip_int(token.decode('ascii'))
+        except ValueError:
+            result = None
+        else:
+            match = self.table.lookup_int(value, version)
+            parts = [token + b'=' + (match[2] if match else b'-')]
+            is_private, is_multicast, is_reserved = network_flags(version, value, value)
+            if is_private:
+                parts.append(b'private')
+            if is_multicast:
+                parts.append(b'multicast')
+            if is_reserved:
+                parts.append(b'reserved')
+            result = (b','.join(parts), match is not None)
+        if len(self._annotations) >= _CACHE_LIMIT:
+            self._annotations.clear()
+        self._annotations[token] = result
+        return result
+
+    def annotate_line(self, line: bytes) -> bytes:
+        """Annotate one line (with or without its trailing newline)"""
+        body = line.rstrip(b'\r\n')
+        annotations = []
+        stats = self.stats
+        for token in IP_TOKEN.findall(body):
+            result = self.classify(token)
+            if result is not None:
+                annotations.append(result[0])
+                stats['addresses'] += 1
+                stats['matched'] += result[1]
+        stats['lines'] += 1
+        stats['bytes'] += len(line)
+        return body + self.delimiter + (b';'.join(annotations) or b'-') + b'\n'
+
+    def annotate_buffer(self, buffer, start: int, end: int, output: BinaryIO):
+        """Annotate the lines of ``buffer[start:end]`` into ``output``"""
+        write = output.write
+        annotate = self.annotate_line
+        position = start
+        while position < end:
+            newline = buffer.find(b'\n', position, end)
+            stop = end if newline < 0 else newline + 1
+            write(annotate(buffer[position:stop]))
+            position = stop
+
+    def annotate_file(self, input_path: str, output: Union[str, BinaryIO]) -> Dict[str, float]:
+        """Annotate a whole file through mmap and return a throughput report"""
+        began = time.perf_counter()
+        handle = open(output, 'wb', buffering=1 << 20) if isinstance(output, str) else output
+        try:
+            with open(input_path, 'rb') as source:
+                try:
+                    mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:  # Empty files cannot be mapped
+                    mapped = None
+                if mapped is not None:
+                    with mapped:
+                        self.annotate_buffer(mapped, 0, len(mapped), handle)
+        finally:
+            if handle is not output:
+                handle.close()
+            else:
+                handle.flush()
+        return self.report(time.perf_counter() - began)
+
+    def report(self, seconds: float) -> Dict[str, float]:
+        """Throughput and peak memory for the work done so far"""
+        seconds = max(seconds, 1e-9)
+        return dict(self.stats,
+                    seconds=seconds,
+                    lines_per_second=self.stats['lines'] / seconds,
+                    megabytes_per_second=self.stats['bytes'] / seconds / 1e6,
+                    peak_rss_bytes=peak_rss_bytes())
+
+
+def shard_offsets(input_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) byte ranges of roughly ``chunk_size`` ending on newlines"""
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be positive")
+    size = os.path.getsize(input_path)
+    if not size:
+        return
+    with open(input_path, 'rb') as source, \
+            mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        start = 0
+        while start < size:
+            end = min(start + chunk_size, size)
+            if end < size:
+                newline = mapped.find(b'\n', end - 1)
+                end = size if newline < 0 else newline + 1
+            yield start, end
+            start = end
+
+
+# Per-process state for worker processes, built once by _init_worker
+_worker = {}
+
+
+def _init_worker(input_path: str, networks: List[str], delimiter: str):
+    source = open(input_path, 'rb')
+    _worker['annotator'] = LogAnnotator(networks, delimiter=delimiter)
+    _worker['source'] = source
+    _worker['mapped'] = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _annotate_shard(start: int, end: int) -> Tuple[bytes, Dict[str, int]]:
+    annotator = _worker['annotator']
+    annotator.stats = dict.fromkeys(annotator.stats, 0)
+    output = io.BytesIO()
+    annotator.annotate_buffer(_worker['mapped'], start, end, output)
+    return output.getvalue(), annotator.stats
+
+
+def annotate_file_parallel(input_path: str, output: Union[str, BinaryIO], networks: Iterable[str],
+                           workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                           delimiter: str = '\t', max_pending: int = None) -> Dict[str, float]:
+    """Annotate a file with a process pool, writing shards back in input order
+
+    The file is split into newline-aligned byte ranges of ``chunk_size``.
+    Each worker builds the lookup structures and maps the file once. At
+    most ``max_pending`` shards (default: two per worker) are in flight, so
+    memory stays bounded regardless of the input size.
+    """
+    networks = list(networks)
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    # Validate the network list up front rather than inside every worker
+    LogAnnotator(networks, delimiter=delimiter)
+
+    began = time.perf_counter()
+    totals = {'lines': 0, 'addresses': 0, 'matched': 0, 'bytes': 0}
+    handle = open(output, 'wb', buffering=1 << 20) if isinstance(output, str) else output
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(input_path, networks, delimiter)) as pool:
+            pending = deque()
+            for start, end in shard_offsets(input_path, chunk_size):
+                if len(pending) >= max_pending:
+                    _write_shard(pending.popleft().result(), handle, totals)
+                pending.append(pool.submit(_annotate_shard, start, end))
+            while pending:
+                _write_shard(pending.popleft().result(), handle, totals)
+    finally:
+        if handle is not output:
+            handle.close()
+        else:
+            handle.flush()
+
+    seconds = max(time.perf_counter() - began, 1e-9)
+    peaks = [peak for peak in (peak_rss_bytes(), peak_rss_bytes(children=True)) if peak]
+    return dict(totals,
+                seconds=seconds,
+                lines_per_second=totals['lines'] / seconds,
+                megabytes_per_second=totals['bytes'] / seconds / 1e6,
+                peak_rss_bytes=max(peaks) if peaks else None,
+                workers=workers)
+
+
+def _write_shard(result: Tuple[bytes, Dict[str, int]], handle: BinaryIO, totals: Dict[str, int]):
+    data, stats = result
+    handle.write(data)
+    for key, value in stats.items():
+        totals[key] += value
+
+
+def format_report(report: Dict[str, float]) -> str:
+    """Human-readable summary of an annotation report"""
+    peak = report.get('peak_rss_bytes')
+    peak_text = f"{peak / 1e6:,.1f} MB" if peak else "unavailable"
+    return (f"Lines: {report['lines']:,}  Addresses: {report['addresses']:,}  "
+            f"Matched: {report['matched']:,}\n"
+            f"Time: {report['seconds']:.2f}s  Throughput: {report['lines_per_second']:,.0f} lines/s "
+            f"({report['megabytes_per_second']:.1f} MB/s)\n"
+            f"Peak RSS: {peak_text}"
+            + (f"  Workers: {report['workers']}" if 'workers' in report else ""))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Annotate IP addresses in a log or CSV file")
+    parser.add_argument('input', help="Log or CSV file to annotate")
+    parser.add_argument('-o', '--output', help="Output file (default: stdout)")
+    parser.add_argument('-n', '--networks', help="File with one network per line")
+    parser.add_argument('--network', action='append', default=[], help="Network to classify against (repeatable)")
+    parser.add_argument('-d', '--delimiter', default='\t', help="Separator between line and annotations")
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help="Worker processes (0 = one per CPU, 1 = single process)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Bytes per shard in parallel mode")
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point"""
+    args = build_parser().parse_args(argv)
+    try:
+        networks = list(args.network)
+        if args.networks:
+            networks.extend(read_networks(args.networks))
+        output = args.output or sys.stdout.buffer
+        if args.workers == 1:
+            report = LogAnnotator(networks, delimiter=args.delimiter).annotate_file(args.input, output)
+        else:
+            report = annotate_file_parallel(args.input, output, networks, workers=args.workers or None,
+                                            chunk_size=args.chunk_size, delimiter=args.delimiter)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    print(format_report(report), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Calculator Client
+Small blocking and asyncio clients for the calculator service
+(see calculator_service.py for the JSON-lines protocol)
+"""
+
+import asyncio
+import json
+import socket
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Errors re-raised locally with their own type; anything else becomes RemoteError
+_LOCAL_ERRORS = {'ValueError': ValueError, 'ZeroDivisionError': ZeroDivisionError,
+                 'TypeError': TypeError, 'TimeoutError': TimeoutError}
+
+
+class RemoteError(Exception):
+    """Unexpected error raised by the service"""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(f"{kind}: {message}")
+        self.kind = kind
+
+
+def _parse_int(text: str) -> int:
+    # Decimal avoids the interpreter's limit on long decimal strings (e.g. big factorials)
+    return int(text) if len(text) < 4000 else int(Decimal(text))
+
+
+def encode_request(request_id: int, engine: str, method: str, args=(), kwargs: Dict[str, Any] = None,
+                   timeout: float = None, offset: int = None, limit: int = None) -> bytes:
+    """One request line"""
+    request = {'id': request_id, 'engine': engine, 'method': method, 'args': list(args)}
+    if kwargs:
+        request['kwargs'] = kwargs
+    for key, value in (('timeout', timeout), ('offset', offset), ('limit', limit)):
+        if value is not None:
+            request[key] = value
+    return json.dumps(request).encode('utf-8') + b'\n'
+
+
+def decode_response(line: bytes) -> Dict[str, Any]:
+    """Parse one response line"""
+    return json.loads(line, parse_int=_parse_int)
+
+
+def _unwrap(response: Dict[str, Any]) -> Any:
+    error = response.get('error')
+    if error is None:
+        return response.get('result')
+    error_type = _LOCAL_ERRORS.get(error.get('type'))
+    if error_type is not None:
+        raise error_type(error.get('message'))
+    raise RemoteError(error.get('type'), error.get('message'))
+
+
+class _EngineProxy:
+    """``client.ip.subnet_info(...)`` style access to one engine"""
+
+    def __init__(self, call, engine: str):
+        self._call = call
+        self._engine = engine
+
+    def __getattr__(self, method: str):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        return lambda *args, **kwargs: self._call(self._engine, method, *args, **kwargs)
+
+
+class CalculatorClient:
+    """Blocking client: one request at a time over a single connection
+
+    ``call`` accepts ``timeout`` (seconds, enforced by the service) and
+    ``offset``/``limit`` (paging for list results); other keyword
+    arguments are passed to the remote method.
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, path: str = None,
+                 connect_timeout: Optional[float] = 10.0):
+        if path is not None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(connect_timeout)
+            self._sock.connect(path)
+        else:
+            self._sock = socket.create_connection((host, port), timeout=connect_timeout)
+        self._sock.settimeout(None)
+        self._file = self._sock.makefile('rwb')
+        self._next_id = 0
+        self.ip = _EngineProxy(self.call, 'ip')
+        self.sci = _EngineProxy(self.call, 'sci')
+
+    def call(self, engine: str, method: str, *args, timeout: float = None,
+             offset: int = None, limit: int = None, **kwargs) -> Any:
+        """Invoke ``engine.method(*args, **kwargs)`` on the service"""
+        self._next_id += 1
+        self._file.write(encode_request(self._next_id, engine, method, args, kwargs, timeout, offset, limit))
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Calculator service closed the connection")
+        return _unwrap(decode_response(line))
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self) -> 'CalculatorClient':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncCalculatorClient:
+    """asyncio client multiplexing concurrent requests over one connection
+
+    Use ``await AsyncCalculatorClient.connect(...)``; concurrent ``call``
+    coroutines are matched to their responses by id, which lets the
+    service batch them.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self._reading = asyncio.ensure_future(self._read_responses())
+        self.ip = _EngineProxy(self.call, 'ip')
+        self.sci = _EngineProxy(self.call, 'sci')
+
+    @classmethod
+    async def connect(cls, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                      path: str = None) -> 'AsyncCalculatorClient':
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path, limit=1 << 24)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=1 << 24)
+        return cls(reader, writer)
+
+    async def call(self, engine: str, method: str, *args, timeout: float = None,
+                   offset: int = None, limit: int = None, **kwargs) -> Any:
+        """Invoke ``engine.method(*args, **kwargs)`` on the service"""
+        if self._reading.done():
+            raise ConnectionError("Calculator service closed the connection")
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(encode_request(request_id, engine, method, args, kwargs, timeout, offset, limit))
+        await self._writer.drain()
+        return _unwrap(await future)
+
+    async def _read_responses(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = decode_response(line)
+                future = self._pending.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Calculator service closed the connection"))
+            self._pending.clear()
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        await asyncio.gather(self._reading, return_exceptions=True)
+
+    async def __aenter__(self) -> 'AsyncCalculatorClient':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
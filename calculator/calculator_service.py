@@ -0,0 +1,459 @@
+"""
+Calculator Service
+Long-running asyncio server hosting IPCalculator and ScientificCalculator
+over a JSON-lines protocol (TCP or Unix socket)
+
+Each request is one JSON object per line:
+    {"id": 1, "engine": "ip", "method": "subnet_info", "args": ["10.0.0.0/24"]}
+with optional "kwargs", "timeout" (seconds) and "offset"/"limit" (paging
+for list results). Each response carries the same id and either "result"
+or "error": {"type": ..., "message": ...}. Responses on one connection may
+arrive out of order.
+
+Usage:
+    python calculator_service.py --port 8765
+    python calculator_service.py --unix /tmp/calculator.sock
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import sys
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from calculator_client import DEFAULT_HOST, DEFAULT_PORT
+from ip_calculator import IPCalculator, MAX_BITS, parse_network_int
+from ip_set import IPSet
+from scientific_calculator import ScientificCalculator
+
+ENGINES = {'ip': IPCalculator, 'sci': ScientificCalculator}
+
+# Public methods that take file paths or return live objects stay local-only, and so do
+# the ones that change engine state every connection shares (modes, memory, history, cache)
+_UNEXPOSED = {'subnet_summary_stream', 'ranges_to_cidrs', 'build_route_table', 'load_registry',
+              'bulk_convert', 'enable_cache', 'parse_address', 'parse_network', 'history_disabled',
+              'add_to_history', 'clear_history', 'clear_cache',
+              'set_angle_mode', 'memory_store', 'memory_recall', 'memory_add', 'memory_subtract',
+              'memory_clear'}
+
+# Pure per-item calls; concurrent requests for these are coalesced into batches
+BATCHED = {
+    'ip': {'validate_ip', 'ip_to_binary', 'ip_to_decimal', 'decimal_to_ip', 'binary_to_ip',
+           'subnet_info', 'ip_in_subnet', 'calculate_hosts', 'wildcard_mask',
+           'next_network', 'previous_network', 'analyze_ip_range'},
+    'sci': {'add', 'subtract', 'multiply', 'divide', 'power', 'sqrt', 'nth_root',
+            'sin', 'cos', 'tan', 'asin', 'acos', 'atan', 'atan2', 'sinh', 'cosh', 'tanh',
+            'asinh', 'acosh', 'atanh', 'log', 'log10', 'log2', 'ln', 'exp', 'exp10', 'exp2',
+            'gcd', 'lcm', 'absolute', 'ceiling', 'floor', 'round_number', 'modulo',
+            'degrees_to_radians', 'radians_to_degrees'},
+}
+
+# Calls whose cost grows with their input; these always run in the process pool
+OFFLOADED = {
+    'ip': {'subnet_info_many', 'subnet_summary', 'subnet_summary_lossy', 'find_overlaps',
+           'diff_prefix_sets', 'compress_routes', 'sample_addresses', 'sample_subnets'},
+    'sci': set(),
+}
+
+HEAVY_ITEMS = 4096      # List results larger than this are built in the process pool
+HEAVY_OPERAND = 2000    # factorial/combination/permutation operands above this too
+
+
+def _exposed_methods(engine_class) -> List[str]:
+    return sorted(name for name in dir(engine_class)
+                  if not name.startswith('_') and name not in _UNEXPOSED
+                  and callable(getattr(engine_class, name)))
+
+
+EXPOSED = {name: set(_exposed_methods(engine_class)) for name, engine_class in ENGINES.items()}
+
+
+def _jsonable(value: Any, offset: Optional[int], limit: Optional[int], max_items: int) -> Any:
+    """Convert an engine result into JSON-compatible data"""
+    if isinstance(value, complex):
+        return {'real': value.real, 'imag': value.imag}
+    if isinstance(value, dict):
+        return {key: _jsonable(item, None, None, max_items) for key, item in value.items()}
+    if isinstance(value, IPSet):
+        value = value.iter_cidrs()
+    if isinstance(value, (Sequence, Iterator)) and not isinstance(value, (str, bytes)):
+        if offset is not None or limit is not None:
+            start = offset or 0
+            stop = start + (limit if limit is not None else max_items)
+            # Sequences (e.g. SubnetSequence) index straight to the page; iterators must skip to it
+            items = list(value[start:stop] if isinstance(value, Sequence) else itertools.islice(value, start, stop))
+        else:
+            items = list(itertools.islice(value, max_items + 1))
+            if len(items) > max_items:
+                raise ValueError(f"Result has more than {max_items} items; request a page with offset/limit")
+        return [_jsonable(item, None, None, max_items) for item in items]
+    return value
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def _invoke(engine, method: str, args, kwargs, offset, limit, max_items) -> str:
+    """Call one engine method and return its JSON-encoded result"""
+    return _dumps(_jsonable(getattr(engine, method)(*args, **kwargs), offset, limit, max_items))
+
+
+def _error(exc: BaseException) -> Dict[str, str]:
+    return {'type': type(exc).__name__, 'message': str(exc)}
+
+
+class _RemoteCallError(Exception):
+    """Carries an engine error from a batch back to its request"""
+
+    def __init__(self, error: Dict[str, str]):
+        super().__init__(error['message'])
+        self.error = error
+
+
+def _run_batch(engine, method: str, calls: List[Tuple], max_items: int) -> List[Tuple[Optional[Dict], Optional[str]]]:
+    """Run a batch of calls to one method, returning (error, result text) pairs"""
+    if method == 'subnet_info' and isinstance(engine, IPCalculator) \
+            and all(len(args) == 1 and not kwargs for args, kwargs, _, _ in calls):
+        try:
+            columns = engine.subnet_info_many(args[0] for args, _, _, _ in calls)
+        except ValueError:
+            pass  # Some input is invalid; fall back to per-item calls for exact errors
+        else:
+            return [(None, _dumps(dict(zip(columns, row)))) for row in zip(*columns.values())]
+    results = []
+    for args, kwargs, offset, limit in calls:
+        try:
+            results.append((None, _invoke(engine, method, args, kwargs, offset, limit, max_items)))
+        except Exception as e:
+            results.append((_error(e), None))
+    return results
+
+
+# Engines owned by each worker process of the heavy-call pool
+_process_engines = {}
+
+
+def _init_process_worker():
+    if hasattr(sys, 'set_int_max_str_digits'):
+        sys.set_int_max_str_digits(0)  # Large factorials are sent as plain JSON numbers
+
+
+def _run_offloaded(engine_name: str, method: str, args, kwargs, offset, limit, max_items) -> str:
+    engine = _process_engines.get(engine_name)
+    if engine is None:
+        engine = _process_engines[engine_name] = ENGINES[engine_name]()
+    return _invoke(engine, method, args, kwargs, offset, limit, max_items)
+
+
+def _is_heavy(engine_name: str, method: str, args, kwargs, offset: Optional[int], limit: Optional[int]) -> bool:
+    """Whether a call is expensive enough to run in the process pool"""
+    if method in OFFLOADED.get(engine_name, ()):
+        return True
+    start = offset or 0
+    try:
+        if engine_name == 'ip' and method == 'subnet_split':
+            # A SubnetSequence page costs only the items it returns
+            version, _, prefixlen = parse_network_int(args[0] if args else kwargs['network_str'])
+            new_prefix = int(args[1] if len(args) > 1 else kwargs['new_prefix'])
+            size = 1 << max(0, min(new_prefix, MAX_BITS[version]) - prefixlen)
+            items = max(0, size - start)
+            return min(items, limit if limit is not None else items) > HEAVY_ITEMS
+        if engine_name == 'ip' and method == 'network_range':
+            # A generator has to be walked past the offset as well
+            size = int(args[1] if len(args) > 1 else kwargs['count'])
+            return min(size, start + limit if limit is not None else size) > HEAVY_ITEMS
+        if engine_name == 'sci' and method in ('factorial', 'combination', 'permutation'):
+            operand = args[0] if args else kwargs.get('n')
+            return isinstance(operand, (int, float)) and math.isfinite(operand) and operand > HEAVY_OPERAND
+    except (IndexError, KeyError, TypeError, ValueError):
+        pass  # Malformed calls run inline and report their own error
+    return False
+
+
+class _Batcher:
+    """Coalesces calls to one engine method arriving within ``window`` seconds"""
+
+    def __init__(self, service: 'CalculatorService', engine_name: str, method: str):
+        self.service = service
+        self.engine_name = engine_name
+        self.method = method
+        self._items = []
+        self._timer = None
+
+    def submit(self, args, kwargs, offset, limit) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._items.append(((args, kwargs, offset, limit), future))
+        if len(self._items) >= self.service.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.service.batch_window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, self._items = self._items, []
+        if not items:
+            return
+        service = self.service
+        service.stats['batches'] += 1
+        service.stats['batched'] += len(items)
+        pending = asyncio.get_running_loop().run_in_executor(
+            service._batch_executor, _run_batch, service.engines[self.engine_name],
+            self.method, [call for call, _ in items], service.max_items)
+        pending.add_done_callback(partial(self._deliver, [future for _, future in items]))
+
+    @staticmethod
+    def _deliver(futures: List[asyncio.Future], pending: asyncio.Future):
+        if pending.cancelled():
+            return
+        exception = pending.exception()
+        results = [(_error(exception), None)] * len(futures) if exception else pending.result()
+        for future, result in zip(futures, results):
+            if not future.done():  # Timed-out requests are already cancelled
+                future.set_result(result)
+
+
+class CalculatorService:
+    """asyncio server exposing the calculator engines
+
+    Cheap calls run inline on the event loop; pure per-item calls listed
+    in ``BATCHED`` are coalesced for ``batch_window`` seconds (or until
+    ``max_batch`` arrive) and run together on a single worker thread; the
+    input-sized calls in ``OFFLOADED``, large ``subnet_split``/
+    ``network_range`` pages and big factorials run in a process pool of
+    ``workers`` processes. Each request's ``timeout`` (default ``timeout``)
+    bounds how long it waits for a batch or pool result: a timed-out call
+    that is already running finishes there and its result is dropped.
+    Inline calls are short enough not to need one and cannot be
+    interrupted by it.
+
+    One engine of each kind serves every connection, so nothing is per
+    connection: the sci engine stays in radians with empty memory, and
+    ``get_history`` shows the service-wide history. Methods that would
+    change that shared state are not exposed (see ``_UNEXPOSED``).
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: Optional[int] = DEFAULT_PORT, path: str = None,
+                 timeout: float = 30.0, batch_window: float = 0.002, max_batch: int = 512,
+                 workers: int = None, max_items: int = 65536, max_inflight: int = 1024):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.timeout = timeout
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.workers = workers
+        self.max_items = max_items
+        self.max_inflight = max_inflight
+        self.engines = {name: engine_class() for name, engine_class in ENGINES.items()}
+        self.stats = {'requests': 0, 'errors': 0, 'timeouts': 0, 'batches': 0, 'batched': 0, 'offloaded': 0}
+        self._batchers: Dict[Tuple[str, str], _Batcher] = {}
+        self._batch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='calculator-batch')
+        self._process_pool = None
+        self._servers = []
+        self._connections = {}
+
+    # Lifecycle
+    async def start(self):
+        """Bind the configured TCP and/or Unix socket listeners"""
+        if self.port is not None:
+            self._servers.append(await asyncio.start_server(self._handle, self.host, self.port, limit=1 << 20))
+        if self.path is not None:
+            self._servers.append(await asyncio.start_unix_server(self._handle, self.path, limit=1 << 20))
+        if not self._servers:
+            raise ValueError("Calculator service needs a TCP port or a Unix socket path")
+
+    @property
+    def addresses(self) -> List[Any]:
+        """Bound (host, port) pairs and Unix socket paths"""
+        return [sock.getsockname() for server in self._servers for sock in server.sockets]
+
+    async def serve_forever(self):
+        if not self._servers:
+            await self.start()
+        await asyncio.gather(*(server.serve_forever() for server in self._servers))
+
+    async def close(self):
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers = []
+        # Closing the transports ends each handler's read loop cleanly
+        for writer in list(self._connections.values()):
+            writer.close()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions=True)
+        self._batch_executor.shutdown(wait=False)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False)
+            self._process_pool = None
+
+    async def __aenter__(self) -> 'CalculatorService':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    # Connections
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        write_lock = asyncio.Lock()
+        slots = asyncio.Semaphore(self.max_inflight)
+        tasks = set()
+        connection = asyncio.current_task()
+        self._connections[connection] = writer
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # Line longer than the stream limit
+                    await self._send(writer, write_lock, None, error={'type': 'ValueError',
+                                                                       'message': "Request line too long"})
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                await slots.acquire()
+                task = asyncio.ensure_future(self._respond(line, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda _: slots.release())
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+            self._connections.pop(connection, None)
+
+    async def _send(self, writer, write_lock, request_id, result: str = None, error: Dict[str, str] = None):
+        if error is not None:
+            self.stats['errors'] += 1
+            line = _dumps({'id': request_id, 'error': error})
+        else:
+            line = f'{{"id":{_dumps(request_id)},"result":{result}}}'
+        async with write_lock:
+            writer.write(line.encode('utf-8') + b'\n')
+            await writer.drain()
+
+    async def _respond(self, line: bytes, writer, write_lock):
+        self.stats['requests'] += 1
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+            request_id = request.get('id')
+            timeout = request.get('timeout', self.timeout)
+            result = await asyncio.wait_for(self._dispatch(request), timeout)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            await self._send(writer, write_lock, request_id,
+                             error={'type': 'TimeoutError', 'message': f"Request timed out after {timeout}s"})
+        except _RemoteCallError as e:
+            await self._send(writer, write_lock, request_id, error=e.error)
+        except Exception as e:
+            await self._send(writer, write_lock, request_id, error=_error(e))
+        else:
+            await self._send(writer, write_lock, request_id, result)
+
+    async def _dispatch(self, request: Dict[str, Any]) -> str:
+        """Route one request and return its JSON-encoded result"""
+        engine_name = request.get('engine')
+        method = request.get('method')
+        args = request.get('args') or []
+        kwargs = request.get('kwargs') or {}
+        offset, limit = request.get('offset'), request.get('limit')
+        if not isinstance(args, list) or not isinstance(kwargs, dict):
+            raise ValueError("'args' must be a list and 'kwargs' an object")
+        for bound in (offset, limit):
+            if bound is not None and (type(bound) is not int or bound < 0):
+                raise ValueError("'offset' and 'limit' must be non-negative integers")
+
+        if engine_name == 'service':
+            return _dumps(self._service_call(method))
+        if engine_name not in self.engines:
+            raise ValueError(f"Unknown engine: {engine_name!r} (expected one of {', '.join(self.engines)})")
+        if method not in EXPOSED[engine_name]:
+            raise ValueError(f"Unknown method: {engine_name}.{method}")
+
+        if _is_heavy(engine_name, method, args, kwargs, offset, limit):
+            self.stats['offloaded'] += 1
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                         initializer=_init_process_worker)
+            return await asyncio.get_running_loop().run_in_executor(
+                self._process_pool, _run_offloaded, engine_name, method, args, kwargs,
+                offset, limit, self.max_items)
+        if method in BATCHED[engine_name]:
+            batcher = self._batchers.get((engine_name, method))
+            if batcher is None:
+                batcher = self._batchers[(engine_name, method)] = _Batcher(self, engine_name, method)
+            error, result = await batcher.submit(args, kwargs, offset, limit)
+            if error is not None:
+                raise _RemoteCallError(error)
+            return result
+        return _invoke(self.engines[engine_name], method, args, kwargs, offset, limit, self.max_items)
+
+    def _service_call(self, method: str) -> Any:
+        if method == 'ping':
+            return 'pong'
+        if method == 'stats':
+            return dict(self.stats)
+        if method == 'methods':
+            return {name: sorted(methods) for name, methods in EXPOSED.items()}
+        raise ValueError(f"Unknown method: service.{method}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Serve the calculator engines over JSON lines")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="TCP host to bind")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="TCP port (0 = disable TCP)")
+    parser.add_argument('--unix', help="Unix socket path to bind as well")
+    parser.add_argument('--workers', type=int, help="Processes for heavy calls (default: one per CPU)")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Default per-request timeout in seconds")
+    parser.add_argument('--batch-window', type=float, default=0.002, help="Seconds to coalesce batched calls")
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point"""
+    args = build_parser().parse_args(argv)
+    if hasattr(sys, 'set_int_max_str_digits'):
+        sys.set_int_max_str_digits(0)
+    service = CalculatorService(host=args.host, port=args.port or None, path=args.unix,
+                                timeout=args.timeout, batch_window=args.batch_window, workers=args.workers)
+
+    async def run():
+        try:
+            await service.start()
+            for address in service.addresses:
+                print(f"🧮 Calculator service listening on {address}", file=sys.stderr)
+            await service.serve_forever()
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(run())
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+IP Aggregate Module
+Lossy prefix aggregation: trade extra covered addresses for fewer entries
+"""
+
+import heapq
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Union
+
+from ip_calculator import MAX_BITS, format_ip_int
+from ip_set import IPSet
+
+
+def aggregate_lossy(networks: Iterable[str], max_entries: int = None,
+                    max_overshoot: int = None) -> Dict[str, Union[int, list, IPSet]]:
+    """Summarize networks into fewer, larger prefixes
+
+    Starts from the exact collapse and repeatedly replaces a pair of
+    neighbouring blocks (plus anything between them) with their smallest
+    common supernet, always taking the merge that adds the fewest new
+    addresses per entry saved (a lazily updated heap). With
+    ``max_entries`` merging stops once the list is that short; with
+    ``max_overshoot`` only merges keeping the total number of extra
+    addresses within the budget are made. With both, the entry target must
+    be met within the budget or ValueError is raised.
+
+    Returns 'networks', 'entries', 'original_entries', 'overshoot' (extra
+    address count) and 'over_covered' (an IPSet of exactly those addresses).
+    """
+    if max_entries is None and max_overshoot is None:
+        raise ValueError("Give max_entries and/or max_overshoot")
+    if max_entries is not None and max_entries < 1:
+        raise ValueError("max_entries must be positive")
+    if max_overshoot is not None and max_overshoot < 0:
+        raise ValueError("max_overshoot must not be negative")
+    try:
+        exact = IPSet(networks)
+    except ValueError as e:
+        raise ValueError(f"Error summarizing networks: {e}")
+
+    # Blocks live in parallel arrays linked in address order; merged blocks are appended.
+    # Each block also owns a slot (the original position of its lowest member) in two
+    # Fenwick trees holding block sizes and counts, so the blocks inside any supernet
+    # are summed in O(log n) via bisect on the original, address-ordered keys.
+    versions, starts, lasts, nexts, prevs, slots, alive = [], [], [], [], [], [], []
+    for version, network, prefixlen in exact.iter_blocks():
+        versions.append(version)
+        starts.append(network)
+        lasts.append(network | ((1 << (MAX_BITS[version] - prefixlen)) - 1))
+    count = original = len(starts)
+    keys = [(version << 128) | start for version, start in zip(versions, starts)]
+    nexts.extend(range(1, count + 1))
+    prevs.extend(range(-1, count - 1))
+    slots.extend(range(count))
+    alive.extend([True] * count)
+    if count:
+        nexts[-1] = -1
+    head = 0 if count else -1
+
+    tree_size = count
+    sizes = [0] * (tree_size + 1)
+    counts = [0] * (tree_size + 1)
+
+    def update(slot: int, size: int, delta: int):
+        slot += 1
+        while slot <= tree_size:
+            sizes[slot] += size
+            counts[slot] += delta
+            slot += slot & -slot
+
+    def prefix(slot: int):
+        size = total = 0
+        while slot > 0:
+            size += sizes[slot]
+            total += counts[slot]
+            slot -= slot & -slot
+        return size, total
+
+    # Linear-time Fenwick construction
+    for slot in range(1, tree_size + 1):
+        sizes[slot] += lasts[slot - 1] - starts[slot - 1] + 1
+        counts[slot] += 1
+        parent = slot + (slot & -slot)
+        if parent <= tree_size:
+            sizes[parent] += sizes[slot]
+            counts[parent] += counts[slot]
+
+    def candidate(left: int):
+        """(ratio, extra, left, right, supernet start, last) for merging left with its successor"""
+        right = nexts[left]
+        if right < 0 or versions[right] != versions[left]:
+            return None
+        host_bits = (starts[left] ^ lasts[right]).bit_length()
+        first = starts[left] >> host_bits << host_bits
+        last = first | ((1 << host_bits) - 1)
+        base = versions[left] << 128
+        high_size, high_count = prefix(bisect_right(keys, base | last))
+        low_size, low_count = prefix(bisect_left(keys, base | first))
+        extra = last - first + 1 - (high_size - low_size)
+        return extra / (high_count - low_count - 1), extra, left, right, first, last
+
+    heap = [item for item in map(candidate, range(count)) if item is not None]
+    heapq.heapify(heap)
+    overshoot = 0
+    while heap and (max_entries is None or count > max_entries):
+        item = heapq.heappop(heap)
+        left, right = item[2], item[3]
+        if not (alive[left] and alive[right] and nexts[left] == right):
+            continue
+        current = candidate(left)
+        if current[:2] != item[:2]:
+            heapq.heappush(heap, current)  # Blocks inside the supernet changed since queued
+            continue
+        ratio, extra, _, _, first, last = current
+        if max_overshoot is not None and overshoot + extra > max_overshoot:
+            continue  # A pair's cost never drops while it exists, so it can be dropped
+        # Replace every block inside the supernet with the supernet itself
+        low, high = left, right
+        while prevs[low] >= 0 and starts[prevs[low]] >= first and versions[prevs[low]] == versions[left]:
+            low = prevs[low]
+        while nexts[high] >= 0 and lasts[nexts[high]] <= last and versions[nexts[high]] == versions[left]:
+            high = nexts[high]
+        node = len(starts)
+        versions.append(versions[left])
+        starts.append(first)
+        lasts.append(last)
+        prevs.append(prevs[low])
+        nexts.append(nexts[high])
+        slots.append(slots[low])
+        alive.append(True)
+        run = low
+        while True:
+            alive[run] = False
+            update(slots[run], starts[run] - lasts[run] - 1, -1)
+            count -= 1
+            if run == high:
+                break
+            run = nexts[run]
+        update(slots[node], last - first + 1, 1)
+        count += 1
+        if prevs[node] >= 0:
+            nexts[prevs[node]] = node
+        else:
+            head = node
+        if nexts[node] >= 0:
+            prevs[nexts[node]] = node
+        overshoot += extra
+        for pair_left in (prevs[node], node):
+            if pair_left >= 0:
+                queued = candidate(pair_left)
+                if queued is not None:
+                    heapq.heappush(heap, queued)
+
+    if max_entries is not None and count > max_entries:
+        if max_overshoot is not None:
+            raise ValueError(f"Cannot reduce to {max_entries} entries within an overshoot of {max_overshoot} addresses")
+        families = len({versions[node] for node in range(len(alive)) if alive[node]})
+        raise ValueError(f"Cannot reduce to {max_entries} entries: blocks of different address families "
+                         f"never merge, so at least {families} are needed")
+
+    result_networks = []
+    node = head
+    while node >= 0:
+        host_bits = (lasts[node] - starts[node] + 1).bit_length() - 1
+        result_networks.append(f"{format_ip_int(versions[node], starts[node])}/{MAX_BITS[versions[node]] - host_bits}")
+        node = nexts[node]
+    return {
+        'networks': result_networks,
+        'entries': count,
+        'original_entries': original,
+        'overshoot': overshoot,
+        'over_covered': IPSet(result_networks) - exact,
+    }
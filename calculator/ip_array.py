@@ -0,0 +1,241 @@
+"""
+IP Array Module
+Vectorized container for large batches of IP addresses with NumPy-backed
+operations and a pure-Python fallback
+"""
+
+import socket
+import sys
+from array import array
+from typing import Iterable, List, Union
+
+from ip_calculator import MAX_BITS, NETWORK_CLASS_BY_OCTET, parse_ip_int, parse_network_int, format_ip_int
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+_U32 = 'I' if array('I').itemsize == 4 else 'L'
+_U64 = 'Q'
+_MASK64 = (1 << 64) - 1
+_FAMILIES = {4: socket.AF_INET, 6: socket.AF_INET6}
+
+
+def _pack_strings(strings: Iterable[str], version: Union[int, None]):
+    """Pack address strings into one network-order buffer"""
+    packed = []
+    for ip_str in strings:
+        if version is None:
+            version = 6 if ':' in ip_str else 4
+        try:
+            packed.append(socket.inet_pton(_FAMILIES[version], ip_str))
+        except (OSError, TypeError):
+            raise ValueError(f"{ip_str!r} does not appear to be an IPv{version} address")
+    return version or 4, b''.join(packed)
+
+
+class IPArray:
+    """Single-family array of IP addresses
+
+    IPv4 addresses are stored as one uint32 column; IPv6 addresses as a pair
+    of uint64 columns (high and low halves). With NumPy installed every
+    operation is vectorized; otherwise ``array`` columns and plain loops are
+    used with identical results.
+    """
+
+    def __init__(self, strings: Iterable[str] = (), version: Union[int, None] = None):
+        version, packed = _pack_strings(strings, version)
+        self._load_packed(packed, version)
+
+    # Construction
+    @classmethod
+    def from_packed(cls, packed: Union[bytes, bytearray, memoryview], version: int = 4) -> 'IPArray':
+        """Build from network-order packed addresses (4 or 16 bytes each)"""
+        result = cls.__new__(cls)
+        result._load_packed(bytes(packed), version)
+        return result
+
+    @classmethod
+    def from_ints(cls, values: Iterable[int], version: int = 4) -> 'IPArray':
+        """Build from integer addresses"""
+        width = MAX_BITS[version] // 8
+        try:
+            packed = b''.join(int(value).to_bytes(width, 'big') for value in values)
+        except OverflowError:
+            raise ValueError(f"Integer value out of range for IPv{version}")
+        return cls.from_packed(packed, version)
+
+    def _load_packed(self, packed: bytes, version: int):
+        width = MAX_BITS[version] // 8
+        if len(packed) % width:
+            raise ValueError(f"Packed buffer length must be a multiple of {width}")
+        self.version = version
+        if version == 4:
+            self._hi = None
+            if np is not None:
+                self._lo = np.frombuffer(packed, dtype='>u4').astype(np.uint32)
+            else:
+                self._lo = array(_U32)
+                self._lo.frombytes(packed)
+                if sys.byteorder == 'little':
+                    self._lo.byteswap()
+        else:
+            if np is not None:
+                pairs = np.frombuffer(packed, dtype='>u8').astype(np.uint64).reshape(-1, 2)
+                self._hi, self._lo = pairs[:, 0].copy(), pairs[:, 1].copy()
+            else:
+                words = array(_U64)
+                words.frombytes(packed)
+                if sys.byteorder == 'little':
+                    words.byteswap()
+                self._hi, self._lo = words[0::2], words[1::2]
+
+    def _derive(self, hi, lo) -> 'IPArray':
+        result = self.__class__.__new__(self.__class__)
+        result.version, result._hi, result._lo = self.version, hi, lo
+        return result
+
+    # Container protocol
+    def __len__(self) -> int:
+        return len(self._lo)
+
+    def __getitem__(self, index: int) -> str:
+        return format_ip_int(self.version, self._int_at(index))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self) -> str:
+        return f"IPArray(version={self.version}, size={len(self)})"
+
+    def _int_at(self, index: int) -> int:
+        if self._hi is None:
+            return int(self._lo[index])
+        return (int(self._hi[index]) << 64) | int(self._lo[index])
+
+    # Vectorized operations
+    @staticmethod
+    def validate(strings: Iterable[str]) -> List[bool]:
+        """Validity flag for every string (either family)
+
+        Accepts what ``IPCalculator.validate_ip`` accepts for strings,
+        including scoped IPv6 ('fe80::1%eth0'); malformed input (embedded
+        NULs, non-strings) is simply False.
+        """
+        flags = []
+        for ip_str in strings:
+            valid = False
+            for family in (socket.AF_INET, socket.AF_INET6):
+                try:
+                    socket.inet_pton(family, ip_str)
+                    valid = True
+                    break
+                except (OSError, TypeError, ValueError, UnicodeError):
+                    pass
+            if not valid and isinstance(ip_str, str) and '%' in ip_str:
+                try:
+                    parse_ip_int(ip_str)
+                    valid = True
+                except ValueError:
+                    pass
+            flags.append(valid)
+        return flags
+
+    def to_int(self):
+        """Integer values: a uint32 column for IPv4, Python ints for IPv6"""
+        if self._hi is None:
+            return self._lo.copy() if np is not None else array(_U32, self._lo)
+        return [(int(hi) << 64) | int(lo) for hi, lo in zip(self._hi, self._lo)]
+
+    def to_strings(self) -> List[str]:
+        """Addresses formatted as strings"""
+        return list(self)
+
+    def to_packed(self) -> bytes:
+        """Network-order packed addresses"""
+        if np is not None:
+            if self._hi is None:
+                return self._lo.astype('>u4').tobytes()
+            return np.column_stack((self._hi, self._lo)).astype('>u8').tobytes()
+        if self._hi is None:
+            words = array(_U32, self._lo)
+        else:
+            words = array(_U64, [0]) * (2 * len(self))
+            words[0::2], words[1::2] = self._hi, self._lo
+        if sys.byteorder == 'little':
+            words.byteswap()
+        return words.tobytes()
+
+    def _split_masks(self, prefixlen: int):
+        """(high, low) halves of the netmask for ``prefixlen``"""
+        max_bits = MAX_BITS[self.version]
+        if not 0 <= prefixlen <= max_bits:
+            raise ValueError(f"IPv{self.version} prefix length must be 0-{max_bits}")
+        netmask = ((1 << max_bits) - 1) ^ ((1 << (max_bits - prefixlen)) - 1)
+        return netmask >> 64, netmask & (_MASK64 if self._hi is not None else 0xFFFFFFFF)
+
+    def mask(self, prefixlen: int) -> 'IPArray':
+        """New array with host bits beyond ``prefixlen`` cleared"""
+        mask_hi, mask_lo = self._split_masks(prefixlen)
+        if np is not None:
+            lo = self._lo & self._lo.dtype.type(mask_lo)
+            hi = None if self._hi is None else self._hi & np.uint64(mask_hi)
+            return self._derive(hi, lo)
+        lo = array(self._lo.typecode, [value & mask_lo for value in self._lo])
+        hi = None if self._hi is None else array(_U64, [value & mask_hi for value in self._hi])
+        return self._derive(hi, lo)
+
+    def in_network(self, network_str: str):
+        """Membership flag for every address (bool column with NumPy)"""
+        version, key, prefixlen = parse_network_int(network_str)
+        if version != self.version:
+            return np.zeros(len(self), dtype=bool) if np is not None else [False] * len(self)
+        mask_hi, mask_lo = self._split_masks(prefixlen)
+        key_hi, key_lo = key >> 64, key & _MASK64
+        if np is not None:
+            dtype = self._lo.dtype.type
+            result = (self._lo & dtype(mask_lo)) == dtype(key_lo)
+            if self._hi is not None:
+                result &= (self._hi & np.uint64(mask_hi)) == np.uint64(key_hi)
+            return result
+        if self._hi is None:
+            return [(value & mask_lo) == key_lo for value in self._lo]
+        return [(hi & mask_hi) == key_hi and (lo & mask_lo) == key_lo
+                for hi, lo in zip(self._hi, self._lo)]
+
+    def network_class(self) -> List[str]:
+        """Classful network class for every IPv4 address"""
+        if self.version != 4:
+            return ['N/A'] * len(self)
+        if np is not None:
+            return np.asarray(NETWORK_CLASS_BY_OCTET, dtype=object)[self._lo >> np.uint32(24)].tolist()
+        return [NETWORK_CLASS_BY_OCTET[value >> 24] for value in self._lo]
+
+    def sort(self):
+        """Sort addresses in place"""
+        if np is not None:
+            if self._hi is None:
+                self._lo.sort()
+            else:
+                order = np.lexsort((self._lo, self._hi))
+                self._hi, self._lo = self._hi[order], self._lo[order]
+        elif self._hi is None:
+            self._lo = array(self._lo.typecode, sorted(self._lo))
+        else:
+            pairs = sorted(zip(self._hi, self._lo))
+            self._hi = array(_U64, [hi for hi, _ in pairs])
+            self._lo = array(_U64, [lo for _, lo in pairs])
+
+    def unique(self) -> 'IPArray':
+        """New sorted array with duplicates removed"""
+        if np is not None:
+            if self._hi is None:
+                return self._derive(None, np.unique(self._lo))
+            pairs = np.unique(np.column_stack((self._hi, self._lo)), axis=0)
+            return self._derive(pairs[:, 0].copy(), pairs[:, 1].copy())
+        if self._hi is None:
+            return self._derive(None, array(self._lo.typecode, sorted(set(self._lo))))
+        pairs = sorted(set(zip(self._hi, self._lo)))
+        return self._derive(array(_U64, [hi for hi, _ in pairs]), array(_U64, [lo for _, lo in pairs]))
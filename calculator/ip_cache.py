@@ -0,0 +1,94 @@
+"""
+IP Cache Module
+Bounded parse cache for ipaddress objects and derived results
+"""
+
+import ipaddress
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple
+
+
+class CacheInfo(NamedTuple):
+    """Cache statistics snapshot"""
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+    policy: str
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ParseCache:
+    """Size-bounded cache shared by IPCalculator and its GUI
+
+    Entries are keyed by kind ('address', 'network', 'subnet_info', ...)
+    and input string. ``policy`` is 'lru' (hits refresh an entry) or
+    'fifo' (entries are evicted in insertion order).
+    """
+
+    POLICIES = ('lru', 'fifo')
+
+    def __init__(self, maxsize: int = 4096, policy: str = 'lru'):
+        if maxsize < 1:
+            raise ValueError("Cache size must be positive")
+        if policy not in self.POLICIES:
+            raise ValueError(f"Eviction policy must be one of {', '.join(self.POLICIES)}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, kind: str, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached value or compute, store and return it
+
+        Exceptions raised by ``factory`` propagate and nothing is cached.
+        """
+        cache_key = (kind, key)
+        with self._lock:
+            try:
+                value = self._entries[cache_key]
+            except KeyError:
+                self._misses += 1
+            else:
+                self._hits += 1
+                if self.policy == 'lru':
+                    self._entries.move_to_end(cache_key)
+                return value
+
+        value = factory()
+        with self._lock:
+            self._entries[cache_key] = value
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return value
+
+    def ip_address(self, ip_str: str):
+        """Cached ``ipaddress.ip_address``"""
+        return self.get('address', ip_str, lambda: ipaddress.ip_address(ip_str))
+
+    def ip_network(self, network_str: str):
+        """Cached ``ipaddress.ip_network(..., strict=False)``"""
+        return self.get('network', network_str, lambda: ipaddress.ip_network(network_str, strict=False))
+
+    def cache_info(self) -> CacheInfo:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions,
+                             self.maxsize, len(self._entries), self.policy)
+
+    def clear(self):
+        """Drop all entries and reset statistics"""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
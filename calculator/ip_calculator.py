@@ -6,33 +6,476 @@ Comprehensive IP address calculations and subnet operations
 import ipaddress
 import socket
 import struct
-from typing import List, Dict, Tuple, Union
+from bisect import bisect_right
+from collections import deque
+from collections.abc import Sequence
+from contextlib import contextmanager
+from typing import IO, Iterable, Iterator, List, Dict, Tuple, Union
+
+# Address width in bits for each IP version
+MAX_BITS = {4: 32, 6: 128}
+
+
+# Integer helpers (no ipaddress objects on the hot path)
+_AF_INET, _inet_pton, _from_bytes = socket.AF_INET, socket.inet_pton, int.from_bytes
+
+
+def _pton_int(ip_str) -> Union[Tuple[int, int], None]:
+    """(version, integer value) of a plain address string via inet_pton, or None"""
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip_str), 'big')
+    except (OSError, TypeError, ValueError):
+        pass
+    try:
+        return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, ip_str), 'big')
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+def parse_ip_int(ip_str: str) -> Tuple[int, int]:
+    """Parse an IP address into (version, integer value)
+
+    Plain strings go through inet_pton; anything else ``ip_address``
+    accepts (scoped IPv6, integers, packed bytes) falls back to it.
+    """
+    parsed = _pton_int(ip_str)
+    if parsed is not None:
+        return parsed
+    try:
+        address = ipaddress.ip_address(ip_str)
+    except (ValueError, TypeError):
+        raise ValueError(f"{ip_str!r} does not appear to be an IPv4 or IPv6 address")
+    return address.version, int(address)
+
+
+def parse_ipv4_int(ip_str: str) -> Union[int, None]:
+    """Integer value of a dotted-quad IPv4 string, or None
+
+    inet_pton accepts exactly the strict dotted-quad form ipaddress does;
+    None means "not handled here" (IPv6, packed or integer input, invalid
+    strings) and callers fall back to ``ipaddress`` for those.
+    """
+    try:
+        return _from_bytes(_inet_pton(_AF_INET, ip_str), 'big')
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+def parse_network_int(network_str: str) -> Tuple[int, int, int]:
+    """Parse a network into (version, network integer, prefix length)
+
+    Host bits are masked off, matching ``ip_network(..., strict=False)``,
+    which also handles whatever the string fast path does not (scoped
+    IPv6, hostmasks, integer/bytes/tuple arguments).
+    """
+    parsed = None
+    if isinstance(network_str, str):
+        addr, sep, prefix = network_str.partition('/')
+        parsed = _pton_int(addr)
+    if parsed is not None:
+        version, value = parsed
+        max_bits = MAX_BITS[version]
+        if not sep:
+            return version, value, max_bits
+        if prefix.isdigit() and prefix.isascii():
+            prefixlen = int(prefix)
+            if prefixlen > max_bits:
+                raise ValueError(f"Invalid prefix length in {network_str!r}")
+            host_bits = max_bits - prefixlen
+            return version, (value >> host_bits) << host_bits, prefixlen
+        if version == 4 and prefix in NETMASK_PREFIXES[4]:
+            prefixlen = NETMASK_PREFIXES[4][prefix]
+            host_bits = max_bits - prefixlen
+            return version, (value >> host_bits) << host_bits, prefixlen
+    # Edge cases (non-canonical netmasks, scopes, non-string input): let ipaddress decide
+    try:
+        network = ipaddress.ip_network(network_str, strict=False)
+    except TypeError:
+        raise ValueError(f"{network_str!r} does not appear to be an IPv4 or IPv6 network")
+    return network.version, int(network.network_address), network.prefixlen
+
+
+def format_ip_int(version: int, value: int) -> str:
+    """Format an integer as an IP address string"""
+    if version == 4:
+        return socket.inet_ntop(socket.AF_INET, value.to_bytes(4, 'big'))
+    return str(ipaddress.IPv6Address(value))
+
+
+def range_blocks(version: int, start: int, end: int) -> Iterator[Tuple[int, int]]:
+    """Yield (network, prefix length) pairs exactly covering [start, end]
+
+    Each block is the largest one aligned at the current start (trailing
+    zeros) that still fits in the remaining span (bit length), which gives
+    the minimal CIDR cover.
+    """
+    max_bits = MAX_BITS[version]
+    while start <= end:
+        align_bits = (start & -start).bit_length() - 1 if start else max_bits
+        span_bits = (end - start + 1).bit_length() - 1
+        bits = min(align_bits, span_bits)
+        yield start, max_bits - bits
+        start += 1 << bits
+
+
+def _build_prefix_table(version: int) -> List[Dict[str, Union[int, str]]]:
+    """One entry per prefix length with its mask, wildcard and host counts"""
+    max_bits = MAX_BITS[version]
+    all_ones = (1 << max_bits) - 1
+    table = []
+    for prefixlen in range(max_bits + 1):
+        host_bits = max_bits - prefixlen
+        total = 1 << host_bits
+        wildcard = total - 1
+        table.append({
+            'prefix_length': prefixlen,
+            'host_bits': host_bits,
+            'netmask_int': all_ones ^ wildcard,
+            'netmask': format_ip_int(version, all_ones ^ wildcard),
+            'wildcard_int': wildcard,
+            'wildcard': format_ip_int(version, wildcard),
+            'total_addresses': total,
+            # IPv4 loses the network and broadcast addresses; IPv6 has neither
+            'usable_hosts': max(0, total - 2) if version == 4 else total,
+            # How many /prefixlen networks the whole address space holds
+            'subnets_in_parent': 1 << prefixlen,
+        })
+    return table
+
+
+# Per-prefix facts indexed as PREFIX_TABLES[version][prefix length]
+PREFIX_TABLES = {version: _build_prefix_table(version) for version in (4, 6)}
+
+# Reverse maps from a contiguous netmask (canonical string or integer) to its prefix length
+NETMASK_PREFIXES = {version: {entry['netmask']: entry['prefix_length'] for entry in table}
+                    for version, table in PREFIX_TABLES.items()}
+_NETMASK_INT_PREFIXES = {version: {entry['netmask_int']: entry['prefix_length'] for entry in table}
+                         for version, table in PREFIX_TABLES.items()}
+
+
+def netmask_to_prefix(netmask_str: str) -> Tuple[int, int]:
+    """(version, prefix length) of a netmask; ValueError if it is not contiguous"""
+    for version in (4, 6):
+        prefixlen = NETMASK_PREFIXES[version].get(netmask_str)
+        if prefixlen is not None:
+            return version, prefixlen
+    # Non-canonical spelling (e.g. an expanded IPv6 mask)
+    version, value = parse_ip_int(netmask_str)
+    prefixlen = _NETMASK_INT_PREFIXES[version].get(value)
+    if prefixlen is None:
+        raise ValueError(f"{netmask_str!r} is not a contiguous netmask")
+    return version, prefixlen
+
+
+class _IntervalTable:
+    """Sorted, disjoint integer intervals with bisect-based membership"""
+
+    def __init__(self, networks: Iterable, merge: bool):
+        intervals = sorted((int(net.network_address), int(net.broadcast_address)) for net in networks)
+        self.starts, self.ends = [], []
+        for start, end in intervals:
+            if self.ends and start <= self.ends[-1] + (1 if merge else 0):
+                # Nested (or, when merging, adjacent) interval
+                self.ends[-1] = max(self.ends[-1], end)
+                continue
+            self.starts.append(start)
+            self.ends.append(end)
+
+    def contains(self, start: int, end: int) -> bool:
+        """True if [start, end] lies inside one stored interval"""
+        i = bisect_right(self.starts, start) - 1
+        return i >= 0 and end <= self.ends[i]
+
+    def contains_point(self, value: int) -> bool:
+        return self.contains(value, value)
+
+
+def _build_flag_tables(constants) -> Dict[str, _IntervalTable]:
+    """Interval tables reproducing the ipaddress private/multicast/reserved rules"""
+    reserved = getattr(constants, '_reserved_networks', None) or [constants._reserved_network]
+    return {
+        # A network is private when a single listed network contains it
+        'private': _IntervalTable(constants._private_networks, merge=False),
+        'private_exceptions': _IntervalTable(getattr(constants, '_private_networks_exceptions', []), merge=True),
+        'multicast': _IntervalTable([constants._multicast_network], merge=True),
+        # Reserved is tested per endpoint against any listed network
+        'reserved': _IntervalTable(reserved, merge=True),
+    }
+
+
+_FLAG_TABLES = {
+    4: _build_flag_tables(ipaddress.IPv4Network._constants if hasattr(ipaddress.IPv4Network, '_constants')
+                          else ipaddress._IPv4Constants),
+    6: _build_flag_tables(ipaddress.IPv6Network._constants if hasattr(ipaddress.IPv6Network, '_constants')
+                          else ipaddress._IPv6Constants),
+}
+
+
+def network_flags(version: int, start: int, end: int) -> Tuple[bool, bool, bool]:
+    """(is_private, is_multicast, is_reserved) for the range [start, end]
+
+    Matches ``ip_network(...).is_private`` etc. using one bisect per table
+    instead of scanning ipaddress's network lists.
+    """
+    tables = _FLAG_TABLES[version]
+    exceptions = tables['private_exceptions']
+    is_private = (tables['private'].contains(start, end)
+                  and not exceptions.contains_point(start) and not exceptions.contains_point(end))
+    multicast, reserved = tables['multicast'], tables['reserved']
+    is_multicast = multicast.contains_point(start) and multicast.contains_point(end)
+    is_reserved = reserved.contains_point(start) and reserved.contains_point(end)
+    return is_private, is_multicast, is_reserved
+
+
+def _network_class_for_octet(first_octet: int) -> str:
+    """Determine network class from the first octet of an IPv4 address"""
+    if 1 <= first_octet <= 126:
+        return "A"
+    elif 128 <= first_octet <= 191:
+        return "B"
+    elif 192 <= first_octet <= 223:
+        return "C"
+    elif 224 <= first_octet <= 239:
+        return "D (Multicast)"
+    elif 240 <= first_octet <= 255:
+        return "E (Experimental)"
+    else:
+        return "Invalid"
+
+
+# Network class indexed by first octet
+NETWORK_CLASS_BY_OCTET = tuple(_network_class_for_octet(octet) for octet in range(256))
+
+
+# Keys of the dictionary returned by IPCalculator.subnet_info
+SUBNET_INFO_FIELDS = (
+    'network_address', 'broadcast_address', 'netmask', 'prefix_length',
+    'total_addresses', 'usable_addresses', 'first_usable', 'last_usable',
+    'network_class', 'is_private', 'is_multicast', 'is_reserved', 'version',
+)
+
+
+def subnet_fields(version: int, network: int, prefixlen: int) -> Tuple:
+    """Values for SUBNET_INFO_FIELDS computed with integer arithmetic"""
+    entry = PREFIX_TABLES[version][prefixlen]
+    total = entry['total_addresses']
+    last = network + total - 1
+
+    if version == 4:
+        if total > 2:
+            first_usable = format_ip_int(4, network + 1)
+            last_usable = format_ip_int(4, last - 1)
+        else:
+            first_usable = last_usable = 'N/A'
+        broadcast = format_ip_int(4, last)
+        network_class = NETWORK_CLASS_BY_OCTET[network >> 24]
+    else:
+        # Skip the Subnet-Router anycast address except on /127 and /128
+        first_usable = format_ip_int(6, network + 1 if total > 2 else network)
+        last_usable = format_ip_int(6, last)
+        broadcast = 'N/A (IPv6)'
+        network_class = 'N/A'
+
+    is_private, is_multicast, is_reserved = network_flags(version, network, last)
+    return (format_ip_int(version, network), broadcast, entry['netmask'], prefixlen,
+            total, entry['usable_hosts'], first_usable, last_usable, network_class,
+            is_private, is_multicast, is_reserved, version)
+
+
+class SubnetSequence(Sequence):
+    """Lazy, read-only sequence of the subnets produced by a split
+
+    Subnets are computed arithmetically on demand, so splitting a huge
+    allocation (e.g. an IPv6 /32 into /64s) costs nothing until items are
+    read. ``total`` is always available; ``len()`` raises OverflowError when
+    the count exceeds ``sys.maxsize``, but truth tests, iteration and
+    ``reversed()`` never need it.
+    """
+
+    def __init__(self, version: int, network: int, prefixlen: int, new_prefix: int):
+        self.version = version
+        self.network = network
+        self.prefixlen = prefixlen
+        self.new_prefix = new_prefix
+        self.total = 1 << (new_prefix - prefixlen)
+        self._step = 1 << (MAX_BITS[version] - new_prefix)
+
+    def __len__(self) -> int:
+        return self.total
+
+    def __bool__(self) -> bool:
+        return self.total > 0
+
+    def _subnet(self, i: int) -> str:
+        return f"{format_ip_int(self.version, self.network + i * self._step)}/{self.new_prefix}"
+
+    def __getitem__(self, index):
+        positions = range(self.total)[index]
+        if isinstance(index, slice):
+            return [self._subnet(i) for i in positions]
+        return self._subnet(positions)
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self.total):
+            yield self._subnet(i)
+
+    def __reversed__(self) -> Iterator[str]:
+        for i in reversed(range(self.total)):
+            yield self._subnet(i)
+
+    def __contains__(self, network_str) -> bool:
+        try:
+            return self.index(network_str) >= 0
+        except ValueError:
+            return False
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, SubnetSequence):
+            return (self.version, self.network, self.prefixlen, self.new_prefix) == \
+                (other.version, other.network, other.prefixlen, other.new_prefix)
+        if isinstance(other, (list, tuple)):
+            return self.total == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        parent = f"{format_ip_int(self.version, self.network)}/{self.prefixlen}"
+        return f"SubnetSequence({parent!r} -> /{self.new_prefix}, total={self.total})"
+
+    def index(self, network_str, start: int = 0, stop: Union[int, None] = None) -> int:
+        """Position of a subnet, computed arithmetically
+
+        Any spelling of a member matches (uncompressed IPv6, host bits set),
+        as ``parse_network_int`` normalizes it first.
+        """
+        if not isinstance(network_str, str):
+            raise ValueError(f"{network_str!r} is not in sequence")
+        version, key, prefixlen = parse_network_int(network_str)
+        position = (key - self.network) // self._step
+        stop = self.total if stop is None else stop
+        if (version != self.version or prefixlen != self.new_prefix
+                or not max(start, 0) <= position < min(stop, self.total)):
+            raise ValueError(f"{network_str} is not in sequence")
+        return position
+
+    def count(self, network_str) -> int:
+        """Number of occurrences (0 or 1) of a subnet"""
+        return 1 if network_str in self else 0
+
+    def page(self, offset: int = 0, limit: int = 100) -> List[str]:
+        """Subnets ``offset`` to ``offset + limit`` as strings"""
+        return self[offset:offset + limit]
+
+
+# History line templates by operation id (None: free-form add_to_history entries)
+HISTORY_FORMATS = {
+    None: "{0} = {1}",
+    'ip_to_binary': "IP {0} to binary = {1}",
+    'ipv6_to_binary': "IPv6 {0} to binary = {1}",
+    'ip_to_decimal': "IP {0} to decimal = {1}",
+    'decimal_to_ip': "Decimal {0} to IPv{1} = {2}",
+    'binary_to_ip': "Binary {0} to IPv{1} = {2}",
+    'subnet_info': "Subnet info for {0} = Network: {1}/{2}",
+    'subnet_info_many': "Subnet info for many networks = {0} networks",
+    'subnet_split': "Split {0} into /{1} = {2} subnets",
+    'subnet_summary': "Summarize {0} networks = {1}",
+    'subnet_summary_lossy': "Lossy summary of {0} networks = {1} entries, {2} extra addresses",
+    'ip_in_subnet': "Is {0} in {1}? = {2}",
+    'build_route_table': "Build route table = {0} prefixes",
+    'compress_routes': "Compress route table: {0} -> {1} routes",
+    'classify': "Classify {0} = {1}",
+    'load_registry': "Load address registry {0} = {1} entries",
+    'calculate_hosts': "Hosts for /{0} = {1} usable hosts",
+    'wildcard_mask': "Wildcard mask for {0} = {1}",
+    'next_network': "Next network after {0} = {1}",
+    'previous_network': "Previous network before {0} = {1}",
+    'network_range': "Range of {0} networks from {1} = step {2}",
+    'analyze_ip_range': "Analyze range {0}-{1} = {2} addresses",
+    'ranges_to_cidrs': "Convert ranges to CIDRs = {0} ranges",
+    'bulk_convert': "Convert {0} IPv{1} addresses from {2} to {3}",
+    'find_overlaps': "Find overlaps in {0} networks = {1} overlapping pairs",
+    'diff_prefix_sets': "Diff {0} old and {1} new prefixes = {2} added, {3} removed, {4} changed",
+}
+
 
 class IPCalculator:
     """Comprehensive IP address calculator with subnet operations"""
     
-    def __init__(self):
-        self.history = []
+    HISTORY_SIZE = 50  # Keep last 50 calculations
+    
+    def __init__(self, cache: 'ParseCache' = None, record_history: bool = True):
+        self._history = deque(maxlen=self.HISTORY_SIZE)
+        self.record_history = record_history
+        self.cache = cache
+        self.registry = None  # AddressRegistry used by classify(); None means the built-in one
+    
+    # Parsing (optionally cached)
+    def parse_address(self, ip_str: str) -> Union[ipaddress.IPv4Address, ipaddress.IPv6Address]:
+        """Parse an IP address, through the parse cache when enabled"""
+        if self.cache is None:
+            return ipaddress.ip_address(ip_str)
+        return self.cache.ip_address(ip_str)
+    
+    def parse_network(self, network_str: str) -> Union[ipaddress.IPv4Network, ipaddress.IPv6Network]:
+        """Parse a network (strict=False), through the parse cache when enabled"""
+        if self.cache is None:
+            return ipaddress.ip_network(network_str, strict=False)
+        return self.cache.ip_network(network_str)
+    
+    def enable_cache(self, maxsize: int = 4096, policy: str = 'lru') -> 'ParseCache':
+        """Attach a new bounded parse cache and return it"""
+        from ip_cache import ParseCache
+        self.cache = ParseCache(maxsize=maxsize, policy=policy)
+        return self.cache
+    
+    def cache_info(self):
+        """Parse cache statistics, or None when caching is disabled"""
+        return None if self.cache is None else self.cache.cache_info()
+    
+    def clear_cache(self):
+        """Empty the parse cache"""
+        if self.cache is not None:
+            self.cache.clear()
+    
+    # History: (operation id, argument refs) records, formatted only when read
+    def _record(self, operation: str, *args):
+        if self.record_history:
+            self._history.append((operation, args))
     
     def add_to_history(self, operation: str, result: str):
         """Add calculation to history"""
-        self.history.append(f"{operation} = {result}")
-        if len(self.history) > 50:  # Keep last 50 calculations
-            self.history.pop(0)
+        self._record(None, operation, result)
     
     def get_history(self) -> List[str]:
         """Get calculation history"""
-        return self.history.copy()
+        return [HISTORY_FORMATS[operation].format(*args) for operation, args in self._history]
+    
+    @property
+    def history(self) -> List[str]:
+        """Formatted history (read-only; same as get_history())"""
+        return self.get_history()
     
     def clear_history(self):
         """Clear calculation history"""
-        self.history = []
+        self._history.clear()
+    
+    @contextmanager
+    def history_disabled(self):
+        """Context manager that suspends history recording"""
+        previous, self.record_history = self.record_history, False
+        try:
+            yield self
+        finally:
+            self.record_history = previous
     
     # Basic IP Operations
     def validate_ip(self, ip_str: str) -> bool:
         """Validate if string is a valid IP address"""
+        if parse_ipv4_int(ip_str) is not None:
+            return True
+        if isinstance(ip_str, str) and ':' not in ip_str:
+            return False  # Not a dotted quad and cannot be IPv6: skip the ipaddress retry
         try:
-            ipaddress.ip_address(ip_str)
+            self.parse_address(ip_str)
             return True
         except ValueError:
             return False
@@ -40,19 +483,19 @@ class IPCalculator:
     def ip_to_binary(self, ip_str: str) -> str:
         """Convert IP address to binary representation"""
         try:
-            ip = ipaddress.ip_address(ip_str)
+            ip = self.parse_address(ip_str)
             if isinstance(ip, ipaddress.IPv4Address):
                 # Convert to 32-bit binary
                 binary = format(int(ip), '032b')
                 # Format as dotted binary (8.8.8.8 format)
                 formatted = '.'.join([binary[i:i+8] for i in range(0, 32, 8)])
-                self.add_to_history(f"IP {ip_str} to binary", formatted)
+                self._record('ip_to_binary', ip_str, formatted)
                 return formatted
             else:  # IPv6
                 binary = format(int(ip), '0128b')
                 # Format as colon-separated 16-bit groups
                 formatted = ':'.join([binary[i:i+16] for i in range(0, 128, 16)])
-                self.add_to_history(f"IPv6 {ip_str} to binary", formatted)
+                self._record('ipv6_to_binary', ip_str, formatted)
                 return formatted
         except ValueError as e:
             raise ValueError(f"Invalid IP address: {e}")
@@ -60,9 +503,12 @@ class IPCalculator:
     def ip_to_decimal(self, ip_str: str) -> int:
         """Convert IP address to decimal representation"""
         try:
-            ip = ipaddress.ip_address(ip_str)
-            decimal = int(ip)
-            self.add_to_history(f"IP {ip_str} to decimal", str(decimal))
+            decimal = parse_ipv4_int(ip_str)
+            if decimal is None:
+                if isinstance(ip_str, str) and ':' not in ip_str:
+                    raise ValueError(f"{ip_str!r} does not appear to be an IPv4 or IPv6 address")
+                decimal = int(self.parse_address(ip_str))
+            self._record('ip_to_decimal', ip_str, decimal)
             return decimal
         except ValueError as e:
             raise ValueError(f"Invalid IP address: {e}")
@@ -80,7 +526,7 @@ class IPCalculator:
                 ip = ipaddress.IPv6Address(decimal)
             
             result = str(ip)
-            self.add_to_history(f"Decimal {decimal} to IPv{version}", result)
+            self._record('decimal_to_ip', decimal, version, result)
             return result
         except (ValueError, ipaddress.AddressValueError) as e:
             raise ValueError(f"Invalid decimal value: {e}")
@@ -103,127 +549,342 @@ class IPCalculator:
                 ip = ipaddress.IPv6Address(decimal)
             
             result = str(ip)
-            self.add_to_history(f"Binary {binary_str} to IPv{version}", result)
+            self._record('binary_to_ip', binary_str, version, result)
             return result
         except ValueError as e:
             raise ValueError(f"Invalid binary string: {e}")
     
+    def bulk_convert(self, values, source: str, target: str, version: int = 4):
+        """Convert a whole column of addresses between dotted/int/binary/hex/packed forms"""
+        from ip_convert import convert
+        result = convert(values, source, target, version)
+        count = len(result) // (MAX_BITS[version] // 8) if target == 'packed' else len(result)
+        self._record('bulk_convert', count, version, source, target)
+        return result
+    
+    def normalize_ipv6(self, addresses: Iterable[str], form: str = 'canonical',
+                       strict: bool = True) -> Iterator[Union[str, None]]:
+        """Stream IPv6 addresses in RFC 5952 ('canonical') or full ('expanded') form"""
+        from ipv6_bulk import canonicalize, expand
+        if form not in ('canonical', 'expanded'):
+            raise ValueError("IPv6 form must be 'canonical' or 'expanded'")
+        return (canonicalize if form == 'canonical' else expand)(addresses, strict=strict)
+    
     # Subnet Calculations
     def subnet_info(self, network_str: str) -> Dict[str, Union[str, int]]:
-        """Get comprehensive subnet information"""
+        """Get comprehensive subnet information
+
+        The is_private/is_multicast/is_reserved flags follow ``ipaddress``
+        and ignore ``self.registry``; use ``classify`` for registry tags.
+        """
         try:
-            network = ipaddress.ip_network(network_str, strict=False)
-            
-            # Calculate first and last usable addresses efficiently
-            if isinstance(network, ipaddress.IPv4Network):
-                if network.num_addresses > 2:
-                    first_usable = str(network.network_address + 1)
-                    last_usable = str(network.broadcast_address - 1)
-                else:
-                    first_usable = 'N/A'
-                    last_usable = 'N/A'
-            else:  # IPv6Network
-                if network.prefixlen >= 120:  # Small enough to enumerate safely
-                    try:
-                        hosts_list = list(network.hosts())
-                        first_usable = str(hosts_list[0]) if hosts_list else 'N/A'
-                        last_usable = str(hosts_list[-1]) if hosts_list else 'N/A'
-                    except:
-                        first_usable = 'N/A (too large)'
-                        last_usable = 'N/A (too large)'
-                else:
-                    first_usable = 'N/A (too large)'
-                    last_usable = 'N/A (too large)'
-            
-            info = {
-                'network_address': str(network.network_address),
-                'broadcast_address': str(network.broadcast_address) if isinstance(network, ipaddress.IPv4Network) else 'N/A (IPv6)',
-                'netmask': str(network.netmask),
-                'prefix_length': network.prefixlen,
-                'total_addresses': network.num_addresses,
-                'usable_addresses': max(0, network.num_addresses - 2) if isinstance(network, ipaddress.IPv4Network) else network.num_addresses,
-                'first_usable': first_usable,
-                'last_usable': last_usable,
-                'network_class': self._get_network_class(network.network_address) if isinstance(network, ipaddress.IPv4Network) else 'N/A',
-                'is_private': network.is_private,
-                'is_multicast': network.is_multicast,
-                'is_reserved': network.is_reserved,
-                'version': network.version
-            }
+            if self.cache is None:
+                info = dict(zip(SUBNET_INFO_FIELDS, subnet_fields(*parse_network_int(network_str))))
+            else:
+                info = dict(self.cache.get('subnet_info', network_str,
+                                           lambda: dict(zip(SUBNET_INFO_FIELDS, subnet_fields(*parse_network_int(network_str))))))
             
-            self.add_to_history(f"Subnet info for {network_str}", f"Network: {info['network_address']}/{info['prefix_length']}")
+            self._record('subnet_info', network_str, info['network_address'], info['prefix_length'])
             return info
         except ValueError as e:
             raise ValueError(f"Invalid network: {e}")
     
-    def subnet_split(self, network_str: str, new_prefix: int) -> List[str]:
-        """Split a subnet into smaller subnets"""
+    def subnet_info_many(self, networks: Iterable[str]) -> Dict[str, list]:
+        """Columnar subnet information: one list per subnet_info field"""
+        columns = tuple([] for _ in SUBNET_INFO_FIELDS)
+        appenders = [column.append for column in columns]
+        count = 0
+        try:
+            for network_str in networks:
+                for append, value in zip(appenders, subnet_fields(*parse_network_int(network_str))):
+                    append(value)
+                count += 1
+        except ValueError as e:
+            raise ValueError(f"Invalid network: {e}")
+        
+        self._record('subnet_info_many', count)
+        return dict(zip(SUBNET_INFO_FIELDS, columns))
+    
+    def subnet_split(self, network_str: str, new_prefix: int) -> SubnetSequence:
+        """Split a subnet into smaller subnets (returned as a lazy sequence)"""
         try:
-            network = ipaddress.ip_network(network_str, strict=False)
+            version, network, prefixlen = parse_network_int(network_str)
             
-            if new_prefix <= network.prefixlen:
+            if new_prefix <= prefixlen:
                 raise ValueError("New prefix must be larger than current prefix")
+            if new_prefix > MAX_BITS[version]:
+                raise ValueError(f"New prefix must be at most {MAX_BITS[version]} for IPv{version}")
             
-            subnets = list(network.subnets(new_prefix=new_prefix))
-            subnet_list = [str(subnet) for subnet in subnets]
+            subnets = SubnetSequence(version, network, prefixlen, new_prefix)
             
-            self.add_to_history(f"Split {network_str} into /{new_prefix}", f"{len(subnet_list)} subnets")
-            return subnet_list
+            self._record('subnet_split', network_str, new_prefix, subnets.total)
+            return subnets
         except ValueError as e:
             raise ValueError(f"Error splitting subnet: {e}")
     
     def subnet_summary(self, networks: List[str]) -> str:
         """Summarize multiple networks into a supernet"""
         try:
-            network_objects = [ipaddress.ip_network(net, strict=False) for net in networks]
+            network_objects = [self.parse_network(net) for net in networks]
             
             # Find the common supernet
             summary = list(ipaddress.collapse_addresses(network_objects))
             summary_list = [str(net) for net in summary]
             
             result = ', '.join(summary_list)
-            self.add_to_history(f"Summarize {len(networks)} networks", result)
+            self._record('subnet_summary', len(networks), result)
             return result
         except ValueError as e:
             raise ValueError(f"Error summarizing networks: {e}")
     
+    def subnet_summary_stream(self, source: Union[str, Iterable[str]], run_size: int = 500000) -> Iterator[str]:
+        """Summarize prefixes from an iterator or file with bounded memory"""
+        from ip_summary import summarize_prefixes
+        return summarize_prefixes(source, run_size=run_size)
+    
+    def subnet_summary_lossy(self, networks: List[str], max_entries: int = None,
+                             max_overshoot: int = None) -> Dict[str, Union[int, list, 'IPSet']]:
+        """Approximate summary within an entry limit and/or extra-address budget"""
+        from ip_aggregate import aggregate_lossy
+        result = aggregate_lossy(networks, max_entries=max_entries, max_overshoot=max_overshoot)
+        self._record('subnet_summary_lossy', len(networks), result['entries'], result['overshoot'])
+        return result
+    
+    def sample_addresses(self, network_str: str, k: int, unique: bool = True, seed=None,
+                         exclude: Iterable[str] = None) -> Iterator[str]:
+        """Stream k random addresses of a network without enumerating it"""
+        from ip_sample import sample_addresses
+        return sample_addresses(network_str, k, unique=unique, seed=seed, exclude=exclude)
+    
+    def sample_subnets(self, network_str: str, new_prefix: int, k: int, unique: bool = True, seed=None,
+                       exclude: Iterable[str] = None) -> Iterator[str]:
+        """Stream k random /new_prefix subnets of a network without splitting it"""
+        from ip_sample import sample_subnets
+        return sample_subnets(network_str, new_prefix, k, unique=unique, seed=seed, exclude=exclude)
+    
     def ip_in_subnet(self, ip_str: str, network_str: str) -> bool:
         """Check if IP address is in given subnet"""
         try:
-            ip = ipaddress.ip_address(ip_str)
-            network = ipaddress.ip_network(network_str, strict=False)
+            ip = self.parse_address(ip_str)
+            network = self.parse_network(network_str)
             
             result = ip in network
-            self.add_to_history(f"Is {ip_str} in {network_str}?", str(result))
+            self._record('ip_in_subnet', ip_str, network_str, result)
             return result
         except ValueError as e:
             raise ValueError(f"Invalid IP or network: {e}")
     
+    def find_overlaps(self, networks: Iterable[str]) -> Iterator[Tuple[str, str, str]]:
+        """Stream every overlapping pair of networks as (outer, inner, relation)
+
+        CIDR blocks either nest or are disjoint, so every overlap is a
+        containment: ``relation`` is 'equal' when both inputs name the same
+        block and 'contains' when ``outer`` strictly contains ``inner``.
+        Inputs are parsed and sorted up front; pairs are then produced by a
+        single sweep with a stack of enclosing blocks, so the cost is
+        O(n log n) plus the number of pairs reported.
+        """
+        entries = []
+        for index, network_str in enumerate(networks):
+            try:
+                version, network, prefixlen = parse_network_int(network_str)
+            except ValueError as e:
+                raise ValueError(f"Invalid network: {e}")
+            entries.append((version, network, prefixlen, index, network_str))
+        entries.sort()
+        return self._sweep_overlaps(entries)
+    
+    def _sweep_overlaps(self, entries: List[Tuple[int, int, int, int, str]]) -> Iterator[Tuple[str, str, str]]:
+        stack = []  # Enclosing blocks as (version, last address, prefix length, input string)
+        pairs = 0
+        for version, network, prefixlen, _, network_str in entries:
+            while stack and (stack[-1][0] != version or stack[-1][1] < network):
+                stack.pop()
+            for _, _, outer_prefixlen, outer_str in stack:
+                pairs += 1
+                yield outer_str, network_str, 'equal' if outer_prefixlen == prefixlen else 'contains'
+            stack.append((version, network | ((1 << (MAX_BITS[version] - prefixlen)) - 1), prefixlen, network_str))
+        self._record('find_overlaps', len(entries), pairs)
+    
+    def diff_prefix_sets(self, old: Iterable, new: Iterable) -> Dict[str, list]:
+        """Compare two prefix tables
+
+        Each table holds network strings or (network, attribute) pairs such
+        as a next hop or tag. Prefixes are normalized as in
+        ``subnet_summary`` (host bits masked, any notation), so equivalent
+        spellings compare equal; a repeated prefix keeps its last attribute.
+        Returns lists of canonical prefixes:
+
+        - 'added' / 'removed': (prefix, attribute) pairs
+        - 'changed': (prefix, old attribute, new attribute)
+        - 'aggregated': (new prefix, [old more-specifics covering it exactly])
+        - 'deaggregated': (old prefix, [new more-specifics covering it exactly])
+        - 'unchanged': number of prefixes present in both with equal attributes
+
+        Prefixes explained by an aggregation or deaggregation are not
+        repeated under 'added'/'removed'. Both tables are sorted on integer
+        keys and merge-walked once, then a single stack sweep finds exact
+        covers: O(n log n) overall.
+        """
+        parsed = {}  # Daily tables share most strings; parse each once
+        try:
+            old_attrs = self._prefix_table(old, parsed)
+            new_attrs = self._prefix_table(new, parsed)
+        except ValueError as e:
+            raise ValueError(f"Invalid prefix table: {e}")
+        del parsed
+        old_keys, new_keys = sorted(old_attrs), sorted(new_attrs)
+        
+        # Merge walk: every key once, tagged 1 (old only), 2 (new only) or 3 (both)
+        entries = []
+        append = entries.append
+        changed = []
+        unchanged = 0
+        old_count, new_count = len(old_keys), len(new_keys)
+        i = j = 0
+        while i < old_count and j < new_count:
+            old_key, new_key = old_keys[i], new_keys[j]
+            if old_key < new_key:
+                append((old_key, 1))
+                i += 1
+            elif new_key < old_key:
+                append((new_key, 2))
+                j += 1
+            else:
+                if old_attrs[old_key] != new_attrs[old_key]:
+                    changed.append(old_key)
+                else:
+                    unchanged += 1
+                append((old_key, 3))
+                i += 1
+                j += 1
+        entries.extend((key, 1) for key in old_keys[i:])
+        entries.extend((key, 2) for key in new_keys[j:])
+        
+        aggregated, deaggregated, explained = self._sweep_covers(entries)
+        prefix = self._prefix_str
+        result = {
+            'added': [(prefix(key), new_attrs[key]) for key, side in entries if side == 2 and key not in explained],
+            'removed': [(prefix(key), old_attrs[key]) for key, side in entries if side == 1 and key not in explained],
+            'changed': [(prefix(key), old_attrs[key], new_attrs[key]) for key in changed],
+            'aggregated': [(prefix(key), [prefix(part) for part in parts]) for key, parts in aggregated],
+            'deaggregated': [(prefix(key), [prefix(part) for part in parts]) for key, parts in deaggregated],
+            'unchanged': unchanged,
+        }
+        self._record('diff_prefix_sets', old_count, new_count,
+                     len(result['added']), len(result['removed']), len(changed))
+        return result
+    
+    # Prefix keys pack (version, network, prefixlen) into one int with the same ordering
+    @staticmethod
+    def _prefix_table(table: Iterable, parsed: Dict[str, int]) -> Dict[int, object]:
+        """Map prefix key -> attribute (the last one wins for repeated prefixes)"""
+        rows = {}
+        for item in table:
+            if isinstance(item, str):
+                network_str, attr = item, None
+            else:
+                network_str, attr = item
+            key = parsed.get(network_str)
+            if key is None:
+                version, network, prefixlen = parse_network_int(network_str)
+                key = parsed[network_str] = (version << 136) | (network << 8) | prefixlen
+            rows[key] = attr
+        return rows
+    
+    @staticmethod
+    def _prefix_str(key: int) -> str:
+        return f"{format_ip_int(key >> 136, (key >> 8) & ((1 << 128) - 1))}/{key & 0xFF}"
+    
+    @staticmethod
+    def _sweep_covers(entries):
+        """Find one-sided prefixes covered exactly by the other side's more-specifics"""
+        aggregated, deaggregated, explained = [], [], set()
+        
+        def finish(frame):
+            key, side, last, covered, _, parts = frame
+            if covered == last - ((key >> 8) & ((1 << 128) - 1)) + 1:
+                (deaggregated if side == 1 else aggregated).append((key, parts))
+                explained.add(key)
+                explained.update(parts)
+        
+        # Open candidates: [key, side, last address, covered addresses, end of last counted part, parts]
+        stack = []
+        for key, side in entries:
+            if side == 3 and not stack:
+                continue
+            version, network, prefixlen = key >> 136, (key >> 8) & ((1 << 128) - 1), key & 0xFF
+            while stack and (stack[-1][0] >> 136 != version or stack[-1][2] < network):
+                finish(stack.pop())
+            last = network | ((1 << (MAX_BITS[version] - prefixlen)) - 1)
+            for frame in stack:
+                # Old-only candidates look for new prefixes (side bit 2) and vice versa
+                if side & (3 - frame[1]) and network > frame[4]:
+                    frame[3] += last - network + 1
+                    frame[4] = last
+                    frame[5].append(key)
+            if side != 3:
+                stack.append([key, side, last, 0, network - 1, []])
+        while stack:
+            finish(stack.pop())
+        aggregated.sort()
+        deaggregated.sort()
+        return aggregated, deaggregated, explained
+    
+    def build_route_table(self, routes) -> 'RouteTable':
+        """Build a longest-prefix-match table from networks or (network, payload) pairs"""
+        from route_table import RouteTable
+        table = RouteTable(routes)
+        self._record('build_route_table', len(table))
+        return table
+    
+    def compress_routes(self, routes, verify: bool = True) -> Dict[str, Union[int, float, bool, list]]:
+        """Smallest route table forwarding like (prefix, next hop) routes (ORTC)"""
+        from route_compress import compress_routes
+        result = compress_routes(routes, verify=verify)
+        self._record('compress_routes', result['original_entries'], result['entries'])
+        return result
+    
+    def classify(self, ip_or_network: str) -> Tuple[str, ...]:
+        """Special-purpose registry tags (e.g. 'private-use', 'bogon') of an address or network"""
+        try:
+            if self.registry is None:
+                from ip_registry import default_registry
+                self.registry = default_registry().copy()  # Own copy, so add() stays per instance
+            tags = self.registry.classify(ip_or_network)
+        except ValueError as e:
+            raise ValueError(f"Invalid IP or network: {e}")
+        self._record('classify', ip_or_network, ', '.join(tags) or 'no special purpose')
+        return tags
+    
+    def load_registry(self, path: str, defaults: bool = True) -> 'AddressRegistry':
+        """Classify against a registry file (added to the built-in entries unless ``defaults`` is False)"""
+        from ip_registry import AddressRegistry
+        self.registry = AddressRegistry.from_file(path, defaults=defaults)
+        self._record('load_registry', path, len(self.registry))
+        return self.registry
+    
     def calculate_hosts(self, prefix_length: int, version: int = 4) -> Dict[str, int]:
-        """Calculate number of hosts for given prefix length"""
+        """Calculate number of hosts for given prefix length
+
+        'subnets_in_parent' is the number of networks of this size in the
+        whole IPv4 or IPv6 address space (2 ** prefix_length).
+        """
         try:
-            if version == 4:
-                if not (0 <= prefix_length <= 32):
-                    raise ValueError("IPv4 prefix length must be 0-32")
-                host_bits = 32 - prefix_length
-                total_addresses = 2 ** host_bits
-                usable_hosts = max(0, total_addresses - 2)  # Subtract network and broadcast
-            else:  # IPv6
-                if not (0 <= prefix_length <= 128):
-                    raise ValueError("IPv6 prefix length must be 0-128")
-                host_bits = 128 - prefix_length
-                total_addresses = 2 ** host_bits
-                usable_hosts = total_addresses  # No network/broadcast concept in IPv6
-            
+            version = 4 if version == 4 else 6
+            max_bits = MAX_BITS[version]
+            if not (0 <= prefix_length <= max_bits):
+                raise ValueError(f"IPv{version} prefix length must be 0-{max_bits}")
+            entry = PREFIX_TABLES[version][prefix_length]
             result = {
                 'prefix_length': prefix_length,
-                'host_bits': host_bits,
-                'total_addresses': total_addresses,
-                'usable_hosts': usable_hosts,
-                'subnets_in_parent': 2 ** (prefix_length - (prefix_length - 1)) if prefix_length > 0 else 1
+                'host_bits': entry['host_bits'],
+                'total_addresses': entry['total_addresses'],
+                'usable_hosts': entry['usable_hosts'],
+                'subnets_in_parent': entry['subnets_in_parent'],
             }
             
-            self.add_to_history(f"Hosts for /{prefix_length}", f"{usable_hosts} usable hosts")
+            self._record('calculate_hosts', prefix_length, entry['usable_hosts'])
             return result
         except ValueError as e:
             raise ValueError(f"Invalid prefix length: {e}")
@@ -232,128 +893,168 @@ class IPCalculator:
     def wildcard_mask(self, netmask_str: str) -> str:
         """Calculate wildcard mask from subnet mask"""
         try:
-            netmask = ipaddress.IPv4Address(netmask_str)
-            wildcard_int = (~int(netmask)) & 0xFFFFFFFF
-            wildcard = ipaddress.IPv4Address(wildcard_int)
+            prefixlen = NETMASK_PREFIXES[4].get(netmask_str)
+            if prefixlen is None:
+                version, prefixlen = netmask_to_prefix(netmask_str)
+                if version != 4:
+                    raise ValueError(f"{netmask_str!r} is not an IPv4 netmask")
             
-            result = str(wildcard)
-            self.add_to_history(f"Wildcard mask for {netmask_str}", result)
+            result = PREFIX_TABLES[4][prefixlen]['wildcard']
+            self._record('wildcard_mask', netmask_str, result)
             return result
         except ValueError as e:
             raise ValueError(f"Invalid subnet mask: {e}")
     
-    def next_network(self, network_str: str) -> str:
-        """Get the next network of the same size"""
+    def next_network(self, network_str: str, step: int = 1) -> str:
+        """Get the network ``step`` blocks after this one (same size)"""
         try:
-            network = ipaddress.ip_network(network_str, strict=False)
-            next_net = network.supernet().subnets(new_prefix=network.prefixlen)
-            
-            # Find current network and get the next one
-            networks = list(next_net)
-            current_index = networks.index(network)
-            
-            if current_index + 1 < len(networks):
-                result = str(networks[current_index + 1])
-            else:
+            version, network, prefixlen = parse_network_int(network_str)
+            result = self._offset_network(version, network, prefixlen, step)
+            if result is None:
                 raise ValueError("No next network available")
             
-            self.add_to_history(f"Next network after {network_str}", result)
+            self._record('next_network', network_str, result)
             return result
-        except (ValueError, IndexError) as e:
+        except ValueError as e:
             raise ValueError(f"Cannot find next network: {e}")
     
-    def previous_network(self, network_str: str) -> str:
-        """Get the previous network of the same size"""
+    def previous_network(self, network_str: str, step: int = 1) -> str:
+        """Get the network ``step`` blocks before this one (same size)"""
         try:
-            network = ipaddress.ip_network(network_str, strict=False)
-            prev_net = network.supernet().subnets(new_prefix=network.prefixlen)
-            
-            # Find current network and get the previous one
-            networks = list(prev_net)
-            current_index = networks.index(network)
-            
-            if current_index > 0:
-                result = str(networks[current_index - 1])
-            else:
+            version, network, prefixlen = parse_network_int(network_str)
+            result = self._offset_network(version, network, prefixlen, -step)
+            if result is None:
                 raise ValueError("No previous network available")
             
-            self.add_to_history(f"Previous network before {network_str}", result)
+            self._record('previous_network', network_str, result)
             return result
-        except (ValueError, IndexError) as e:
+        except ValueError as e:
             raise ValueError(f"Cannot find previous network: {e}")
     
+    def network_range(self, start_network: str, count: int, step: int = 1) -> Iterator[str]:
+        """Yield ``count`` same-size networks starting at ``start_network``"""
+        try:
+            version, network, prefixlen = parse_network_int(start_network)
+            if count < 0:
+                raise ValueError("Count must not be negative")
+            if count and self._offset_network(version, network, prefixlen, (count - 1) * step) is None:
+                raise ValueError("Range runs past the end of the address space")
+            
+            self._record('network_range', count, start_network, step)
+            return self._iter_networks(version, network, prefixlen, count, step)
+        except ValueError as e:
+            raise ValueError(f"Cannot build network range: {e}")
+    
+    @staticmethod
+    def _offset_network(version: int, network: int, prefixlen: int, blocks: int) -> Union[str, None]:
+        """Network ``blocks`` positions away, or None outside the address space"""
+        size = 1 << (MAX_BITS[version] - prefixlen)
+        target = network + blocks * size
+        if target < 0 or target + size > 1 << MAX_BITS[version]:
+            return None
+        return f"{format_ip_int(version, target)}/{prefixlen}"
+    
+    @staticmethod
+    def _iter_networks(version: int, network: int, prefixlen: int, count: int, step: int) -> Iterator[str]:
+        stride = step << (MAX_BITS[version] - prefixlen)
+        suffix = f"/{prefixlen}"
+        for _ in range(count):
+            yield format_ip_int(version, network) + suffix
+            network += stride
+    
     # Network Analysis
     def analyze_ip_range(self, start_ip: str, end_ip: str) -> Dict[str, Union[str, int, List[str]]]:
-        """Analyze an IP range and suggest optimal subnets"""
+        """Analyze an IP range and compute its exact minimal CIDR cover"""
         try:
-            start = ipaddress.ip_address(start_ip)
-            end = ipaddress.ip_address(end_ip)
+            version, start = parse_ip_int(start_ip)
+            end_version, end = parse_ip_int(end_ip)
             
-            if start.version != end.version:
+            if version != end_version:
                 raise ValueError("Start and end IP must be same version")
                 
-            if int(start) >= int(end):
+            if start >= end:
                 raise ValueError("Start IP must be less than end IP")
             
             # Calculate the range
-            total_ips = int(end) - int(start) + 1
+            total_ips = end - start + 1
+            max_bits = MAX_BITS[version]
+            required_bits = (total_ips - 1).bit_length()
             
-            # Find the smallest subnet that can contain this range
-            import math
-            required_bits = math.ceil(math.log2(total_ips))
-            max_bits = 32 if isinstance(start, ipaddress.IPv4Address) else 128
-            prefix_length = max_bits - required_bits
+            cidr_blocks = [f"{format_ip_int(version, network)}/{prefixlen}"
+                           for network, prefixlen in range_blocks(version, start, end)]
             
-            # Try to create a network that encompasses the range
-            try:
-                # Start with the start IP and try different prefix lengths
-                for prefix in range(prefix_length, max_bits + 1):
-                    try:
-                        network = ipaddress.ip_network(f"{start}/{prefix}", strict=False)
-                        if end in network:
-                            suggested_network = str(network)
-                            break
-                    except ValueError:
-                        continue
-                else:
-                    suggested_network = "Multiple subnets required"
-            except:
-                suggested_network = "Complex range - manual subnetting required"
+            # Single exact block, otherwise the smallest network enclosing the range
+            if len(cidr_blocks) == 1:
+                suggested_network = cidr_blocks[0]
+            else:
+                enclosing_prefix = max_bits - (start ^ end).bit_length()
+                host_bits = max_bits - enclosing_prefix
+                suggested_network = f"{format_ip_int(version, (start >> host_bits) << host_bits)}/{enclosing_prefix}"
             
             result = {
                 'start_ip': start_ip,
                 'end_ip': end_ip,
                 'total_addresses': total_ips,
                 'suggested_network': suggested_network,
+                'cidr_blocks': cidr_blocks,
+                'block_count': len(cidr_blocks),
                 'required_host_bits': required_bits,
                 'minimum_prefix': max(0, max_bits - required_bits)
             }
             
-            self.add_to_history(f"Analyze range {start_ip}-{end_ip}", f"{total_ips} addresses")
+            self._record('analyze_ip_range', start_ip, end_ip, total_ips)
             return result
         except ValueError as e:
             raise ValueError(f"Invalid IP range: {e}")
     
+    def iter_range_cidrs(self, start_ip: str, end_ip: str) -> Iterator[str]:
+        """Stream the minimal CIDR cover of an inclusive IP range"""
+        try:
+            version, start = parse_ip_int(start_ip)
+            end_version, end = parse_ip_int(end_ip)
+            if version != end_version:
+                raise ValueError("Start and end IP must be same version")
+            if start > end:
+                raise ValueError("Start IP must not be greater than end IP")
+        except ValueError as e:
+            raise ValueError(f"Invalid IP range: {e}")
+        return (f"{format_ip_int(version, network)}/{prefixlen}"
+                for network, prefixlen in range_blocks(version, start, end))
+    
+    def ranges_to_cidrs(self, source: Union[str, IO[str]]) -> Iterator[str]:
+        """Convert a file of ranges to CIDR blocks
+
+        Each line holds a start and end address separated by '-', ',' or
+        whitespace; blank lines and '#' comments are skipped. ``source`` is
+        a path or an open text file.
+        """
+        handle = open(source, 'r', encoding='utf-8') if isinstance(source, str) else source
+        ranges = 0
+        try:
+            for line_number, line in enumerate(handle, 1):
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                parts = line.replace(',', ' ').replace('-', ' ').split()
+                if len(parts) != 2:
+                    raise ValueError(f"Invalid range on line {line_number}: {line!r}")
+                try:
+                    yield from self.iter_range_cidrs(parts[0], parts[1])
+                except ValueError as e:
+                    raise ValueError(f"Line {line_number}: {e}")
+                ranges += 1
+        finally:
+            if handle is not source:
+                handle.close()
+        self._record('ranges_to_cidrs', ranges)
+    
     # Utility Methods
-    def _get_network_class(self, ip: ipaddress.IPv4Address) -> str:
-        """Determine network class for IPv4 address"""
-        first_octet = int(str(ip).split('.')[0])
-        
-        if 1 <= first_octet <= 126:
-            return "A"
-        elif 128 <= first_octet <= 191:
-            return "B"
-        elif 192 <= first_octet <= 223:
-            return "C"
-        elif 224 <= first_octet <= 239:
-            return "D (Multicast)"
-        elif 240 <= first_octet <= 255:
-            return "E (Experimental)"
-        else:
-            return "Invalid"
+    def _get_network_class(self, ip: Union[ipaddress.IPv4Address, int]) -> str:
+        """Determine network class for IPv4 address (object or integer)"""
+        return NETWORK_CLASS_BY_OCTET[int(ip) >> 24]
     
     def get_common_networks(self) -> Dict[str, str]:
-        """Get common network addresses and their descriptions"""
+        """Get common network addresses and their descriptions (a fixed list, not ``self.registry``)"""
         return {
             '10.0.0.0/8': 'Private Class A (RFC 1918)',
             '172.16.0.0/12': 'Private Class B (RFC 1918)',
@@ -3,17 +3,22 @@ IP Calculator GUI - Advanced network calculator interface
 """
 
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
+from tkinter import ttk, scrolledtext, messagebox, filedialog
 from ip_calculator import IPCalculator
+from ip_cache import ParseCache
 import threading
-import ipaddress
 
 class IPCalculatorGUI:
     """GUI interface for IP Calculator"""
     
+    SPLIT_PAGE_SIZE = 256  # Subnets rendered per split result
+    OVERLAP_PAGE_SIZE = 500  # Overlapping pairs rendered per check
+    
     def __init__(self):
         self.root = tk.Tk()
-        self.ip_calc = IPCalculator()
+        # One parse cache shared by the engine and the GUI handlers
+        self.parse_cache = ParseCache(maxsize=4096)
+        self.ip_calc = IPCalculator(cache=self.parse_cache)
         self.setup_gui()
         
     def setup_gui(self):
@@ -39,6 +44,7 @@ class IPCalculatorGUI:
         self.create_subnet_tab()
         self.create_conversion_tab()
         self.create_analysis_tab()
+        self.create_overlaps_tab()
         self.create_history_tab()
         
     def create_basic_tab(self):
@@ -262,6 +268,49 @@ class IPCalculatorGUI:
                                                      insertbackground="white", wrap='word')
         self.common_result.pack(fill='both', expand=True, padx=10, pady=5)
         
+    def create_overlaps_tab(self):
+        """Create overlap detection tab"""
+        frame = tk.Frame(self.notebook, bg="#1a1a1a")
+        self.notebook.add(frame, text="Overlaps")
+        
+        # Title
+        title = tk.Label(frame, text="Overlap & Conflict Detection", font=("Segoe UI", 16, "bold"), 
+                        fg="white", bg="#1a1a1a")
+        title.pack(pady=10)
+        
+        input_frame = tk.Frame(frame, bg="#2d2d2d", relief="raised", bd=1)
+        input_frame.pack(fill='x', padx=20, pady=5)
+        
+        tk.Label(input_frame, text="Networks (one per line, or load a file)", font=("Segoe UI", 12, "bold"), 
+                fg="#FF9800", bg="#2d2d2d").pack(pady=5)
+        
+        self.overlap_input = scrolledtext.ScrolledText(input_frame, height=8, bg="#404040", fg="white",
+                                                     insertbackground="white", wrap='none')
+        self.overlap_input.pack(fill='both', expand=True, padx=10, pady=5)
+        
+        button_frame = tk.Frame(input_frame, bg="#2d2d2d")
+        button_frame.pack(pady=5)
+        
+        load_btn = tk.Button(button_frame, text="Load File...", bg="#607D8B", fg="white",
+                           command=self.load_overlap_file)
+        load_btn.pack(side='left', padx=5)
+        
+        self.overlap_btn = tk.Button(button_frame, text="Find Overlaps", bg="#FF9800", fg="white",
+                                   command=self.find_overlaps)
+        self.overlap_btn.pack(side='left', padx=5)
+        
+        clear_btn = tk.Button(button_frame, text="Clear", bg="#f44336", fg="white",
+                            command=self.clear_overlaps)
+        clear_btn.pack(side='left', padx=5)
+        
+        self.overlap_source_label = tk.Label(button_frame, text="", fg="#9E9E9E", bg="#2d2d2d")
+        self.overlap_source_label.pack(side='left', padx=5)
+        self.overlap_file = None
+        
+        self.overlap_result = scrolledtext.ScrolledText(frame, height=12, bg="#404040", fg="white",
+                                                      insertbackground="white", wrap='none')
+        self.overlap_result.pack(fill='both', expand=True, padx=20, pady=10)
+        
     def create_history_tab(self):
         """Create history tab"""
         frame = tk.Frame(self.notebook, bg="#1a1a1a")
@@ -302,7 +351,7 @@ class IPCalculatorGUI:
             if is_valid:
                 # Get additional info
                 try:
-                    ip_obj = ipaddress.ip_address(ip)
+                    ip_obj = self.ip_calc.parse_address(ip)
                     version = ip_obj.version
                     is_private = ip_obj.is_private
                     is_multicast = ip_obj.is_multicast
@@ -375,10 +424,13 @@ class IPCalculatorGUI:
             display_text = f"Splitting {network} into /{prefix} subnets:\n"
             display_text += "=" * 50 + "\n\n"
             
-            for i, subnet in enumerate(subnets, 1):
+            # Only render the first page; the sequence itself is lazy
+            for i, subnet in enumerate(subnets.page(0, self.SPLIT_PAGE_SIZE), 1):
                 display_text += f"{i:3d}. {subnet}\n"
             
-            display_text += f"\nTotal subnets: {len(subnets)}"
+            if subnets.total > self.SPLIT_PAGE_SIZE:
+                display_text += f"... ({subnets.total - self.SPLIT_PAGE_SIZE:,} more not shown)\n"
+            display_text += f"\nTotal subnets: {subnets.total:,}"
             
             self.split_result.delete(1.0, tk.END)
             self.split_result.insert(1.0, display_text)
@@ -496,6 +548,9 @@ class IPCalculatorGUI:
             display_text += f"Required Host Bits: {result['required_host_bits']}\n"
             display_text += f"Minimum Prefix: /{result['minimum_prefix']}\n"
             display_text += f"Suggested Network: {result['suggested_network']}\n"
+            display_text += f"\nMinimal CIDR Cover ({result['block_count']} blocks):\n"
+            for block in result['cidr_blocks']:
+                display_text += f"  {block}\n"
             
             self.range_result.delete(1.0, tk.END)
             self.range_result.insert(1.0, display_text)
@@ -503,6 +558,77 @@ class IPCalculatorGUI:
         except Exception as e:
             messagebox.showerror("Error", f"Range analysis failed: {str(e)}")
     
+    def load_overlap_file(self):
+        """Choose a network list file for overlap detection"""
+        path = filedialog.askopenfilename(title="Load network list",
+                                          filetypes=[("Text files", "*.txt *.csv *.lst"), ("All files", "*.*")])
+        if path:
+            # Large files are read by the worker thread instead of the text widget
+            self.overlap_file = path
+            self.overlap_input.delete(1.0, tk.END)
+            self.overlap_source_label.config(text=f"Using file: {path}")
+    
+    def clear_overlaps(self):
+        """Reset overlap input and results"""
+        self.overlap_file = None
+        self.overlap_source_label.config(text="")
+        self.overlap_input.delete(1.0, tk.END)
+        self.overlap_result.delete(1.0, tk.END)
+    
+    def find_overlaps(self):
+        """Find overlapping networks in the pasted or loaded list"""
+        pasted = self.overlap_input.get(1.0, tk.END)
+        if not pasted.strip() and not self.overlap_file:
+            messagebox.showerror("Error", "Please paste networks or load a file")
+            return
+        source = pasted.splitlines() if pasted.strip() else self.overlap_file
+        
+        self.overlap_btn.config(state=tk.DISABLED)
+        self.overlap_result.delete(1.0, tk.END)
+        self.overlap_result.insert(1.0, "Checking for overlaps...")
+        threading.Thread(target=self._overlap_worker, args=(source,), daemon=True).start()
+    
+    def _overlap_worker(self, source):
+        """Run the sweep off the Tk thread and hand the report back"""
+        try:
+            if isinstance(source, str):
+                with open(source, 'r', encoding='utf-8') as handle:
+                    lines = handle.read().splitlines()
+            else:
+                lines = source
+            networks = [line.split('#', 1)[0].strip() for line in lines]
+            networks = [network for network in networks if network]
+            
+            shown = []
+            counts = {'equal': 0, 'contains': 0}
+            for outer, inner, relation in self.ip_calc.find_overlaps(networks):
+                counts[relation] += 1
+                if len(shown) < self.OVERLAP_PAGE_SIZE:
+                    shown.append(f"{outer:<43} {'==' if relation == 'equal' else '⊇'} {inner}")
+            
+            total = counts['equal'] + counts['contains']
+            display_text = f"Overlap Check ({len(networks):,} networks)\n"
+            display_text += "=" * 50 + "\n\n"
+            display_text += f"Duplicate pairs: {counts['equal']:,}\n"
+            display_text += f"Containment pairs: {counts['contains']:,}\n\n"
+            if not total:
+                display_text += "No overlapping networks found.\n"
+            else:
+                display_text += "\n".join(shown) + "\n"
+                if total > len(shown):
+                    display_text += f"... ({total - len(shown):,} more not shown)\n"
+            self.root.after(0, self._show_overlaps, display_text, None)
+        except Exception as e:
+            self.root.after(0, self._show_overlaps, None, str(e))
+    
+    def _show_overlaps(self, display_text, error):
+        self.overlap_btn.config(state=tk.NORMAL)
+        self.overlap_result.delete(1.0, tk.END)
+        if error is not None:
+            messagebox.showerror("Error", f"Overlap check failed: {error}")
+        else:
+            self.overlap_result.insert(1.0, display_text)
+    
     def show_common_networks(self):
         """Show common network addresses"""
         try:
@@ -547,6 +673,10 @@ class IPCalculatorGUI:
                 for i, entry in enumerate(reversed(history[-20:]), 1):  # Show last 20 entries
                     display_text += f"{i:2d}. {entry}\n"
             
+            info = self.parse_cache.cache_info()
+            display_text += (f"\nParse cache: {info.currsize}/{info.maxsize} entries, "
+                             f"{info.hits} hits, {info.misses} misses ({info.hit_rate:.0%} hit rate)\n")
+            
             self.history_display.delete(1.0, tk.END)
             self.history_display.insert(1.0, display_text)
             
@@ -0,0 +1,255 @@
+"""
+IP Convert Module
+Bulk conversion of address columns between dotted, integer, binary, hex
+and packed forms using byte lookup tables
+"""
+
+import ipaddress
+import os
+import socket
+import sys
+from array import array
+from itertools import cycle
+from typing import List, Union
+
+from ip_calculator import MAX_BITS
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+FORMATS = ('dotted', 'int', 'binary', 'hex', 'packed')
+
+_U32 = 'I' if array('I').itemsize == 4 else 'L'
+_WIDTH = {4: 4, 6: 16}
+_FAMILIES = {4: socket.AF_INET, 6: socket.AF_INET6}
+
+# Text for each byte value, and the same followed by the separator that comes after
+# that byte's position in an address ('.'/':' inside an address, '\n' after the last)
+_DECIMAL = [str(byte) for byte in range(256)]
+_BINARY = [format(byte, '08b') for byte in range(256)]
+_HEX = [format(byte, '02x') for byte in range(256)]
+_BINARY_VALUES = {text: byte for byte, text in enumerate(_BINARY)}
+
+
+def _position_tables(table: List[str], version: int, separator: str, group: int) -> tuple:
+    """One table per byte position, so a whole buffer formats in a single join"""
+    width = _WIDTH[version]
+    tables = []
+    for position in range(width):
+        if position == width - 1:
+            tables.append([text + '\n' for text in table])
+        elif (position + 1) % group == 0:
+            tables.append([text + separator for text in table])
+        else:
+            tables.append(table)
+    return tuple(tables)
+
+
+_TEXT_TABLES = {
+    ('dotted', 4): _position_tables(_DECIMAL, 4, '.', 1),
+    ('binary', 4): _position_tables(_BINARY, 4, '.', 1),
+    ('binary', 6): _position_tables(_BINARY, 6, ':', 2),
+    ('hex', 4): _position_tables(_HEX, 4, '', 1),
+    ('hex', 6): _position_tables(_HEX, 6, '', 1),
+}
+
+
+def _check_format(name: str, version: int):
+    if name not in FORMATS:
+        raise ValueError(f"Unknown format {name!r}; expected one of {', '.join(FORMATS)}")
+    if version not in _WIDTH:
+        raise ValueError(f"IP version must be 4 or 6, not {version!r}")
+
+
+def to_packed(values, source: str, version: int = 4) -> bytes:
+    """Pack a column of addresses in ``source`` form into network-order bytes"""
+    _check_format(source, version)
+    width = _WIDTH[version]
+    if source == 'packed':
+        if isinstance(values, (bytes, bytearray, memoryview)):
+            packed = bytes(values)
+        else:
+            packed = b''.join(values)
+        if len(packed) % width:
+            raise ValueError(f"Packed buffer length must be a multiple of {width}")
+        return packed
+
+    if source == 'int':
+        if np is not None and isinstance(values, np.ndarray):
+            if values.size and (values.min() < 0 or int(values.max()) >> MAX_BITS[version]):
+                raise ValueError(f"Integer value out of range for IPv{version}")
+            if version == 4:
+                return values.astype('>u4').tobytes()
+            values = values.tolist()
+        if version == 4:
+            try:
+                column = array(_U32, values)  # Always a copy, so the caller's column is never byteswapped
+            except (OverflowError, TypeError):
+                raise ValueError("Integer values must be 0-4294967295 for IPv4")
+            if sys.byteorder == 'little':
+                column.byteswap()
+            return column.tobytes()
+        try:
+            return b''.join([int(value).to_bytes(16, 'big') for value in values])
+        except OverflowError:
+            raise ValueError("Integer value out of range for IPv6")
+
+    values = values if isinstance(values, list) else list(values)
+    if source == 'dotted':
+        family = _FAMILIES[version]
+        pton = socket.inet_pton
+        try:
+            return b''.join([pton(family, text) for text in values])
+        except (OSError, TypeError):
+            bad = next(text for text in values if not _valid_text(family, text))
+            raise ValueError(f"{bad!r} does not appear to be an IPv{version} address")
+
+    if source == 'hex':
+        length = 2 * width
+        if any(len(text) != length for text in values):
+            raise ValueError(f"Hex IPv{version} addresses must be {length} digits")
+        try:
+            packed = bytes.fromhex(''.join(values))
+        except ValueError:
+            packed = b''
+        if len(packed) != width * len(values):
+            raise ValueError(f"Invalid hex IPv{version} address in input")
+        return packed
+
+    # Binary: 8-bit groups joined by '.' (IPv4) or 16-bit groups joined by ':' (IPv6)
+    length, separator = (35, '.') if version == 4 else (135, ':')
+    if any(len(text) != length for text in values):
+        raise ValueError(f"Binary IPv{version} addresses must be {length} characters")
+    octets = separator.join(values).split(separator)
+    if version == 6:
+        octets = [half for group in octets for half in (group[:8], group[8:])]
+    try:
+        packed = bytes(map(_BINARY_VALUES.__getitem__, octets))
+    except KeyError:
+        raise ValueError(f"Invalid binary IPv{version} address in input")
+    if len(packed) != width * len(values):
+        raise ValueError(f"Invalid binary IPv{version} address in input")
+    return packed
+
+
+def _valid_text(family: int, text) -> bool:
+    try:
+        socket.inet_pton(family, text)
+        return True
+    except (OSError, TypeError):
+        return False
+
+
+def packed_to_text(packed: bytes, target: str, version: int = 4) -> str:
+    """Format packed addresses as newline-terminated lines of ``target`` text"""
+    _check_format(target, version)
+    if target == 'packed':
+        raise ValueError("Packed output is binary, not text")
+    if target == 'int':
+        return ''.join(f"{value}\n" for value in _packed_ints(packed, version))
+    tables = _TEXT_TABLES.get((target, version))
+    if tables is not None:
+        # One table lookup per byte, all inside a single C-level join
+        return ''.join(map(list.__getitem__, cycle(tables), packed))
+    # IPv6 dotted: inet_ntop, with ipaddress spelling for the mixed forms it prints in dotted quad
+    ntop, family = socket.inet_ntop, socket.AF_INET6
+    lines = []
+    for offset in range(0, len(packed), 16):
+        chunk = bytes(packed[offset:offset + 16])
+        text = ntop(family, chunk)
+        if '.' in text:
+            text = str(ipaddress.IPv6Address(chunk))
+        lines.append(text + '\n')
+    return ''.join(lines)
+
+
+def _packed_ints(packed: bytes, version: int):
+    if version == 4:
+        column = array(_U32)
+        column.frombytes(packed)
+        if sys.byteorder == 'little':
+            column.byteswap()
+        return column
+    from_bytes = int.from_bytes
+    return [from_bytes(packed[offset:offset + 16], 'big') for offset in range(0, len(packed), 16)]
+
+
+def from_packed(packed: Union[bytes, bytearray, memoryview], target: str,
+                version: int = 4) -> Union[List[str], List[int], array, bytes]:
+    """Unpack network-order bytes into a column of ``target`` values
+
+    'int' gives a uint32 ``array`` for IPv4 (Python ints for IPv6),
+    'packed' gives bytes and the text forms give lists of strings.
+    """
+    _check_format(target, version)
+    packed = bytes(packed)
+    if len(packed) % _WIDTH[version]:
+        raise ValueError(f"Packed buffer length must be a multiple of {_WIDTH[version]}")
+    if target == 'packed':
+        return packed
+    if target == 'int':
+        return _packed_ints(packed, version)
+    text = packed_to_text(packed, target, version)
+    return text.split('\n')[:-1]
+
+
+def convert(values, source: str, target: str, version: int = 4):
+    """Convert a whole column of addresses from ``source`` to ``target`` form
+
+    Forms: 'dotted' (address strings), 'int', 'binary' (as
+    ``IPCalculator.ip_to_binary``), 'hex' (zero-padded lowercase digits)
+    and 'packed' (network-order bytes, 4 or 16 per address). ``values`` may
+    be a list, any iterable, an ``array`` or a NumPy array (ints), or a
+    bytes-like buffer (packed).
+    """
+    return from_packed(to_packed(values, source, version), target, version)
+
+
+def convert_file(input_path: str, output_path: str, source: str, target: str,
+                 version: int = 4, chunk_size: int = 1 << 16) -> int:
+    """Convert a file of addresses, ``chunk_size`` at a time; returns the count
+
+    Text forms are one address per line (UTF-8); 'packed' files are raw
+    bytes, read into one reused buffer.
+    """
+    _check_format(source, version)
+    _check_format(target, version)
+    width = _WIDTH[version]
+    if source == 'packed' and os.path.getsize(input_path) % width:
+        raise ValueError(f"Packed file length must be a multiple of {width}")
+    count = 0
+    read_options = {'mode': 'rb'} if source == 'packed' else {'mode': 'r', 'encoding': 'utf-8'}
+    write_options = {'mode': 'wb'} if target == 'packed' else {'mode': 'w', 'encoding': 'utf-8'}
+    buffer = bytearray(chunk_size * width) if source == 'packed' else None
+    with open(input_path, **read_options) as source_file, open(output_path, **write_options) as output:
+        while True:
+            if source == 'packed':
+                size = source_file.readinto(buffer)
+                if not size:
+                    break
+                packed = memoryview(buffer)[:size]
+            else:
+                lines = [line.strip() for line in _read_lines(source_file, chunk_size)]
+                if not lines:
+                    break
+                lines = [line for line in lines if line]
+                if source == 'int':
+                    try:
+                        lines = [int(line) for line in lines]
+                    except ValueError:
+                        raise ValueError(f"Invalid integer address in {input_path}")
+                packed = to_packed(lines, source, version)
+            output.write(packed if target == 'packed' else packed_to_text(packed, target, version))
+            count += len(packed) // width
+    return count
+
+
+def _read_lines(handle, count: int) -> List[str]:
+    lines = []
+    for line in handle:
+        lines.append(line)
+        if len(lines) >= count:
+            break
+    return lines
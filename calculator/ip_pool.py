@@ -0,0 +1,294 @@
+"""
+IP Pool Module
+Buddy-system address allocator with a persistent snapshot and journal
+"""
+
+import heapq
+import os
+import struct
+from typing import Dict, List, Tuple, Union
+
+from ip_calculator import MAX_BITS, parse_network_int, format_ip_int
+
+_MAGIC = b'IPPOOL1\n'
+_JOURNAL_MAGIC = b'IPPJRN1\n'
+_HEADER = struct.Struct('>8sBB16sQI')  # magic, IP version, parent prefix, parent network, generation, allocations
+_ENTRY = struct.Struct('>16sB')         # network, prefix length
+_JOURNAL_HEADER = struct.Struct('>8sQ')  # magic, generation of the snapshot it extends
+_JOURNAL = struct.Struct('>c16sB')      # b'A' (allocate) or b'F' (free), network, prefix length
+
+
+class AddressPool:
+    """Allocate and free prefixes from a parent block using a buddy allocator
+
+    Free blocks are kept per prefix length (a set for O(1) buddy checks
+    plus a heap so the lowest address is handed out first). Allocation
+    splits the smallest large-enough free block; freeing coalesces buddies
+    back up. Both are O(prefix bits + log n).
+
+    With ``path`` the pool persists to a snapshot of its allocations plus
+    an append-only journal (``path + '.journal'``) of changes since; the
+    journal is folded into the snapshot by ``compact()``, which runs
+    automatically once it holds ``journal_limit`` records.
+    """
+
+    def __init__(self, parent: str, path: str = None, sync: bool = False, journal_limit: int = 65536):
+        try:
+            self.version, self.network, self.prefixlen = parse_network_int(parent)
+        except ValueError as e:
+            raise ValueError(f"Invalid parent network: {e}")
+        self.max_bits = MAX_BITS[self.version]
+        self.path = path
+        self.sync = sync
+        self.journal_limit = journal_limit
+        self._allocated: Dict[int, int] = {}
+        self._free = {length: set() for length in range(self.prefixlen, self.max_bits + 1)}
+        self._heaps = {length: [] for length in range(self.prefixlen, self.max_bits + 1)}
+        self._add_free(self.network, self.prefixlen)
+        self._journal = None
+        self._journal_records = 0
+        self._generation = 0
+        if path is not None:
+            if self._load():
+                self._journal = open(self._journal_path, 'ab')
+            else:
+                self._start_journal()
+
+    def __repr__(self) -> str:
+        return f"AddressPool({self.parent!r}, allocated={len(self._allocated)})"
+
+    @property
+    def parent(self) -> str:
+        return f"{format_ip_int(self.version, self.network)}/{self.prefixlen}"
+
+    # Free-list primitives
+    def _add_free(self, network: int, length: int):
+        self._free[length].add(network)
+        heapq.heappush(self._heaps[length], network)
+
+    def _pop_free(self, length: int) -> int:
+        free, heap = self._free[length], self._heaps[length]
+        while True:
+            network = heapq.heappop(heap)
+            if network in free:  # Entries removed by coalescing are skipped lazily
+                free.remove(network)
+                return network
+
+    def _remove_free(self, network: int, length: int):
+        free, heap = self._free[length], self._heaps[length]
+        free.remove(network)
+        if len(heap) > 2 * len(free) + 64:
+            heap[:] = free
+            heapq.heapify(heap)
+
+    def _split_down(self, network: int, length: int, target: int, want: int) -> int:
+        """Split a free block down to ``target``, keeping the half holding ``want``"""
+        while length < target:
+            length += 1
+            half = 1 << (self.max_bits - length)
+            upper = network | half
+            if want & half:
+                self._add_free(network, length)
+                network = upper
+            else:
+                self._add_free(upper, length)
+        return network
+
+    def _take(self, network: int, length: int):
+        """Mark an exact free region as allocated (used by reserve and replay)"""
+        for level in range(length, self.prefixlen - 1, -1):
+            block = network & ~((1 << (self.max_bits - level)) - 1)
+            if block in self._free[level]:
+                self._remove_free(block, level)
+                self._split_down(block, level, length, network)
+                self._allocated[network] = length
+                return
+        raise ValueError(f"{format_ip_int(self.version, network)}/{length} is not free in {self.parent}")
+
+    def _release(self, network: int, length: int):
+        if self._allocated.get(network) != length:
+            raise ValueError(f"{format_ip_int(self.version, network)}/{length} is not allocated from {self.parent}")
+        del self._allocated[network]
+        while length > self.prefixlen:
+            buddy = network ^ (1 << (self.max_bits - length))
+            if buddy not in self._free[length]:
+                break
+            self._remove_free(buddy, length)
+            network &= ~(1 << (self.max_bits - length))
+            length -= 1
+        self._add_free(network, length)
+
+    # Public API
+    def _prefix_length(self, prefix: Union[int, str]) -> int:
+        length = int(str(prefix).lstrip('/'))
+        if not self.prefixlen <= length <= self.max_bits:
+            raise ValueError(f"Prefix length must be {self.prefixlen}-{self.max_bits} for {self.parent}")
+        return length
+
+    def _parse_member(self, network_str: str) -> Tuple[int, int]:
+        version, network, length = parse_network_int(network_str)
+        if version != self.version or length < self.prefixlen \
+                or network >> (self.max_bits - self.prefixlen) != self.network >> (self.max_bits - self.prefixlen):
+            raise ValueError(f"{network_str} is not inside {self.parent}")
+        return network, length
+
+    def allocate(self, prefix: Union[int, str]) -> str:
+        """Allocate the lowest free block of the given prefix length ('/28' or 28)"""
+        length = self._prefix_length(prefix)
+        for level in range(length, self.prefixlen - 1, -1):
+            if self._free[level]:
+                block = self._split_down(self._pop_free(level), level, length, 0)
+                break
+        else:
+            raise ValueError(f"No free /{length} block left in {self.parent}")
+        self._allocated[block] = length
+        self._log(b'A', block, length)
+        return f"{format_ip_int(self.version, block)}/{length}"
+
+    def reserve(self, network_str: str) -> str:
+        """Allocate one specific block (e.g. to import existing assignments)"""
+        network, length = self._parse_member(network_str)
+        self._take(network, length)
+        self._log(b'A', network, length)
+        return f"{format_ip_int(self.version, network)}/{length}"
+
+    def free(self, network_str: str):
+        """Return an allocated block to the pool, merging free buddies"""
+        network, length = self._parse_member(network_str)
+        self._release(network, length)
+        self._log(b'F', network, length)
+
+    def is_allocated(self, network_str: str) -> bool:
+        network, length = self._parse_member(network_str)
+        return self._allocated.get(network) == length
+
+    def allocations(self) -> List[str]:
+        """Allocated blocks in address order"""
+        return [f"{format_ip_int(self.version, network)}/{length}"
+                for network, length in sorted(self._allocated.items())]
+
+    def free_blocks(self) -> List[str]:
+        """Free blocks (maximal buddies) in address order"""
+        blocks = sorted((network, length) for length, free in self._free.items() for network in free)
+        return [f"{format_ip_int(self.version, network)}/{length}" for network, length in blocks]
+
+    def available(self, prefix: Union[int, str]) -> int:
+        """How many blocks of the given prefix length could still be allocated"""
+        length = self._prefix_length(prefix)
+        return sum(len(self._free[level]) << (length - level) for level in range(self.prefixlen, length + 1))
+
+    def stats(self) -> Dict[str, int]:
+        total = 1 << (self.max_bits - self.prefixlen)
+        used = sum(1 << (self.max_bits - length) for length in self._allocated.values())
+        return {
+            'total_addresses': total,
+            'allocated_addresses': used,
+            'free_addresses': total - used,
+            'allocations': len(self._allocated),
+            'free_blocks': sum(len(free) for free in self._free.values()),
+        }
+
+    def __len__(self) -> int:
+        return len(self._allocated)
+
+    def __contains__(self, network_str: str) -> bool:
+        return self.is_allocated(network_str)
+
+    # Persistence
+    @property
+    def _journal_path(self) -> str:
+        return self.path + '.journal'
+
+    def _log(self, operation: bytes, network: int, length: int):
+        if self._journal is None:
+            return
+        self._journal.write(_JOURNAL.pack(operation, network.to_bytes(16, 'big'), length))
+        self._journal.flush()
+        if self.sync:
+            os.fsync(self._journal.fileno())
+        self._journal_records += 1
+        if self._journal_records >= self.journal_limit:
+            self.compact()
+
+    def _load(self) -> bool:
+        """Load the snapshot and replay the journal; False if there is no current journal"""
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as handle:
+                data = handle.read()
+            try:
+                magic, version, prefixlen, network, self._generation, count = _HEADER.unpack_from(data)
+            except struct.error:
+                raise ValueError(f"{self.path} is not an address pool snapshot")
+            if magic != _MAGIC:
+                raise ValueError(f"{self.path} is not an address pool snapshot")
+            if (version, int.from_bytes(network, 'big'), prefixlen) != (self.version, self.network, self.prefixlen):
+                stored = f"{format_ip_int(version, int.from_bytes(network, 'big'))}/{prefixlen}"
+                raise ValueError(f"{self.path} holds pool {stored}, not {self.parent}")
+            for i in range(count):
+                entry, length = _ENTRY.unpack_from(data, _HEADER.size + i * _ENTRY.size)
+                self._take(int.from_bytes(entry, 'big'), length)
+
+        if not os.path.exists(self._journal_path):
+            return False
+        with open(self._journal_path, 'rb') as handle:
+            data = handle.read()
+        if len(data) < _JOURNAL_HEADER.size:
+            return False
+        magic, generation = _JOURNAL_HEADER.unpack_from(data)
+        if magic != _JOURNAL_MAGIC:
+            raise ValueError(f"{self._journal_path} is not an address pool journal")
+        if generation != self._generation:
+            return False  # Already folded into the snapshot by an interrupted compact()
+        # A torn final record (crash mid-write) is ignored
+        records = (len(data) - _JOURNAL_HEADER.size) // _JOURNAL.size
+        complete = _JOURNAL_HEADER.size + records * _JOURNAL.size
+        for operation, entry, length in _JOURNAL.iter_unpack(data[_JOURNAL_HEADER.size:complete]):
+            network = int.from_bytes(entry, 'big')
+            if operation == b'A':
+                self._take(network, length)
+            elif operation == b'F':
+                self._release(network, length)
+            else:
+                raise ValueError(f"Corrupt journal record in {self._journal_path}")
+        self._journal_records = records
+        if complete != len(data):
+            with open(self._journal_path, 'r+b') as handle:
+                handle.truncate(complete)
+        return True
+
+    def compact(self):
+        """Write a fresh snapshot and empty the journal"""
+        if self.path is None:
+            return
+        allocations = sorted(self._allocated.items())
+        temporary = self.path + '.tmp'
+        with open(temporary, 'wb') as handle:
+            handle.write(_HEADER.pack(_MAGIC, self.version, self.prefixlen, self.network.to_bytes(16, 'big'),
+                                      self._generation + 1, len(allocations)))
+            handle.write(b''.join(_ENTRY.pack(network.to_bytes(16, 'big'), length)
+                                  for network, length in allocations))
+            handle.flush()
+            os.fsync(handle.fileno())
+        # The new generation makes the old journal stale even if we stop here
+        os.replace(temporary, self.path)
+        self._generation += 1
+        self._start_journal()
+
+    def _start_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = open(self._journal_path, 'wb')
+        self._journal.write(_JOURNAL_HEADER.pack(_JOURNAL_MAGIC, self._generation))
+        self._journal.flush()
+        self._journal_records = 0
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def __enter__(self) -> 'AddressPool':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
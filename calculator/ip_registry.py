@@ -0,0 +1,222 @@
+"""
+IP Registry Module
+Special-purpose and bogon address registry compiled into flat interval
+arrays for single-bisect classification
+"""
+
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Tuple
+
+from ip_calculator import MAX_BITS, parse_network_int, format_ip_int
+
+# IANA IPv4/IPv6 special-purpose registries (RFC 6890 and updates), plus the usual
+# bogon (martian) ranges. Same format as registry files: "network tag[,tag...]"
+DEFAULT_ENTRIES = """
+0.0.0.0/8               this-network,bogon
+0.0.0.0/32              this-host
+10.0.0.0/8              private-use,bogon
+100.64.0.0/10           shared-address-space,bogon
+127.0.0.0/8             loopback,bogon
+169.254.0.0/16          link-local,bogon
+172.16.0.0/12           private-use,bogon
+192.0.0.0/24            ietf-protocol-assignments,bogon
+192.0.0.0/29            ipv4-service-continuity
+192.0.0.8/32            ipv4-dummy-address
+192.0.0.9/32            port-control-protocol-anycast
+192.0.0.10/32           turn-anycast
+192.0.0.170/32          nat64-dns64-discovery
+192.0.0.171/32          nat64-dns64-discovery
+192.0.2.0/24            documentation,bogon
+192.31.196.0/24         as112
+192.52.193.0/24         amt
+192.88.99.0/24          deprecated-6to4-relay-anycast
+192.168.0.0/16          private-use,bogon
+192.175.48.0/24         direct-delegation-as112
+198.18.0.0/15           benchmarking,bogon
+198.51.100.0/24         documentation,bogon
+203.0.113.0/24          documentation,bogon
+224.0.0.0/4             multicast,bogon
+240.0.0.0/4             reserved,bogon
+255.255.255.255/32      limited-broadcast
+
+::/8                    bogon
+::/128                  unspecified
+::1/128                 loopback
+::ffff:0:0/96           ipv4-mapped
+64:ff9b::/96            ipv4-ipv6-translation
+64:ff9b:1::/48          local-use-ipv4-ipv6-translation
+100::/64                discard-only,bogon
+2001::/23               ietf-protocol-assignments
+2001::/32               teredo
+2001:1::1/128           port-control-protocol-anycast
+2001:1::2/128           turn-anycast
+2001:2::/48             benchmarking,bogon
+2001:3::/32             amt
+2001:4:112::/48         as112
+2001:10::/28            deprecated-orchid,bogon
+2001:20::/28            orchidv2
+2001:db8::/32           documentation,bogon
+2002::/16               6to4
+2620:4f:8000::/48       direct-delegation-as112
+3ffe::/16               deprecated-6bone,bogon
+3fff::/20               documentation,bogon
+5f00::/16               segment-routing-sids
+fc00::/7                unique-local,bogon
+fe80::/10               link-local,bogon
+fec0::/10               deprecated-site-local,bogon
+ff00::/8                multicast,bogon
+"""
+
+Entry = Tuple[str, Tuple[str, ...]]
+
+
+def parse_entries(lines: Iterable[str], source: str = '<entries>') -> List[Entry]:
+    """Parse "network tag[,tag...]" lines, skipping blanks and '#' comments"""
+    entries = []
+    for number, line in enumerate(lines, 1):
+        text = line.split('#', 1)[0].strip()
+        if not text:
+            continue
+        network_str, _, tags = text.replace('\t', ' ').partition(' ')
+        tags = tuple(tag for tag in tags.replace(' ', ',').split(',') if tag)
+        if not tags:
+            raise ValueError(f"{source}:{number}: no tag given for {network_str}")
+        entries.append((network_str, tags))
+    return entries
+
+
+class AddressRegistry:
+    """Tagged address ranges flattened for O(log n) classification
+
+    Overlapping entries are compiled into disjoint segments that each
+    carry every tag covering them, so classifying an address is one bisect
+    and returns all of its tags at once. User ranges (``load``, ``add``,
+    ``update``) are merged into the same arrays and classify at the same
+    speed; the arrays are rebuilt once, on the first lookup after a change.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, Iterable[str]]] = (), defaults: bool = True):
+        self._entries: List[Tuple[int, int, int, Tuple[str, ...]]] = []
+        self._stale = True
+        if defaults:
+            self._add_entries(parse_entries(DEFAULT_ENTRIES.splitlines(), 'DEFAULT_ENTRIES'))
+        self._add_entries(entries)
+
+    @classmethod
+    def from_file(cls, path: str, defaults: bool = True) -> 'AddressRegistry':
+        """Registry of the built-in entries (unless ``defaults`` is False) plus a file"""
+        registry = cls(defaults=defaults)
+        registry.load(path)
+        return registry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def copy(self) -> 'AddressRegistry':
+        """Independent registry with the same entries, reusing the compiled arrays"""
+        if self._stale:
+            self._compile()
+        registry = AddressRegistry.__new__(AddressRegistry)
+        registry._entries = list(self._entries)
+        # _compile replaces these wholesale, so the copy can share them until it changes
+        registry._starts, registry._tags = self._starts, self._tags
+        registry._stale = False
+        return registry
+
+    def _add_entries(self, entries: Iterable[Tuple[str, Iterable[str]]]):
+        for network_str, tags in entries:
+            if isinstance(tags, str):
+                tags = (tags,)
+            try:
+                version, network, prefixlen = parse_network_int(network_str)
+            except ValueError as e:
+                raise ValueError(f"Invalid registry network {network_str!r}: {e}")
+            last = network | ((1 << (MAX_BITS[version] - prefixlen)) - 1)
+            self._entries.append((version, network, last, tuple(tags)))
+            self._stale = True
+
+    def add(self, network_str: str, *tags: str):
+        """Tag one more range"""
+        if not tags:
+            raise ValueError(f"No tag given for {network_str}")
+        self._add_entries([(network_str, tags)])
+
+    def update(self, entries: Iterable[Tuple[str, Iterable[str]]]):
+        """Tag many (network, tags) ranges at once"""
+        self._add_entries(entries)
+
+    def load(self, path: str) -> int:
+        """Add the entries of a registry file; returns how many were read"""
+        with open(path, 'r', encoding='utf-8') as handle:
+            entries = parse_entries(handle, path)
+        self._add_entries(entries)
+        return len(entries)
+
+    def _compile(self):
+        """Sweep entry boundaries into disjoint segments per family
+
+        ``_starts[version][i]`` begins a segment tagged ``_tags[version][i]``
+        that runs to the next start; segments with equal tags are merged and
+        untagged space is an empty tuple, so lookups need no end check.
+        """
+        self._starts: Dict[int, List[int]] = {}
+        self._tags: Dict[int, List[Tuple[str, ...]]] = {}
+        self._stale = False
+        for version in (4, 6):
+            events: Dict[int, List[Tuple[int, Tuple[str, ...]]]] = {0: []}
+            for entry_version, start, last, tags in self._entries:
+                if entry_version == version:
+                    events.setdefault(start, []).append((1, tags))
+                    events.setdefault(last + 1, []).append((-1, tags))
+            active: Dict[str, int] = {}
+            starts, segment_tags = [], []
+            for point in sorted(events):
+                for delta, tags in events[point]:
+                    for tag in tags:
+                        active[tag] = active.get(tag, 0) + delta
+                current = tuple(sorted(tag for tag, depth in active.items() if depth > 0))
+                if segment_tags and segment_tags[-1] == current:
+                    continue
+                starts.append(point)
+                segment_tags.append(current)
+            self._starts[version] = starts
+            self._tags[version] = segment_tags
+
+    def classify_int(self, version: int, start: int, last: int = None) -> Tuple[str, ...]:
+        """Tags covering all of [start, last] (a single address by default)"""
+        if self._stale:
+            self._compile()
+        starts, tags = self._starts[version], self._tags[version]
+        i = bisect_right(starts, start) - 1
+        if last is None or i + 1 >= len(starts) or last < starts[i + 1]:
+            return tags[i]
+        # The range spans several segments: keep only tags present in all of them
+        j = bisect_right(starts, last) - 1
+        common = set(tags[i])
+        for segment in range(i + 1, j + 1):
+            common.intersection_update(tags[segment])
+        return tuple(tag for tag in tags[i] if tag in common)
+
+    def classify(self, ip_or_network: str) -> Tuple[str, ...]:
+        """Tags of an address, or the tags covering a whole network"""
+        version, network, prefixlen = parse_network_int(ip_or_network)
+        return self.classify_int(version, network, network | ((1 << (MAX_BITS[version] - prefixlen)) - 1))
+
+    def entries(self) -> List[Entry]:
+        """Registered (network, tags) pairs in insertion order"""
+        return [(f"{format_ip_int(version, start)}/{MAX_BITS[version] - (last - start + 1).bit_length() + 1}", tags)
+                for version, start, last, tags in self._entries]
+
+
+_default_registry = None
+
+
+def default_registry() -> AddressRegistry:
+    """Shared registry of the built-in entries (compiled on first use)
+
+    Treat it as read-only; ``copy()`` it before adding entries.
+    """
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = AddressRegistry()
+    return _default_registry
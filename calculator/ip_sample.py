@@ -0,0 +1,124 @@
+"""
+IP Sample Module
+Uniform random sampling of addresses and subnets by integer arithmetic,
+without enumerating the network
+"""
+
+import random
+from bisect import bisect_right
+from typing import Iterable, Iterator, List, Tuple, Union
+
+from ip_calculator import MAX_BITS, parse_network_int, format_ip_int
+from ip_set import IPSet
+
+
+def _unique_ranks(rng: random.Random, available: int, k: int) -> Iterator[int]:
+    """k distinct ranks below ``available``, each ordered k-sample equally likely
+
+    A Fisher-Yates shuffle of range(available) stopped after k steps, with
+    only the displaced positions kept in a dict: exactly uniform for any
+    domain size, O(1) work per draw and at most k entries of memory.
+    """
+    displaced = {}
+    for i in range(k):
+        j = rng.randrange(i, available)
+        head = displaced.pop(i, i)
+        if j == i:
+            yield head
+        else:
+            yield displaced.get(j, j)
+            displaced[j] = head
+
+
+def _excluded_slots(exclude: Union[IPSet, Iterable[str], None], version: int, first: int, last: int,
+                    shift: int) -> Tuple[List[int], List[int]]:
+    """Merged (start slot, end slot) lists of slots touching an excluded address"""
+    if exclude is None:
+        return [], []
+    if not isinstance(exclude, IPSet):
+        exclude = IPSet(exclude)
+    starts, ends = [], []
+    for block_version, network, prefixlen in exclude.iter_blocks():
+        block_last = network | ((1 << (MAX_BITS[block_version] - prefixlen)) - 1)
+        if block_version != version or block_last < first or network > last:
+            continue
+        start = (max(network, first) - first) >> shift
+        end = (min(block_last, last) - first) >> shift
+        if ends and start <= ends[-1] + 1:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+def _sample_slots(version: int, first: int, last: int, shift: int, k: int, unique: bool,
+                  seed, exclude) -> Iterator[int]:
+    """k slot indices (slots of 2**shift addresses) of [first, last] avoiding exclusions
+
+    Arguments are checked here; the returned iterator draws lazily.
+    """
+    if not isinstance(k, int) or isinstance(k, bool):
+        raise TypeError(f"Sample size must be an integer, not {type(k).__name__}")
+    if k < 0:
+        raise ValueError("Sample size must not be negative")
+    total = ((last - first) >> shift) + 1
+    starts, ends = _excluded_slots(exclude, version, first, last, shift)
+    # free_before[i]: free slots below excluded run i; skipped[i]: excluded slots up to and including it
+    free_before, skipped, excluded = [], [], 0
+    for start, end in zip(starts, ends):
+        free_before.append(start - excluded)
+        excluded += end - start + 1
+        skipped.append(excluded)
+    available = total - excluded
+    if k and not available:
+        raise ValueError("Every candidate is excluded")
+    if unique and k > available:
+        raise ValueError(f"Cannot draw {k} unique samples from {available} candidates")
+
+    def slot(rank: int) -> int:
+        i = bisect_right(free_before, rank)
+        return rank + (skipped[i - 1] if i else 0)
+
+    rng = random.Random(seed)
+    if unique:
+        return (slot(rank) for rank in _unique_ranks(rng, available, k))
+    return (slot(rng.randrange(available)) for _ in range(k))
+
+
+def sample_addresses(network: str, k: int, unique: bool = True, seed=None,
+                     exclude: Union[IPSet, Iterable[str]] = None) -> Iterator[str]:
+    """Stream k uniformly random addresses of ``network``
+
+    Every address of the block is a candidate (use ``exclude`` to leave
+    out e.g. the IPv4 network and broadcast addresses). Unique samples
+    are exactly uniform and drawn lazily in O(k) memory, however large
+    the network; the same ``seed`` gives the same sequence.
+    """
+    try:
+        version, first, prefixlen = parse_network_int(network)
+    except ValueError as e:
+        raise ValueError(f"Invalid network: {e}")
+    last = first | ((1 << (MAX_BITS[version] - prefixlen)) - 1)
+    slots = _sample_slots(version, first, last, 0, k, unique, seed, exclude)
+    return (format_ip_int(version, first + slot) for slot in slots)
+
+
+def sample_subnets(network: str, prefix: int, k: int, unique: bool = True, seed=None,
+                   exclude: Union[IPSet, Iterable[str]] = None) -> Iterator[str]:
+    """Stream k uniformly random /prefix subnets of ``network``
+
+    Subnets overlapping any excluded address are never returned.
+    """
+    try:
+        version, first, prefixlen = parse_network_int(network)
+    except ValueError as e:
+        raise ValueError(f"Invalid network: {e}")
+    prefix = int(str(prefix).lstrip('/'))
+    max_bits = MAX_BITS[version]
+    if not prefixlen <= prefix <= max_bits:
+        raise ValueError(f"New prefix must be between {prefixlen} and {max_bits}")
+    shift = max_bits - prefix
+    last = first | ((1 << (max_bits - prefixlen)) - 1)
+    slots = _sample_slots(version, first, last, shift, k, unique, seed, exclude)
+    return (f"{format_ip_int(version, first + (slot << shift))}/{prefix}" for slot in slots)
@@ -0,0 +1,217 @@
+"""
+IP Set Module
+Address set algebra over sorted, non-overlapping integer intervals
+"""
+
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from ip_calculator import MAX_BITS, parse_ip_int, parse_network_int, format_ip_int, range_blocks
+
+Interval = Tuple[int, int]
+
+
+def _normalize(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sort intervals and merge overlapping or adjacent ones"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _union(a: List[Interval], b: List[Interval]) -> List[Interval]:
+    merged = []
+    i = j = 0
+    while i < len(a) or j < len(b):
+        if j >= len(b) or (i < len(a) and a[i][0] <= b[j][0]):
+            start, end = a[i]
+            i += 1
+        else:
+            start, end = b[j]
+            j += 1
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _intersection(a: List[Interval], b: List[Interval]) -> List[Interval]:
+    result = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        start = max(a[i][0], b[j][0])
+        end = min(a[i][1], b[j][1])
+        if start <= end:
+            result.append((start, end))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def _difference(a: List[Interval], b: List[Interval]) -> List[Interval]:
+    result = []
+    j = 0
+    for start, end in a:
+        # Skip subtrahends entirely before this interval
+        while j < len(b) and b[j][1] < start:
+            j += 1
+        k = j
+        while k < len(b) and b[k][0] <= end:
+            if b[k][0] > start:
+                result.append((start, b[k][0] - 1))
+            start = max(start, b[k][1] + 1)
+            if start > end:
+                break
+            k += 1
+        if start <= end:
+            result.append((start, end))
+    return result
+
+
+def _set_operator(method):
+    """Wrap a named IPSet method as an operator that rejects other types with NotImplemented"""
+    def operator(self, other):
+        if not isinstance(other, IPSet):
+            return NotImplemented
+        return method(self, other)
+    return operator
+
+
+class IPSet:
+    """Immutable set of IPv4 and IPv6 addresses
+
+    Each family is kept as parallel sorted lists of interval starts and
+    ends, so set operations are linear merges and membership is a single
+    bisect. ``len()`` is the number of addresses (use ``num_addresses`` for
+    IPv6 sets larger than ``sys.maxsize``).
+    """
+
+    def __init__(self, networks: Iterable[str] = ()):
+        intervals = {4: [], 6: []}
+        for network_str in networks:
+            version, network, prefixlen = parse_network_int(network_str)
+            intervals[version].append((network, network | ((1 << (MAX_BITS[version] - prefixlen)) - 1)))
+        self._set_intervals({version: _normalize(items) for version, items in intervals.items()})
+
+    @classmethod
+    def from_ranges(cls, ranges: Iterable[Tuple[str, str]]) -> 'IPSet':
+        """Build from inclusive (start address, end address) pairs"""
+        intervals = {4: [], 6: []}
+        for start_ip, end_ip in ranges:
+            version, start = parse_ip_int(start_ip)
+            end_version, end = parse_ip_int(end_ip)
+            if version != end_version or start > end:
+                raise ValueError(f"Invalid IP range: {start_ip}-{end_ip}")
+            intervals[version].append((start, end))
+        return cls._from_intervals({version: _normalize(items) for version, items in intervals.items()})
+
+    @classmethod
+    def _from_intervals(cls, intervals: Dict[int, List[Interval]]) -> 'IPSet':
+        result = cls.__new__(cls)
+        result._set_intervals(intervals)
+        return result
+
+    def _set_intervals(self, intervals: Dict[int, List[Interval]]):
+        self._intervals = intervals
+        self._starts = {version: [start for start, _ in items] for version, items in intervals.items()}
+
+    @staticmethod
+    def _check(other):
+        if not isinstance(other, IPSet):
+            raise TypeError(f"Expected an IPSet, not {type(other).__name__}")
+
+    def _combine(self, other: 'IPSet', operation) -> 'IPSet':
+        self._check(other)
+        return self._from_intervals({version: operation(self._intervals[version], other._intervals[version])
+                                     for version in (4, 6)})
+
+    # Set algebra
+    def union(self, other: 'IPSet') -> 'IPSet':
+        return self._combine(other, _union)
+
+    def intersection(self, other: 'IPSet') -> 'IPSet':
+        return self._combine(other, _intersection)
+
+    def difference(self, other: 'IPSet') -> 'IPSet':
+        return self._combine(other, _difference)
+
+    def symmetric_difference(self, other: 'IPSet') -> 'IPSet':
+        return self._combine(other, lambda a, b: _union(_difference(a, b), _difference(b, a)))
+
+    def isdisjoint(self, other: 'IPSet') -> bool:
+        return not self.intersection(other)
+
+    def issubset(self, other: 'IPSet') -> bool:
+        return not self.difference(other)
+
+    def issuperset(self, other: 'IPSet') -> bool:
+        self._check(other)
+        return not other.difference(self)
+
+    # Operators return NotImplemented for other types, so Python can try the reflected one
+    __or__ = _set_operator(union)
+    __and__ = _set_operator(intersection)
+    __sub__ = _set_operator(difference)
+    __xor__ = _set_operator(symmetric_difference)
+    __le__ = _set_operator(issubset)
+    __ge__ = _set_operator(issuperset)
+
+    # Container protocol
+    def __contains__(self, item: str) -> bool:
+        """True if an address or every address of a network is in the set"""
+        version, network, prefixlen = parse_network_int(item)
+        last = network | ((1 << (MAX_BITS[version] - prefixlen)) - 1)
+        i = bisect_right(self._starts[version], network) - 1
+        return i >= 0 and last <= self._intervals[version][i][1]
+
+    @property
+    def num_addresses(self) -> int:
+        """Exact number of addresses in the set"""
+        return sum(end - start + 1 for version in (4, 6) for start, end in self._intervals[version])
+
+    def __len__(self) -> int:
+        return self.num_addresses
+
+    def __bool__(self) -> bool:
+        return bool(self._intervals[4] or self._intervals[6])
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, IPSet):
+            return NotImplemented
+        return self._intervals == other._intervals
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_cidrs()
+
+    def __repr__(self) -> str:
+        return f"IPSet({self.to_cidrs()!r})"
+
+    # Export
+    def iter_blocks(self) -> Iterator[Tuple[int, int, int]]:
+        """Stream the minimal CIDR cover as (version, network, prefixlen) integers"""
+        for version in (4, 6):
+            for start, end in self._intervals[version]:
+                for network, prefixlen in range_blocks(version, start, end):
+                    yield version, network, prefixlen
+
+    def iter_cidrs(self) -> Iterator[str]:
+        """Stream the minimal CIDR cover, IPv4 first"""
+        for version, network, prefixlen in self.iter_blocks():
+            yield f"{format_ip_int(version, network)}/{prefixlen}"
+
+    def to_cidrs(self) -> List[str]:
+        """Minimal list of CIDR blocks covering the set"""
+        return list(self.iter_cidrs())
+
+    def ranges(self) -> List[Tuple[str, str]]:
+        """Inclusive (start, end) address pairs of the stored intervals"""
+        return [(format_ip_int(version, start), format_ip_int(version, end))
+                for version in (4, 6) for start, end in self._intervals[version]]
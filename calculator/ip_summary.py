@@ -0,0 +1,110 @@
+"""
+IP Summary Module
+Out-of-core prefix summarization: bounded-memory sorted runs spilled to
+temporary files, k-way merged and collapsed on integer ranges
+"""
+
+import heapq
+import struct
+import tempfile
+from typing import IO, Iterable, Iterator, List, Optional, Union
+
+from ip_calculator import parse_network_int, format_ip_int, range_blocks, MAX_BITS
+
+# version, first address, last address; big-endian so byte order == numeric order
+_RECORD = struct.Struct('>B16s16s')
+_READ_RECORDS = 8192
+
+
+def _read_prefixes(source: Union[str, Iterable[str]]) -> Iterator[str]:
+    """Yield prefix strings from a path or an iterable of strings"""
+    if isinstance(source, str):
+        with open(source, 'r', encoding='utf-8') as handle:
+            yield from _read_prefixes(handle)
+        return
+    for line in source:
+        line = line.split('#', 1)[0].strip()
+        if line:
+            yield line
+
+
+def _spill(records: List[bytes], tmpdir: Optional[str]) -> IO[bytes]:
+    """Write a sorted run to an anonymous temporary file"""
+    records.sort()
+    run = tempfile.TemporaryFile(dir=tmpdir)
+    run.write(b''.join(records))
+    run.seek(0)
+    return run
+
+
+def _iter_run(run: IO[bytes]) -> Iterator[bytes]:
+    size = _RECORD.size
+    while True:
+        chunk = run.read(size * _READ_RECORDS)
+        if not chunk:
+            return
+        for offset in range(0, len(chunk), size):
+            yield chunk[offset:offset + size]
+
+
+def summarize_prefixes(source: Union[str, Iterable[str]], run_size: int = 500000,
+                       tmpdir: Optional[str] = None) -> Iterator[str]:
+    """Collapse prefixes into the minimal covering set, streaming the result
+
+    At most ``run_size`` prefixes are held in memory; larger inputs are
+    sorted in runs spilled to temporary files and k-way merged. IPv4
+    results are yielded before IPv6, each in address order.
+    """
+    if run_size < 1:
+        raise ValueError("Run size must be positive")
+
+    runs = []
+    records = []
+    try:
+        for network_str in _read_prefixes(source):
+            try:
+                version, network, prefixlen = parse_network_int(network_str)
+            except ValueError as e:
+                raise ValueError(f"Error summarizing networks: {e}")
+            last = network | ((1 << (MAX_BITS[version] - prefixlen)) - 1)
+            records.append(_RECORD.pack(version, network.to_bytes(16, 'big'), last.to_bytes(16, 'big')))
+            if len(records) >= run_size:
+                runs.append(_spill(records, tmpdir))
+                records = []
+
+        if runs:
+            if records:
+                runs.append(_spill(records, tmpdir))
+            merged = heapq.merge(*(_iter_run(run) for run in runs))
+        else:
+            records.sort()
+            merged = iter(records)
+
+        yield from _collapse(merged)
+    finally:
+        for run in runs:
+            run.close()
+
+
+def _collapse(records: Iterator[bytes]) -> Iterator[str]:
+    """Merge sorted overlapping/adjacent ranges and emit their CIDR cover"""
+    unpack = _RECORD.unpack
+    current = None
+    for record in records:
+        version, first, last = unpack(record)
+        first = int.from_bytes(first, 'big')
+        last = int.from_bytes(last, 'big')
+        if current is not None and version == current[0] and first <= current[2] + 1:
+            if last > current[2]:
+                current[2] = last
+            continue
+        if current is not None:
+            yield from _blocks(*current)
+        current = [version, first, last]
+    if current is not None:
+        yield from _blocks(*current)
+
+
+def _blocks(version: int, first: int, last: int) -> Iterator[str]:
+    for network, prefixlen in range_blocks(version, first, last):
+        yield f"{format_ip_int(version, network)}/{prefixlen}"
@@ -0,0 +1,223 @@
+"""
+IPv6 Bulk Module
+Streaming IPv6 normalization (RFC 5952), expansion, EUI-64 (SLAAC)
+addresses and IPv4-mapped / NAT64 (RFC 6052) translation
+"""
+
+import socket
+import struct
+from typing import Iterable, Iterator, Optional
+
+from ip_calculator import parse_network_int
+
+_AF_INET, _AF_INET6 = socket.AF_INET, socket.AF_INET6
+_WORDS = struct.Struct('>8H')
+_EXPANDED = ':'.join(['%04x'] * 8)
+_MAPPED_PREFIX = b'\x00' * 10 + b'\xff\xff'
+
+NAT64_WELL_KNOWN_PREFIX = '64:ff9b::/96'
+# RFC 6052 prefix lengths; bits 64-71 (the "u" octet) must stay zero
+_NAT64_LENGTHS = (32, 40, 48, 56, 64, 96)
+
+
+def _format_canonical(packed: bytes) -> str:
+    """RFC 5952 text: lowercase, no leading zeros, longest zero run (2+ groups, first on ties) as '::'"""
+    if packed[:12] == _MAPPED_PREFIX:
+        return '::ffff:' + socket.inet_ntop(_AF_INET, packed[12:])
+    words = _WORDS.unpack(packed)
+    best_start, best_length, start = -1, 1, None
+    for i, word in enumerate(words + (1,)):
+        if word == 0:
+            if start is None:
+                start = i
+        elif start is not None:
+            if i - start > best_length:
+                best_start, best_length = start, i - start
+            start = None
+    if best_start < 0:
+        return ':'.join(['%x' % word for word in words])
+    head = ':'.join(['%x' % word for word in words[:best_start]])
+    tail = ':'.join(['%x' % word for word in words[best_start + best_length:]])
+    return f"{head}::{tail}"
+
+
+def _ntop_is_canonical() -> bool:
+    """Whether this C library's inet_ntop already prints RFC 5952 text"""
+    samples = ('2001:db8:0:1:1:1:1:1', '2001:db8::1:0:0:1', '::2', '::1:2:3:4:5:6', '::ffff:192.0.2.1', '1::')
+    for sample in samples:
+        packed = socket.inet_pton(_AF_INET6, sample)
+        if socket.inet_ntop(_AF_INET6, packed) != _format_canonical(packed):
+            return False
+    return True
+
+
+_NTOP_CANONICAL = _ntop_is_canonical()
+
+
+def _pack(text: str) -> Optional[tuple]:
+    """(packed bytes, zone suffix) for one IPv6 string, or None if it is not one
+
+    Accepts any case, leading zeros, embedded dotted quads, surrounding
+    whitespace or brackets and a non-empty '%zone' suffix (kept as written).
+    """
+    if type(text) is not str:
+        return None
+    text = text.strip()
+    if text[:1] == '[' and text[-1:] == ']':
+        text = text[1:-1]
+    address, percent, zone = text.partition('%')
+    if percent and not zone:
+        return None
+    try:
+        return socket.inet_pton(_AF_INET6, address), percent + zone
+    except (OSError, ValueError, UnicodeError):  # ValueError: embedded NUL
+        return None
+
+
+def _invalid(text, strict: bool) -> None:
+    if strict:
+        raise ValueError(f"{text!r} does not appear to be an IPv6 address")
+    return None
+
+
+def canonicalize(addresses: Iterable[str], strict: bool = True) -> Iterator[Optional[str]]:
+    """Yield each address in RFC 5952 canonical form
+
+    IPv4-mapped addresses keep the mixed '::ffff:a.b.c.d' notation. With
+    ``strict`` False invalid input yields None (keeping rows aligned)
+    instead of raising ValueError.
+    """
+    ntop = socket.inet_ntop
+    for text in addresses:
+        parsed = _pack(text)
+        if parsed is None:
+            yield _invalid(text, strict)
+            continue
+        packed, zone = parsed
+        if _NTOP_CANONICAL and packed[:12] != b'\x00' * 12:
+            yield ntop(_AF_INET6, packed) + zone
+        else:
+            # Addresses with 96 leading zero bits are where C libraries disagree
+            yield _format_canonical(packed) + zone
+
+
+def expand(addresses: Iterable[str], strict: bool = True) -> Iterator[Optional[str]]:
+    """Yield each address in full form (eight 4-digit groups)"""
+    unpack = _WORDS.unpack
+    for text in addresses:
+        parsed = _pack(text)
+        if parsed is None:
+            yield _invalid(text, strict)
+            continue
+        packed, zone = parsed
+        yield _EXPANDED % unpack(packed) + zone
+
+
+def _parse_mac(mac: str) -> bytes:
+    digits = mac.strip().replace(':', '').replace('-', '').replace('.', '')
+    if len(digits) != 12:
+        raise ValueError(f"{mac!r} is not a 48-bit MAC address")
+    try:
+        return bytes.fromhex(digits)
+    except ValueError:
+        raise ValueError(f"{mac!r} is not a 48-bit MAC address")
+
+
+def eui64_interface_id(mac: str) -> bytes:
+    """Modified EUI-64 interface identifier (RFC 4291 appendix A) for a MAC"""
+    octets = _parse_mac(mac)
+    return bytes((octets[0] ^ 0x02,)) + octets[1:3] + b'\xff\xfe' + octets[3:]
+
+
+def eui64_addresses(macs: Iterable[str], prefix: str, strict: bool = True) -> Iterator[Optional[str]]:
+    """Yield the SLAAC address each MAC (':', '-', '.' or no separators) gets in a /64"""
+    try:
+        version, network, prefixlen = parse_network_int(prefix)
+    except ValueError as e:
+        raise ValueError(f"Invalid prefix: {e}")
+    if version != 6 or prefixlen != 64:
+        raise ValueError(f"EUI-64 addresses need an IPv6 /64 prefix, not {prefix}")
+    upper = network.to_bytes(16, 'big')[:8]
+    for mac in macs:
+        try:
+            interface_id = eui64_interface_id(mac)
+        except (ValueError, AttributeError):
+            if strict:
+                raise ValueError(f"{mac!r} is not a 48-bit MAC address")
+            yield None
+            continue
+        yield _format_canonical(upper + interface_id)
+
+
+def to_ipv4_mapped(addresses: Iterable[str], strict: bool = True) -> Iterator[Optional[str]]:
+    """Yield '::ffff:a.b.c.d' for each IPv4 address"""
+    pton = socket.inet_pton
+    for text in addresses:
+        try:
+            yield '::ffff:' + socket.inet_ntop(_AF_INET, pton(_AF_INET, text.strip()))
+        except (OSError, AttributeError, ValueError, UnicodeError):
+            if strict:
+                raise ValueError(f"{text!r} does not appear to be an IPv4 address")
+            yield None
+
+
+def from_ipv4_mapped(addresses: Iterable[str], strict: bool = True) -> Iterator[Optional[str]]:
+    """Yield the embedded IPv4 address of each '::ffff:0:0/96' address"""
+    for text in addresses:
+        parsed = _pack(text)
+        if parsed is None or parsed[0][:12] != _MAPPED_PREFIX:
+            if strict:
+                raise ValueError(f"{text!r} is not an IPv4-mapped IPv6 address")
+            yield None
+            continue
+        yield socket.inet_ntop(_AF_INET, parsed[0][12:])
+
+
+def _nat64_prefix(prefix: str):
+    try:
+        version, network, prefixlen = parse_network_int(prefix)
+    except ValueError as e:
+        raise ValueError(f"Invalid NAT64 prefix: {e}")
+    if version != 6 or prefixlen not in _NAT64_LENGTHS:
+        raise ValueError(f"NAT64 prefix length must be one of {', '.join(map(str, _NAT64_LENGTHS))}")
+    return network.to_bytes(16, 'big'), prefixlen // 8
+
+
+def to_nat64(addresses: Iterable[str], prefix: str = NAT64_WELL_KNOWN_PREFIX,
+             strict: bool = True) -> Iterator[Optional[str]]:
+    """Yield the RFC 6052 IPv4-embedded IPv6 address of each IPv4 address"""
+    network, offset = _nat64_prefix(prefix)
+    pton = socket.inet_pton
+    for text in addresses:
+        try:
+            ipv4 = pton(_AF_INET, text.strip())
+        except (OSError, AttributeError, ValueError, UnicodeError):
+            if strict:
+                raise ValueError(f"{text!r} does not appear to be an IPv4 address")
+            yield None
+            continue
+        if offset == 12:
+            packed = network[:12] + ipv4
+        else:
+            # The IPv4 bytes skip the reserved u octet (byte 8); the suffix is zero
+            embedded = (network[:offset] + ipv4)[:16]
+            embedded = embedded[:8] + b'\x00' + embedded[8:] if len(embedded) > 8 else embedded
+            packed = (embedded + b'\x00' * 16)[:16]
+        yield _format_canonical(packed)
+
+
+def from_nat64(addresses: Iterable[str], prefix: str = NAT64_WELL_KNOWN_PREFIX,
+               strict: bool = True) -> Iterator[Optional[str]]:
+    """Yield the IPv4 address embedded in each address under a NAT64 prefix"""
+    network, offset = _nat64_prefix(prefix)
+    for text in addresses:
+        parsed = _pack(text)
+        if parsed is None or parsed[0][:offset] != network[:offset]:
+            if strict:
+                raise ValueError(f"{text!r} is not under NAT64 prefix {prefix}")
+            yield None
+            continue
+        packed = parsed[0]
+        if offset < 12:
+            packed = packed[:8] + packed[9:]  # Drop the u octet
+        yield socket.inet_ntop(_AF_INET, packed[offset:offset + 4])
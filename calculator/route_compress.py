@@ -0,0 +1,171 @@
+"""
+Route Compress Module
+Optimal Routing Table Constructor (ORTC): the smallest table with the
+same forwarding behaviour as a set of (prefix, next hop) routes
+"""
+
+from typing import Any, Dict, Hashable, Iterable, List, Tuple
+
+from ip_calculator import MAX_BITS, parse_network_int, format_ip_int
+
+Route = Tuple[str, Hashable]
+
+
+def _parse_routes(routes: Iterable[Route]) -> Dict[int, Dict[Tuple[int, int], Hashable]]:
+    """{version: {(network, prefixlen): next hop}}; later duplicates win"""
+    tables = {4: {}, 6: {}}
+    for network_str, next_hop in routes:
+        try:
+            version, network, prefixlen = parse_network_int(network_str)
+        except ValueError as e:
+            raise ValueError(f"Invalid route {network_str!r}: {e}")
+        tables[version][(network, prefixlen)] = next_hop
+    return tables
+
+
+def _compress_family(version: int, table: Dict[Tuple[int, int], Hashable],
+                     hops: List[Hashable], hop_ids: Dict[Hashable, int]) -> Dict[Tuple[int, int], Hashable]:
+    max_bits = MAX_BITS[version]
+    # Binary trie in parallel arrays; node 0 is the root (/0). Prefixes are inserted in
+    # address order so each walk resumes below the path shared with the previous one.
+    left, right, assigned = [-1], [-1], [-1]
+    path = [0]  # Node at each depth of the previous insertion
+    previous = 0
+    for (network, prefixlen), next_hop in sorted(table.items(), key=lambda item: item[0]):
+        depth = min(max_bits - (network ^ previous).bit_length(), prefixlen, len(path) - 1)
+        del path[depth + 1:]
+        node = path[depth]
+        for depth in range(depth, prefixlen):
+            children = right if (network >> (max_bits - 1 - depth)) & 1 else left
+            child = children[node]
+            if child < 0:
+                child = children[node] = len(assigned)
+                left.append(-1)
+                right.append(-1)
+                assigned.append(-1)
+            node = child
+            path.append(node)
+        previous = network
+        if next_hop not in hop_ids:
+            hop_ids[next_hop] = len(hops)
+            hops.append(next_hop)
+        assigned[node] = hop_ids[next_hop]
+
+    # Passes 1 and 2 (post-order): push inherited next hops down so every node has zero
+    # or two children, then give each node its candidate set (a bitmask of hop ids):
+    # the intersection of its children's sets when non-empty, else their union
+    candidates = [0] * len(assigned)
+    stack = [(0, 0, False)]  # hop id 0 is None, i.e. no route
+    while stack:
+        node, inherited, expanded = stack.pop()
+        if expanded:
+            a, b = candidates[left[node]], candidates[right[node]]
+            candidates[node] = (a & b) or (a | b)
+            continue
+        hop = assigned[node] if assigned[node] >= 0 else inherited
+        if left[node] < 0 and right[node] < 0:
+            candidates[node] = 1 << hop
+            continue
+        for children in (left, right):
+            if children[node] < 0:
+                children[node] = len(assigned)
+                left.append(-1)
+                right.append(-1)
+                assigned.append(hop)
+                candidates.append(1 << hop)
+        stack.append((node, hop, True))
+        stack.append((left[node], hop, False))
+        stack.append((right[node], hop, False))
+
+    # Pass 3 (pre-order): keep the inherited hop where it is a candidate, otherwise emit a
+    # route for any candidate (preferring a real next hop over None)
+    compressed = {}
+    stack = [(0, 0, 0, 0)]
+    while stack:
+        node, network, prefixlen, inherited = stack.pop()
+        mask = candidates[node]
+        if mask >> inherited & 1:
+            hop = inherited
+        else:
+            choice = mask & ~1 or mask
+            hop = (choice & -choice).bit_length() - 1
+            compressed[(network, prefixlen)] = hops[hop]
+        if left[node] >= 0:
+            stack.append((right[node], network | (1 << (max_bits - 1 - prefixlen)), prefixlen + 1, hop))
+            stack.append((left[node], network, prefixlen + 1, hop))
+    return compressed
+
+
+def forwarding_intervals(routes: Iterable[Route]) -> Dict[int, List[Tuple[int, int, Hashable]]]:
+    """Flatten routes into {version: [(first, last, next hop), ...]}
+
+    Intervals are in address order with adjacent equal next hops merged;
+    addresses without a route (or routed to None) are left out. Two tables
+    forward identically exactly when their intervals are equal.
+    """
+    return _flatten(_parse_routes(routes))
+
+
+def _flatten(tables: Dict[int, Dict[Tuple[int, int], Hashable]]) -> Dict[int, List[Tuple[int, int, Hashable]]]:
+    flattened = {}
+    for version, table in tables.items():
+        host_mask = (1 << MAX_BITS[version]) - 1
+        intervals = []
+
+        def emit(first: int, last: int, next_hop: Hashable):
+            if first > last or next_hop is None:
+                return
+            if intervals and intervals[-1][1] + 1 == first and intervals[-1][2] == next_hop:
+                intervals[-1] = (intervals[-1][0], last, next_hop)
+            else:
+                intervals.append((first, last, next_hop))
+
+        stack = []  # Enclosing routes as (last, next hop), innermost on top
+        cursor = 0
+        for (network, prefixlen), next_hop in sorted(table.items(), key=lambda item: item[0]):
+            while stack and stack[-1][0] < network:
+                last, outer_hop = stack.pop()
+                emit(cursor, last, outer_hop)
+                cursor = last + 1
+            if stack:
+                emit(cursor, network - 1, stack[-1][1])
+            cursor = network
+            stack.append((network | (host_mask >> prefixlen), next_hop))
+        while stack:
+            last, outer_hop = stack.pop()
+            emit(cursor, last, outer_hop)
+            cursor = last + 1
+        flattened[version] = intervals
+    return flattened
+
+
+def compress_routes(routes: Iterable[Route], verify: bool = True) -> Dict[str, Any]:
+    """Minimize a route table without changing any forwarding decision
+
+    ``routes`` are (prefix, next hop) pairs with hashable next hops; a
+    next hop of None means "no route" (an explicit reject where it sits
+    under a covering route). Runs the three ORTC passes per address family
+    over a binary trie, which is O(routes x prefix length).
+
+    Returns 'routes' (the minimal table in address order, IPv4 first),
+    'original_entries', 'entries', 'compression_ratio' (entries /
+    original_entries) and, with ``verify``, 'equivalent' (whether both
+    tables flatten to the same forwarding intervals).
+    """
+    tables = _parse_routes(routes)
+    original = sum(len(table) for table in tables.values())
+    hops: List[Hashable] = [None]
+    hop_ids = {None: 0}
+    compressed = {version: _compress_family(version, table, hops, hop_ids) if table else {}
+                  for version, table in tables.items()}
+    entries = sum(len(table) for table in compressed.values())
+    result = {
+        'routes': [(f"{format_ip_int(version, network)}/{prefixlen}", next_hop)
+                   for version in (4, 6) for (network, prefixlen), next_hop in compressed[version].items()],
+        'original_entries': original,
+        'entries': entries,
+        'compression_ratio': entries / original if original else 1.0,
+    }
+    if verify:
+        result['equivalent'] = _flatten(tables) == _flatten(compressed)
+    return result
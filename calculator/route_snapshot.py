@@ -0,0 +1,201 @@
+"""
+Route Snapshot Module
+Compiled, read-only DIR-24-8 IPv4 lookup tables stored in a file and
+shared between processes through mmap
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Any, Iterable, List, Optional, Tuple, Union
+
+from ip_calculator import parse_ip_int, parse_network_int, format_ip_int
+
+MAGIC = b'DIR248\x00\x01'
+# magic, byte-order marker, route count, overflow block count, metadata length
+_HEADER = struct.Struct('=8sIIIQ')
+_HEADER_SIZE = 64
+_BYTE_ORDER_MARK = 0x01020304
+
+TBL24_ENTRIES = 1 << 24
+BLOCK_ENTRIES = 256
+# Entries hold route index + 1 (0 = no route) or FLAG | overflow block number
+_BLOCK_FLAG = 0x80000000
+_INDEX_MASK = 0x7FFFFFFF
+# Unsigned 32-bit array typecode for this platform
+_U32 = 'I' if array('I').itemsize == 4 else 'L'
+
+
+def _fill(value: int, count: int) -> array:
+    """Array of ``count`` copies of ``value``"""
+    return array(_U32, [value]) * count
+
+
+def compile_snapshot(routes: Iterable[Union[str, Tuple[str, Any]]], path: str) -> int:
+    """Compile IPv4 routes into a DIR-24-8 snapshot file
+
+    ``routes`` takes the same network strings as ``IPCalculator.subnet_summary``
+    or (network, payload) pairs with JSON-serializable payloads. Returns the
+    number of distinct routes written.
+    """
+    index = {}
+    for route in routes:
+        network_str, payload = (route, None) if isinstance(route, str) else route
+        version, key, prefixlen = parse_network_int(network_str)
+        if version != 4:
+            raise ValueError(f"DIR-24-8 snapshots are IPv4 only: {network_str}")
+        index[(key, prefixlen)] = payload
+
+    # Shorter prefixes first so more specific routes overwrite them
+    ordered = sorted(index, key=lambda item: item[1])
+    tbl24 = _fill(0, TBL24_ENTRIES)
+    tbl8 = array(_U32)
+    metadata = []
+
+    for route_index, (key, prefixlen) in enumerate(ordered):
+        metadata.append([f"{format_ip_int(4, key)}/{prefixlen}", index[(key, prefixlen)]])
+        entry = route_index + 1
+        if prefixlen <= 24:
+            start = key >> 8
+            count = 1 << (24 - prefixlen)
+            tbl24[start:start + count] = _fill(entry, count)
+            continue
+
+        slot = key >> 8
+        current = tbl24[slot]
+        if current & _BLOCK_FLAG:
+            block = current & _INDEX_MASK
+        else:
+            block = len(tbl8) // BLOCK_ENTRIES
+            tbl8.extend(_fill(current, BLOCK_ENTRIES))
+            tbl24[slot] = _BLOCK_FLAG | block
+        start = block * BLOCK_ENTRIES + (key & 0xFF)
+        count = 1 << (32 - prefixlen)
+        tbl8[start:start + count] = _fill(entry, count)
+
+    meta_bytes = json.dumps(metadata, separators=(',', ':')).encode('utf-8')
+    header = _HEADER.pack(MAGIC, _BYTE_ORDER_MARK, len(ordered),
+                          len(tbl8) // BLOCK_ENTRIES, len(meta_bytes))
+    with open(path, 'wb') as f:
+        f.write(header.ljust(_HEADER_SIZE, b'\x00'))
+        tbl24.tofile(f)
+        tbl8.tofile(f)
+        f.write(meta_bytes)
+    return len(ordered)
+
+
+def open_snapshot(path: str) -> 'RouteSnapshot':
+    """Open a compiled snapshot for lookups"""
+    return RouteSnapshot(path)
+
+
+class RouteSnapshot:
+    """Read-only DIR-24-8 table backed by a shared memory map
+
+    Every lookup costs one read from the 2^24-entry first-level table and,
+    for prefixes longer than /24, one more from an overflow block.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Empty or unreadable snapshot: {path}")
+
+        magic, mark, route_count, block_count, meta_length = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not a DIR-24-8 snapshot: {path}")
+        if mark != _BYTE_ORDER_MARK:
+            self.close()
+            raise ValueError("Snapshot was compiled on a machine with a different byte order")
+
+        tbl24_end = _HEADER_SIZE + 4 * TBL24_ENTRIES
+        tbl8_end = tbl24_end + 4 * BLOCK_ENTRIES * block_count
+        view = memoryview(self._map)
+        self._tbl24 = view[_HEADER_SIZE:tbl24_end].cast(_U32)
+        self._tbl8 = view[tbl24_end:tbl8_end].cast(_U32)
+        view.release()
+
+        metadata = json.loads(self._map[tbl8_end:tbl8_end + meta_length].decode('utf-8'))
+        if len(metadata) != route_count:
+            self.close()
+            raise ValueError(f"Corrupt snapshot metadata: {path}")
+        self.routes = [prefix for prefix, _ in metadata]
+        self.payloads = [payload for _, payload in metadata]
+        self.block_count = block_count
+
+    def __len__(self) -> int:
+        return len(self.routes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Release the memory map and file handle"""
+        for name in ('_tbl24', '_tbl8'):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+                setattr(self, name, None)
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def lookup_index_int(self, value: int) -> int:
+        """Route index for an integer IPv4 address, or -1 when unrouted"""
+        entry = self._tbl24[value >> 8]
+        if entry & _BLOCK_FLAG:
+            entry = self._tbl8[((entry & _INDEX_MASK) << 8) | (value & 0xFF)]
+        return entry - 1
+
+    def lookup_prefix(self, ip_str: str) -> Optional[Tuple[str, Any]]:
+        """Return (matching prefix, payload) for an IPv4 address, or None"""
+        version, value = parse_ip_int(ip_str)
+        if version != 4:
+            raise ValueError(f"DIR-24-8 snapshots are IPv4 only: {ip_str}")
+        route_index = self.lookup_index_int(value)
+        if route_index < 0:
+            return None
+        return self.routes[route_index], self.payloads[route_index]
+
+    def lookup(self, ip_str: str, default: Any = None) -> Any:
+        """Return the payload of the most specific route containing ``ip_str``"""
+        match = self.lookup_prefix(ip_str)
+        return default if match is None else match[1]
+
+    def lookup_many(self, packed: Union[bytes, bytearray, memoryview]) -> array:
+        """Look up a buffer of packed big-endian IPv4 addresses
+
+        Returns an ``array('l')`` of route indices into ``routes`` with -1
+        for unrouted addresses.
+        """
+        if len(packed) % 4:
+            raise ValueError("Packed buffer length must be a multiple of 4")
+        addresses = array(_U32)
+        addresses.frombytes(packed)
+        if sys.byteorder == 'little':
+            addresses.byteswap()
+
+        tbl24, tbl8 = self._tbl24, self._tbl8
+        result = array('l', [0]) * len(addresses)
+        for i, value in enumerate(addresses):
+            entry = tbl24[value >> 8]
+            if entry & _BLOCK_FLAG:
+                entry = tbl8[((entry & _INDEX_MASK) << 8) | (value & 0xFF)]
+            result[i] = entry - 1
+        return result
+
+    def routes_for(self, indices: Iterable[int]) -> List[Optional[str]]:
+        """Map route indices (as returned by ``lookup_many``) to prefixes"""
+        routes = self.routes
+        return [routes[i] if i >= 0 else None for i in indices]
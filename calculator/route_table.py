@@ -0,0 +1,184 @@
+"""
+Route Table Module
+Longest-prefix-match index over IPv4 and IPv6 prefixes using a
+path-compressed binary (Patricia) trie
+"""
+
+from typing import Any, Iterable, Iterator, Optional, Tuple, Union
+
+from ip_calculator import MAX_BITS, parse_ip_int, parse_network_int, format_ip_int
+
+
+class _Node:
+    """Trie node covering ``key/prefixlen``; glue nodes carry no payload"""
+
+    __slots__ = ('key', 'prefixlen', 'payload', 'has_payload', 'children')
+
+    def __init__(self, key: int, prefixlen: int):
+        self.key = key
+        self.prefixlen = prefixlen
+        self.payload = None
+        self.has_payload = False
+        self.children = [None, None]
+
+
+class RouteTable:
+    """Dynamic longest-prefix-match table with attached payloads
+
+    Each address family has its own trie. Lookups walk at most one node per
+    prefix bit and work purely on integers, so no ``ipaddress`` objects are
+    created on the lookup path.
+    """
+
+    def __init__(self, routes: Iterable[Union[str, Tuple[str, Any]]] = ()):
+        self._roots = {4: _Node(0, 0), 6: _Node(0, 0)}
+        self._count = 0
+        for route in routes:
+            if isinstance(route, str):
+                self.insert(route)
+            else:
+                self.insert(*route)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, network_str: str) -> bool:
+        return self._find(*parse_network_int(network_str)) is not None
+
+    # Mutation
+    def insert(self, network_str: str, payload: Any = None):
+        """Insert a prefix (replacing the payload if it already exists)"""
+        version, key, prefixlen = parse_network_int(network_str)
+        max_bits = MAX_BITS[version]
+        node = self._roots[version]
+
+        while True:
+            if node.prefixlen == prefixlen:
+                if not node.has_payload:
+                    self._count += 1
+                node.payload = payload
+                node.has_payload = True
+                return
+
+            bit = (key >> (max_bits - 1 - node.prefixlen)) & 1
+            child = node.children[bit]
+            if child is None:
+                node.children[bit] = self._leaf(key, prefixlen, payload)
+                self._count += 1
+                return
+
+            # Length of the prefix shared by the new key and the child
+            common = max_bits - (key ^ child.key).bit_length()
+            common = min(common, prefixlen, child.prefixlen)
+            if common == child.prefixlen:
+                node = child
+                continue
+
+            if common == prefixlen:
+                # New prefix sits between node and child
+                new = self._leaf(key, prefixlen, payload)
+                new.children[(child.key >> (max_bits - 1 - prefixlen)) & 1] = child
+                node.children[bit] = new
+                self._count += 1
+                return
+
+            # Diverge below node: add a glue node at the common prefix
+            host_bits = max_bits - common
+            glue = _Node((key >> host_bits) << host_bits, common)
+            glue.children[(child.key >> (max_bits - 1 - common)) & 1] = child
+            glue.children[(key >> (max_bits - 1 - common)) & 1] = self._leaf(key, prefixlen, payload)
+            node.children[bit] = glue
+            self._count += 1
+            return
+
+    def delete(self, network_str: str):
+        """Remove a prefix; raises KeyError if it is not present"""
+        version, key, prefixlen = parse_network_int(network_str)
+        max_bits = MAX_BITS[version]
+        grandparent, parent, node = None, None, self._roots[version]
+        while node is not None and node.prefixlen < prefixlen:
+            grandparent, parent = parent, node
+            node = node.children[(key >> (max_bits - 1 - node.prefixlen)) & 1]
+
+        if node is None or node.prefixlen != prefixlen or node.key != key or not node.has_payload:
+            raise KeyError(network_str)
+
+        node.payload = None
+        node.has_payload = False
+        self._count -= 1
+        if parent is None:
+            return  # Roots stay in place as glue
+
+        left, right = node.children
+        if left is not None and right is not None:
+            return
+        remaining = left if left is not None else right
+        parent.children[parent.children.index(node)] = remaining
+
+        # A payload-less parent left with one child is redundant glue
+        if remaining is None and grandparent is not None and not parent.has_payload:
+            left, right = parent.children
+            grandparent.children[grandparent.children.index(parent)] = left if left is not None else right
+
+    @staticmethod
+    def _leaf(key: int, prefixlen: int, payload: Any) -> _Node:
+        node = _Node(key, prefixlen)
+        node.payload = payload
+        node.has_payload = True
+        return node
+
+    def _find(self, version: int, key: int, prefixlen: int) -> Optional[_Node]:
+        """Return the node storing exactly ``key/prefixlen``"""
+        max_bits = MAX_BITS[version]
+        node = self._roots[version]
+        while node is not None and node.prefixlen < prefixlen:
+            node = node.children[(key >> (max_bits - 1 - node.prefixlen)) & 1]
+        if node is not None and node.prefixlen == prefixlen and node.key == key and node.has_payload:
+            return node
+        return None
+
+    # Lookup
+    def lookup_int(self, value: int, version: int = 4) -> Optional[Tuple[int, int, Any]]:
+        """Longest match for an integer address as (network int, prefix length, payload)"""
+        max_bits = MAX_BITS[version]
+        node = self._roots[version]
+        best = None
+        while node is not None:
+            prefixlen = node.prefixlen
+            if prefixlen and (value ^ node.key) >> (max_bits - prefixlen):
+                break
+            if node.has_payload:
+                best = node
+            if prefixlen == max_bits:
+                break
+            node = node.children[(value >> (max_bits - 1 - prefixlen)) & 1]
+        if best is None:
+            return None
+        return best.key, best.prefixlen, best.payload
+
+    def lookup(self, ip_str: str, default: Any = None) -> Any:
+        """Return the payload of the most specific prefix containing ``ip_str``"""
+        version, value = parse_ip_int(ip_str)
+        match = self.lookup_int(value, version)
+        return default if match is None else match[2]
+
+    def lookup_prefix(self, ip_str: str) -> Optional[Tuple[str, Any]]:
+        """Return (matching prefix, payload) for ``ip_str``, or None"""
+        version, value = parse_ip_int(ip_str)
+        match = self.lookup_int(value, version)
+        if match is None:
+            return None
+        key, prefixlen, payload = match
+        return f"{format_ip_int(version, key)}/{prefixlen}", payload
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Iterate (prefix, payload) pairs, IPv4 first, in address order"""
+        for version in (4, 6):
+            stack = [self._roots[version]]
+            while stack:
+                node = stack.pop()
+                if node.has_payload:
+                    yield f"{format_ip_int(version, node.key)}/{node.prefixlen}", node.payload
+                for child in reversed(node.children):
+                    if child is not None:
+                        stack.append(child)
@@ -0,0 +1,1126 @@
+"""
+Test Suite for IP Calculator
+Tests for the IP calculation engine and its network data structures
+"""
+
+import unittest
+from unittest import mock
+import asyncio
+import io
+import ipaddress
+import itertools
+import math
+import random
+import socket
+import sys
+import os
+import tempfile
+from array import array
+from collections import Counter
+
+# Add the parent directory to the path to import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ip_calculator import (IPCalculator, NETMASK_PREFIXES, NETWORK_CLASS_BY_OCTET, PREFIX_TABLES,
+                           format_ip_int, netmask_to_prefix, parse_ip_int, parse_ipv4_int, parse_network_int)
+from route_table import RouteTable
+from route_snapshot import compile_snapshot, open_snapshot
+import ip_array
+from ip_array import IPArray
+from ip_summary import summarize_prefixes
+from ip_cache import ParseCache
+from ip_set import IPSet
+from ip_pool import AddressPool
+from ip_aggregate import aggregate_lossy
+from route_compress import compress_routes, forwarding_intervals
+from ip_registry import AddressRegistry
+from ip_convert import FORMATS, convert, convert_file
+from ipv6_bulk import (canonicalize, eui64_addresses, expand, from_ipv4_mapped, from_nat64,
+                       to_ipv4_mapped, to_nat64)
+from ip_sample import sample_addresses, sample_subnets
+from annotate_logs import LogAnnotator, annotate_file_parallel, format_report, shard_offsets
+from calculator_service import CalculatorService
+from calculator_client import AsyncCalculatorClient, CalculatorClient
+
+
+def _random_networks(rng, count, version=4):
+    """Generate random networks (strict=False masked strings) for tests"""
+    max_bits = 32 if version == 4 else 128
+    networks = []
+    for _ in range(count):
+        prefix = rng.randint(0, max_bits) if version == 4 else rng.randint(0, 64)
+        value = rng.getrandbits(max_bits)
+        networks.append(str(ipaddress.ip_network((value, prefix), strict=False)))
+    return networks
+
+
+class TestIntegerHelpers(unittest.TestCase):
+    """Test the object-free parsing helpers"""
+
+    def test_parse_ip_int(self):
+        self.assertEqual(parse_ip_int("192.168.1.1"), (4, int(ipaddress.ip_address("192.168.1.1"))))
+        self.assertEqual(parse_ip_int("2001:db8::1"), (6, int(ipaddress.ip_address("2001:db8::1"))))
+        with self.assertRaises(ValueError):
+            parse_ip_int("256.1.1.1")
+
+    def test_parse_network_int(self):
+        self.assertEqual(parse_network_int("192.168.1.77/24"), (4, 0xC0A80100, 24))
+        self.assertEqual(parse_network_int("10.0.0.0/255.0.0.0"), (4, 0x0A000000, 8))
+        self.assertEqual(parse_network_int("2001:db8::1"), (6, int(ipaddress.ip_address("2001:db8::1")), 128))
+        with self.assertRaises(ValueError):
+            parse_network_int("10.0.0.0/33")
+
+    def test_fallback_input(self):
+        self.assertEqual(parse_ip_int("fe80::1%eth0"), (6, int(ipaddress.ip_address("fe80::1"))))
+        self.assertEqual(parse_ip_int(3232235777), (4, 3232235777))
+        self.assertEqual(parse_ip_int(b"\xc0\xa8\x01\x01"), (4, 3232235777))
+        self.assertEqual(parse_network_int("fe80::1%1/64"), (6, int(ipaddress.ip_address("fe80::")), 64))
+        self.assertEqual(parse_network_int(("10.1.2.3", 8)), (4, 0x0A000000, 8))
+        self.assertEqual(parse_network_int(3232235777), (4, 3232235777, 32))
+        for bad in (None, 1.5, "fe80::1%"):
+            with self.assertRaises(ValueError):
+                parse_network_int(bad)
+        calc = IPCalculator()
+        self.assertEqual(calc.subnet_info("fe80::1%eth0/64")["network_address"], "fe80::")
+        self.assertEqual(calc.subnet_split("fe80::%1/64", 66)[1], "fe80::4000:0:0:0/66")
+        self.assertEqual(calc.next_network("fe80::%1/64"), "fe80:0:0:1::/64")
+        self.assertEqual(calc.analyze_ip_range("fe80::1%1", "fe80::ff%1")["total_addresses"], 255)
+        self.assertEqual(calc.subnet_info(("10.0.0.0", 8))["prefix_length"], 8)
+
+
+class TestRouteTable(unittest.TestCase):
+    """Test longest-prefix-match route table"""
+
+    def test_most_specific_match(self):
+        table = RouteTable([("0.0.0.0/0", "default"), ("10.0.0.0/8", "a"),
+                            ("10.1.0.0/16", "b"), ("10.1.2.0/24", "c")])
+        self.assertEqual(table.lookup("10.1.2.3"), "c")
+        self.assertEqual(table.lookup("10.1.3.3"), "b")
+        self.assertEqual(table.lookup("10.2.0.1"), "a")
+        self.assertEqual(table.lookup("11.0.0.1"), "default")
+        self.assertEqual(table.lookup_prefix("10.1.2.3"), ("10.1.2.0/24", "c"))
+        self.assertEqual(len(table), 4)
+
+    def test_ipv6_and_delete(self):
+        table = RouteTable()
+        table.insert("2001:db8::/32", "site")
+        table.insert("2001:db8:1::/48", "lab")
+        self.assertEqual(table.lookup("2001:db8:1::5"), "lab")
+        table.delete("2001:db8:1::/48")
+        self.assertEqual(table.lookup("2001:db8:1::5"), "site")
+        self.assertIsNone(table.lookup("192.0.2.1"))
+        with self.assertRaises(KeyError):
+            table.delete("2001:db8:1::/48")
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(7)
+        for version in (4, 6):
+            networks = _random_networks(rng, 300, version)
+            table = RouteTable((net, net) for net in networks)
+            for net in networks[::3]:
+                if net in table:
+                    table.delete(net)
+            remaining = [ipaddress.ip_network(net) for net, _ in table.items()]
+            self.assertEqual(len(remaining), len(table))
+
+            max_bits = 32 if version == 4 else 128
+            for _ in range(300):
+                addr = ipaddress.ip_address(rng.getrandbits(max_bits) if version == 6 or rng.random() < 0.5
+                                            else int(remaining[rng.randrange(len(remaining))].network_address))
+                expected = max((net for net in remaining if addr in net),
+                               key=lambda net: net.prefixlen, default=None)
+                self.assertEqual(table.lookup(str(addr)), str(expected) if expected else None)
+
+    def test_calculator_builds_table(self):
+        calc = IPCalculator()
+        table = calc.build_route_table(["192.168.0.0/16", "192.168.1.0/24"])
+        self.assertEqual(table.lookup_prefix("192.168.1.9")[0], "192.168.1.0/24")
+
+
+class TestRouteSnapshot(unittest.TestCase):
+    """Test compiled DIR-24-8 snapshots"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.dir248')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_matches_route_table(self):
+        rng = random.Random(11)
+        networks = _random_networks(rng, 400) + ["10.0.0.0/8", "10.1.2.0/24", "10.1.2.128/25", "10.1.2.130/32"]
+        self.assertEqual(compile_snapshot(networks, self.path), len(set(networks)))
+        table = RouteTable((net, net) for net in networks)
+
+        probes = ["10.1.2.130", "10.1.2.131", "10.1.2.5", "10.9.9.9"]
+        probes += [str(ipaddress.ip_address(rng.getrandbits(32))) for _ in range(500)]
+        with open_snapshot(self.path) as snapshot:
+            for ip in probes:
+                match = snapshot.lookup_prefix(ip)
+                self.assertEqual(match[0] if match else None, table.lookup(ip))
+
+            packed = b"".join(socket.inet_aton(ip) for ip in probes)
+            indices = snapshot.lookup_many(packed)
+            self.assertEqual(snapshot.routes_for(indices), [table.lookup(ip) for ip in probes])
+
+    def test_payloads_and_errors(self):
+        compile_snapshot([("192.168.0.0/16", "lan"), ("192.168.1.0/24", {"hop": "r1"})], self.path)
+        with open_snapshot(self.path) as snapshot:
+            self.assertEqual(snapshot.lookup("192.168.1.1"), {"hop": "r1"})
+            self.assertEqual(snapshot.lookup("192.168.2.1"), "lan")
+            self.assertIsNone(snapshot.lookup("8.8.8.8"))
+        with self.assertRaises(ValueError):
+            compile_snapshot(["2001:db8::/32"], self.path)
+
+
+class TestIPArray(unittest.TestCase):
+    """Test vectorized IPArray with NumPy (when installed) and the fallback"""
+
+    def setUp(self):
+        self._numpy = ip_array.np
+
+    def tearDown(self):
+        ip_array.np = self._numpy
+
+    def check_backend(self):
+        calc = IPCalculator()
+        v4 = ["10.1.2.3", "192.168.1.10", "10.1.2.3", "8.8.8.8", "224.0.0.1", "172.16.5.4"]
+        arr = IPArray(v4)
+        self.assertEqual(len(arr), 6)
+        self.assertEqual(list(arr.to_int()), [calc.ip_to_decimal(ip) for ip in v4])
+        self.assertEqual(list(arr.in_network("10.0.0.0/8")), [True, False, True, False, False, False])
+        self.assertEqual(arr.network_class(), ["A", "C", "A", "A", "D (Multicast)", "B"])
+        self.assertEqual(arr.mask(24).to_strings()[1], "192.168.1.0")
+        self.assertEqual(arr.unique().to_strings(), sorted(set(v4), key=lambda ip: calc.ip_to_decimal(ip)))
+        self.assertEqual(IPArray.from_packed(arr.to_packed()).to_strings(), v4)
+
+        v6 = ["2001:db8::2", "::1", "2001:db8:0:1::", "2001:db8::2"]
+        arr6 = IPArray(v6)
+        self.assertEqual(arr6.to_int(), [int(ipaddress.ip_address(ip)) for ip in v6])
+        self.assertEqual(list(arr6.in_network("2001:db8::/63")), [True, False, True, True])
+        arr6.sort()
+        self.assertEqual(arr6.to_strings(), ["::1", "2001:db8::2", "2001:db8::2", "2001:db8:0:1::"])
+        self.assertEqual(len(arr6.unique()), 3)
+        self.assertEqual(arr6.mask(32).to_strings()[1], "2001:db8::")
+
+        self.assertEqual(IPArray.validate(["1.2.3.4", "::1", "1.2.3", "bogus"]), [True, True, False, False])
+        odd = ["1.2.3.4\x00", "fe80::1%eth0", "fe80::1%", "\udc80", None]
+        self.assertEqual(IPArray.validate(odd), [calc.validate_ip(ip) for ip in odd[:4]] + [False])
+        self.assertEqual(IPArray.validate(odd)[:2], [False, True])
+        with self.assertRaises(ValueError):
+            IPArray(["1.2.3.4", "300.1.1.1"])
+
+    def test_default_backend(self):
+        self.check_backend()
+
+    def test_pure_python_fallback(self):
+        ip_array.np = None
+        self.check_backend()
+
+
+class TestSubnetSplit(unittest.TestCase):
+    """Test the lazy subnet_split sequence"""
+
+    def setUp(self):
+        self.calc = IPCalculator()
+
+    def test_matches_ipaddress(self):
+        subnets = self.calc.subnet_split("192.168.1.0/24", 26)
+        expected = [str(net) for net in ipaddress.ip_network("192.168.1.0/24").subnets(new_prefix=26)]
+        self.assertEqual(len(subnets), 4)
+        self.assertEqual(list(subnets), expected)
+        self.assertEqual(subnets, expected)
+        self.assertEqual(subnets[-1], "192.168.1.192/26")
+        self.assertEqual(subnets[1:3], expected[1:3])
+        self.assertIn("192.168.1.64/26", subnets)
+        self.assertIn("192.168.1.65/26", subnets)  # Host bits are masked, as in ip_network(strict=False)
+        self.assertNotIn("192.168.1.64/27", subnets)
+        self.assertNotIn("192.168.2.0/26", subnets)
+        self.assertEqual(subnets.index("192.168.1.128/26"), 2)
+
+    def test_ipv6_host_split_without_len(self):
+        subnets = self.calc.subnet_split("2001:db8::/64", 128)
+        self.assertTrue(subnets)
+        self.assertEqual(subnets.total, 2 ** 64)
+        self.assertEqual(next(reversed(subnets)), "2001:db8::ffff:ffff:ffff:ffff/128")
+        self.assertEqual(subnets.index("2001:0db8:0000:0000:0000:0000:0000:0005/128"), 5)
+        self.assertEqual(self.calc.subnet_split("192.168.1.0/24", 26).index("192.168.1.77/26"), 1)
+        self.assertNotIn("2001:db8:0:1::/128", subnets)
+        self.assertEqual(list(reversed(self.calc.subnet_split("10.0.0.0/24", 26)))[0], "10.0.0.192/26")
+
+    def test_huge_ipv6_split_is_lazy(self):
+        subnets = self.calc.subnet_split("2001:db8::/32", 64)
+        self.assertEqual(len(subnets), 2 ** 32)
+        self.assertEqual(subnets[0], "2001:db8::/64")
+        self.assertEqual(subnets[2 ** 32 - 1], "2001:db8:ffff:ffff::/64")
+        self.assertEqual(subnets.page(65536, 2), ["2001:db8:1::/64", "2001:db8:1:1::/64"])
+        self.assertEqual(self.calc.subnet_split("::/0", 128).total, 2 ** 128)
+        with self.assertRaises(IndexError):
+            subnets[2 ** 32]
+        with self.assertRaises(ValueError):
+            self.calc.subnet_split("10.0.0.0/24", 24)
+
+
+
+class TestNetworkStepping(unittest.TestCase):
+    """Test arithmetic next/previous network stepping"""
+
+    def setUp(self):
+        self.calc = IPCalculator()
+
+    def test_crosses_supernet_boundary(self):
+        self.assertEqual(self.calc.next_network("10.0.1.0/24"), "10.0.2.0/24")
+        self.assertEqual(self.calc.previous_network("10.0.2.0/24"), "10.0.1.0/24")
+        self.assertEqual(self.calc.next_network("10.0.0.0/24", step=256), "10.1.0.0/24")
+        self.assertEqual(self.calc.previous_network("2001:db8:1::/48", step=2), "2001:db7:ffff::/48")
+
+    def test_address_space_edges(self):
+        with self.assertRaises(ValueError):
+            self.calc.next_network("255.255.255.0/24")
+        with self.assertRaises(ValueError):
+            self.calc.previous_network("0.0.0.0/8")
+
+    def test_network_range(self):
+        self.assertEqual(list(self.calc.network_range("192.168.0.0/23", 3)),
+                         ["192.168.0.0/23", "192.168.2.0/23", "192.168.4.0/23"])
+        self.assertEqual(list(self.calc.network_range("10.0.0.0/24", 2, step=4)), ["10.0.0.0/24", "10.0.4.0/24"])
+        with self.assertRaises(ValueError):
+            self.calc.network_range("255.255.254.0/24", 3)
+
+
+
+class TestSubnetInfo(unittest.TestCase):
+    """Test closed-form subnet_info and the columnar subnet_info_many"""
+
+    def setUp(self):
+        self.calc = IPCalculator()
+
+    def test_ipv6_usable_range(self):
+        info = self.calc.subnet_info("2001:db8::/64")
+        self.assertEqual(info['first_usable'], "2001:db8::1")
+        self.assertEqual(info['last_usable'], "2001:db8::ffff:ffff:ffff:ffff")
+        self.assertEqual(info['total_addresses'], 2 ** 64)
+        for network in ("2001:db8::/120", "2001:db8::/127", "2001:db8::/128"):
+            hosts = list(ipaddress.ip_network(network).hosts())
+            info = self.calc.subnet_info(network)
+            self.assertEqual((info['first_usable'], info['last_usable']), (str(hosts[0]), str(hosts[-1])))
+
+    def test_flags_match_ipaddress(self):
+        rng = random.Random(5)
+        networks = ["10.0.0.0/8", "224.0.0.0/4", "240.0.0.0/4", "::/127", "::/7", "ff02::/16", "fc00::/7"]
+        networks += _random_networks(rng, 300, 4) + _random_networks(rng, 300, 6)
+        for network in networks:
+            expected = ipaddress.ip_network(network)
+            info = self.calc.subnet_info(network)
+            self.assertEqual((info['is_private'], info['is_multicast'], info['is_reserved']),
+                             (expected.is_private, expected.is_multicast, expected.is_reserved), network)
+
+    def test_columnar_matches_per_network(self):
+        networks = ["192.168.1.0/24", "10.0.0.1/31", "2001:db8::/48", "172.16.0.0/12"]
+        columns = self.calc.subnet_info_many(networks)
+        for i, network in enumerate(networks):
+            info = self.calc.subnet_info(network)
+            self.assertEqual({key: values[i] for key, values in columns.items()}, info)
+        with self.assertRaises(ValueError):
+            self.calc.subnet_info_many(["10.0.0.0/8", "nonsense"])
+
+
+
+class TestRangeCover(unittest.TestCase):
+    """Test exact CIDR cover of address ranges"""
+
+    def setUp(self):
+        self.calc = IPCalculator()
+
+    def test_matches_summarize_address_range(self):
+        rng = random.Random(9)
+        for version, bits in ((4, 32), (6, 128)):
+            for _ in range(200):
+                start, end = sorted(rng.getrandbits(bits) for _ in range(2))
+                if start == end:
+                    continue
+                if version == 4:
+                    first, last = ipaddress.IPv4Address(start), ipaddress.IPv4Address(end)
+                else:
+                    first, last = ipaddress.IPv6Address(start), ipaddress.IPv6Address(end)
+                expected = [str(net) for net in ipaddress.summarize_address_range(first, last)]
+                result = self.calc.analyze_ip_range(str(first), str(last))
+                self.assertEqual(result['cidr_blocks'], expected)
+                self.assertEqual(list(self.calc.iter_range_cidrs(str(first), str(last))), expected)
+
+    def test_suggested_network(self):
+        result = self.calc.analyze_ip_range("192.168.1.0", "192.168.1.255")
+        self.assertEqual(result['suggested_network'], "192.168.1.0/24")
+        result = self.calc.analyze_ip_range("10.0.0.1", "10.0.0.6")
+        self.assertEqual(result['cidr_blocks'], ["10.0.0.1/32", "10.0.0.2/31", "10.0.0.4/31", "10.0.0.6/32"])
+        self.assertEqual(result['suggested_network'], "10.0.0.0/29")
+
+    def test_ranges_to_cidrs(self):
+        lines = io.StringIO("# ranges\n10.0.0.0-10.0.0.255\n\n192.168.0.1, 192.168.0.2\n2001:db8:: 2001:db8::1\n")
+        self.assertEqual(list(self.calc.ranges_to_cidrs(lines)),
+                         ["10.0.0.0/24", "192.168.0.1/32", "192.168.0.2/32", "2001:db8::/127"])
+        with self.assertRaises(ValueError):
+            list(self.calc.ranges_to_cidrs(io.StringIO("10.0.0.0\n")))
+
+
+
+class TestSummaryStream(unittest.TestCase):
+    """Test out-of-core streaming summarization"""
+
+    def test_matches_collapse_addresses(self):
+        rng = random.Random(13)
+        calc = IPCalculator()
+        v4 = _random_networks(rng, 400, 4) + ["10.0.0.0/25", "10.0.0.128/25", "10.0.1.0/24"]
+        v6 = _random_networks(rng, 200, 6)
+        expected = [str(net) for net in ipaddress.collapse_addresses(ipaddress.ip_network(n) for n in v4)]
+        expected += [str(net) for net in ipaddress.collapse_addresses(ipaddress.ip_network(n) for n in v6)]
+        mixed = v4 + v6
+        rng.shuffle(mixed)
+        # A tiny run size forces spilling to many temporary runs
+        self.assertEqual(list(calc.subnet_summary_stream(mixed, run_size=37)), expected)
+        self.assertEqual(list(summarize_prefixes(iter(mixed))), expected)
+
+    def test_reads_files(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as handle:
+            handle.write("# prefixes\n192.168.0.0/24\n192.168.1.0/24\n\n192.168.2.7/24\n")
+        try:
+            self.assertEqual(list(summarize_prefixes(handle.name)), ["192.168.0.0/23", "192.168.2.0/24"])
+        finally:
+            os.remove(handle.name)
+        with self.assertRaises(ValueError):
+            list(summarize_prefixes(["10.0.0.0/8", "garbage"]))
+
+
+
+class TestParseCache(unittest.TestCase):
+    """Test the bounded parse cache"""
+
+    def test_lru_eviction_and_stats(self):
+        cache = ParseCache(maxsize=2)
+        cache.ip_address("10.0.0.1")
+        cache.ip_address("10.0.0.2")
+        cache.ip_address("10.0.0.1")  # refreshes 10.0.0.1
+        cache.ip_address("10.0.0.3")  # evicts 10.0.0.2
+        cache.ip_address("10.0.0.1")
+        info = cache.cache_info()
+        self.assertEqual((info.hits, info.misses, info.evictions, info.currsize), (2, 3, 1, 2))
+        cache.clear()
+        self.assertEqual(cache.cache_info().currsize, 0)
+        with self.assertRaises(ValueError):
+            ParseCache(policy="random")
+
+    def test_fifo_policy(self):
+        cache = ParseCache(maxsize=2, policy="fifo")
+        for ip in ("10.0.0.1", "10.0.0.2", "10.0.0.1", "10.0.0.3", "10.0.0.1"):
+            cache.ip_address(ip)
+        self.assertEqual(cache.cache_info().hits, 1)
+
+    def test_calculator_uses_cache(self):
+        calc = IPCalculator(cache=ParseCache(maxsize=16))
+        for _ in range(3):
+            self.assertTrue(calc.ip_in_subnet("10.1.1.1", "10.0.0.0/8"))
+            info = calc.subnet_info("192.168.0.0/16")
+        info['netmask'] = "mutated"
+        self.assertEqual(calc.subnet_info("192.168.0.0/16")['netmask'], "255.255.0.0")
+        self.assertEqual(calc.cache_info().misses, 3)
+        self.assertFalse(calc.validate_ip("10.1.1.300"))
+        self.assertIsNone(IPCalculator().cache_info())
+
+
+
+class TestIPSet(unittest.TestCase):
+    """Test interval-based IPSet algebra"""
+
+    @staticmethod
+    def _addresses(networks):
+        return {addr for net in networks for addr in ipaddress.ip_network(net)}
+
+    def test_operations_match_python_sets(self):
+        rng = random.Random(21)
+        for _ in range(20):
+            a_nets = [str(ipaddress.ip_network((0x0A000000 | rng.getrandbits(10), rng.randint(24, 32)), strict=False))
+                      for _ in range(8)]
+            b_nets = [str(ipaddress.ip_network((0x0A000000 | rng.getrandbits(10), rng.randint(24, 32)), strict=False))
+                      for _ in range(8)]
+            a, b = IPSet(a_nets), IPSet(b_nets)
+            sa, sb = self._addresses(a_nets), self._addresses(b_nets)
+            for result, expected in ((a | b, sa | sb), (a & b, sa & sb), (a - b, sa - sb), (a ^ b, sa ^ sb)):
+                self.assertEqual(self._addresses(result.to_cidrs()), expected)
+                self.assertEqual(len(result), len(expected))
+            self.assertEqual((a | b).to_cidrs(),
+                             [str(n) for n in ipaddress.collapse_addresses(ipaddress.ip_network(x) for x in a_nets + b_nets)])
+
+    def test_containment_and_mixed_families(self):
+        allowed = IPSet(["10.0.0.0/8", "2001:db8::/32"])
+        blocked = IPSet(["10.1.0.0/16", "2001:db8:1::/48"])
+        usable = allowed - blocked
+        self.assertIn("10.2.3.4", usable)
+        self.assertNotIn("10.1.3.4", usable)
+        self.assertIn("10.128.0.0/9", usable)
+        self.assertNotIn("10.0.0.0/8", usable)
+        self.assertIn("2001:db8:2::/48", usable)
+        self.assertEqual(usable.num_addresses, 2 ** 24 - 2 ** 16 + 2 ** 96 - 2 ** 80)
+        self.assertTrue(blocked <= allowed)
+        self.assertEqual(IPSet.from_ranges([("10.0.0.0", "10.0.0.255")]), IPSet(["10.0.0.0/24"]))
+        self.assertFalse(IPSet())
+
+    def test_other_types_are_rejected(self):
+        nets = IPSet(["10.0.0.0/8"])
+        for method in (nets.isdisjoint, nets.issubset, nets.issuperset, nets.union, nets.difference):
+            with self.assertRaises(TypeError):
+                method(["10.0.0.0/8"])
+        with self.assertRaises(TypeError):
+            nets <= {"10.0.0.0/8"}
+        with self.assertRaises(TypeError):
+            nets | ["10.0.0.0/8"]
+        self.assertEqual(nets.__ge__(["10.0.0.0/8"]), NotImplemented)
+        self.assertNotEqual(nets, ["10.0.0.0/8"])
+
+
+
+class TestLogAnnotator(unittest.TestCase):
+    """Test streaming log annotation"""
+
+    def test_annotates_file(self):
+        with tempfile.NamedTemporaryFile('wb', suffix='.log', delete=False) as handle:
+            handle.write(b"client=10.1.2.3:443 -> 8.8.8.8\n"
+                         b"[2001:db8::1]:80 version 1.2.3 bad 999.1.1.1\n"
+                         b"224.0.0.5,no newline")
+        output = io.BytesIO()
+        try:
+            annotator = LogAnnotator(["10.0.0.0/8", "10.1.0.0/16", "2001:db8::/32"])
+            report = annotator.annotate_file(handle.name, output)
+        finally:
+            os.remove(handle.name)
+        self.assertEqual(output.getvalue().splitlines(), [
+            b"client=10.1.2.3:443 -> 8.8.8.8\t10.1.2.3=10.1.0.0/16,private;8.8.8.8=-",
+            b"[2001:db8::1]:80 version 1.2.3 bad 999.1.1.1\t2001:db8::1=2001:db8::/32,private",
+            b"224.0.0.5,no newline\t224.0.0.5=-,multicast",
+        ])
+        self.assertEqual((report['lines'], report['addresses'], report['matched']), (3, 4, 2))
+        self.assertIn('peak_rss_bytes', report)
+        self.assertIn("Lines: 3", format_report(report))
+
+    def test_parallel_matches_serial(self):
+        lines = [f"host {i % 256}.{i % 7}.0.{i % 250} port {i}" for i in range(2000)]
+        with tempfile.NamedTemporaryFile('wb', suffix='.log', delete=False) as handle:
+            handle.write("\n".join(lines).encode('ascii'))
+        networks = ["10.0.0.0/8", "10.3.0.0/16", "192.0.0.0/2"]
+        serial, parallel = io.BytesIO(), io.BytesIO()
+        try:
+            self.assertTrue(all(end - start >= 1 for start, end in shard_offsets(handle.name, 4096)))
+            LogAnnotator(networks).annotate_file(handle.name, serial)
+            report = annotate_file_parallel(handle.name, parallel, networks, workers=2,
+                                            chunk_size=4096, max_pending=3)
+        finally:
+            os.remove(handle.name)
+        self.assertEqual(parallel.getvalue(), serial.getvalue())
+        self.assertEqual(report['lines'], 2000)
+
+
+class TestCalculatorService(unittest.TestCase):
+    """Test the asyncio JSON-lines service and its clients on localhost"""
+
+    def test_batched_requests_and_errors(self):
+        async def scenario():
+            async with CalculatorService(port=0, workers=1) as service:
+                host, port = service.addresses[0][:2]
+                async with await AsyncCalculatorClient.connect(host, port) as client:
+                    infos = await asyncio.gather(*(client.ip.subnet_info(f"10.{i}.0.0/16") for i in range(200)))
+                    roots = await asyncio.gather(*(client.sci.sqrt(i * i) for i in range(100)))
+                    with self.assertRaises(ValueError):
+                        await client.ip.subnet_info("10.0.0.0/33")
+                    with self.assertRaises(ValueError):
+                        await client.call('ip', 'no_such_method')
+                    for engine, method in (('sci', 'set_angle_mode'), ('sci', 'memory_store'),
+                                           ('ip', 'clear_history'), ('ip', 'history_disabled')):
+                        with self.assertRaises(ValueError):
+                            await client.call(engine, method, 'degrees')
+                    page = await client.ip.subnet_split("10.0.0.0/8", 24, offset=256, limit=2)
+                    factorial = await client.sci.factorial(2500)
+                    stats = await client.call('service', 'stats')
+            return infos, roots, page, factorial, stats
+
+        infos, roots, page, factorial, stats = asyncio.run(scenario())
+        self.assertEqual(infos[7], IPCalculator().subnet_info("10.7.0.0/16"))
+        self.assertEqual(roots, [float(i) for i in range(100)])
+        self.assertEqual(page, ["10.1.0.0/24", "10.1.1.0/24"])
+        self.assertEqual(factorial, math.factorial(2500))
+        self.assertLess(stats['batches'], stats['batched'])
+        self.assertEqual(stats['offloaded'], 1)
+
+    def test_deep_pages_and_offloaded_methods(self):
+        async def scenario():
+            async with CalculatorService(port=0, workers=1) as service:
+                host, port = service.addresses[0][:2]
+                async with await AsyncCalculatorClient.connect(host, port) as client:
+                    deep = await client.call('ip', 'subnet_split', "10.0.0.0/8", 32,
+                                             offset=15000000, limit=3, timeout=2)
+                    ipv6 = await client.ip.subnet_split("2001:db8::/32", 128, offset=1 << 90, limit=1)
+                    sample = await client.ip.sample_addresses("10.0.0.0/24", 5, seed=1)
+                    columns = await client.ip.subnet_info_many(["10.0.0.0/24", "10.1.0.0/16"])
+                    with self.assertRaises(ValueError):
+                        await client.ip.subnet_split("10.0.0.0/8", 24, offset=-1, limit=2)
+                    stats = await client.call('service', 'stats')
+            return deep, ipv6, sample, columns, stats
+
+        deep, ipv6, sample, columns, stats = asyncio.run(scenario())
+        self.assertEqual(deep, ["10.228.225.192/32", "10.228.225.193/32", "10.228.225.194/32"])
+        self.assertEqual(ipv6, [str(ipaddress.ip_address("2001:db8::") + (1 << 90)) + "/128"])
+        self.assertEqual(sample, list(sample_addresses("10.0.0.0/24", 5, seed=1)))
+        self.assertEqual(columns['prefix_length'], [24, 16])
+        self.assertEqual(stats['offloaded'], 2)
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "Unix sockets not available")
+    def test_blocking_client_over_unix_socket(self):
+        path = os.path.join(tempfile.mkdtemp(), 'calculator.sock')
+
+        def calls():
+            with CalculatorClient(path=path) as client:
+                return (client.ip.ip_to_decimal("1.2.3.4"),
+                        client.sci.divide(1, 4),
+                        client.ip.network_range("10.0.0.0/24", 2))
+
+        async def scenario():
+            async with CalculatorService(port=None, path=path):
+                return await asyncio.get_running_loop().run_in_executor(None, calls)
+
+        try:
+            self.assertEqual(asyncio.run(scenario()), (16909060, 0.25, ["10.0.0.0/24", "10.0.1.0/24"]))
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+            os.rmdir(os.path.dirname(path))
+
+
+class TestHistory(unittest.TestCase):
+    """Test ring-buffered, lazily formatted history"""
+
+    def test_formats_and_capacity(self):
+        calc = IPCalculator()
+        calc.ip_to_decimal("10.0.0.1")
+        calc.subnet_info("192.168.1.77/24")
+        calc.ip_in_subnet("10.0.0.1", "10.0.0.0/8")
+        calc.add_to_history("Custom", "value")
+        self.assertEqual(calc.get_history(), [
+            "IP 10.0.0.1 to decimal = 167772161",
+            "Subnet info for 192.168.1.77/24 = Network: 192.168.1.0/24",
+            "Is 10.0.0.1 in 10.0.0.0/8? = True",
+            "Custom = value",
+        ])
+        for i in range(60):
+            calc.ip_to_decimal(f"10.0.0.{i}")
+        history = calc.get_history()
+        self.assertEqual(len(history), IPCalculator.HISTORY_SIZE)
+        self.assertEqual(history[-1], "IP 10.0.0.59 to decimal = 167772219")
+        calc.clear_history()
+        self.assertEqual(calc.history, [])
+
+    def test_recording_can_be_disabled(self):
+        calc = IPCalculator(record_history=False)
+        calc.subnet_info("10.0.0.0/8")
+        self.assertEqual(calc.get_history(), [])
+        calc.record_history = True
+        with calc.history_disabled():
+            calc.subnet_info("10.0.0.0/8")
+        calc.wildcard_mask("255.255.255.0")
+        self.assertEqual(calc.get_history(), ["Wildcard mask for 255.255.255.0 = 0.0.0.255"])
+
+
+class TestAddressPool(unittest.TestCase):
+    """Test the buddy allocator and its persistence"""
+
+    def test_allocate_free_and_coalesce(self):
+        pool = AddressPool("10.0.0.0/24")
+        self.assertEqual(pool.allocate(26), "10.0.0.0/26")
+        self.assertEqual(pool.allocate("/28"), "10.0.0.64/28")
+        self.assertEqual(pool.reserve("10.0.0.192/26"), "10.0.0.192/26")
+        self.assertEqual(pool.free_blocks(), ["10.0.0.80/28", "10.0.0.96/27", "10.0.0.128/26"])
+        self.assertEqual(pool.available(28), 7)
+        with self.assertRaises(ValueError):
+            pool.reserve("10.0.0.200/29")
+        with self.assertRaises(ValueError):
+            pool.allocate(25)
+        pool.free("10.0.0.64/28")
+        pool.free("10.0.0.0/26")
+        self.assertEqual(pool.free_blocks(), ["10.0.0.0/25", "10.0.0.128/26"])
+        with self.assertRaises(ValueError):
+            pool.free("10.0.0.0/26")
+        with self.assertRaises(ValueError):
+            pool.allocate(23)
+
+    def test_random_operations_match_address_sets(self):
+        rng = random.Random(15)
+        pool = AddressPool("2001:db8::/48")
+        live = []
+        for _ in range(1500):
+            if live and rng.random() < 0.4:
+                pool.free(live.pop(rng.randrange(len(live))))
+            else:
+                live.append(pool.allocate(rng.randint(56, 64)))
+        allocated, free = IPSet(live), IPSet(pool.free_blocks())
+        self.assertTrue(allocated.isdisjoint(free))
+        self.assertEqual(allocated | free, IPSet(["2001:db8::/48"]))
+        self.assertEqual(sorted(pool.allocations()), sorted(live))
+
+    def test_snapshot_and_journal_survive_restart(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'pool.bin')
+        try:
+            with AddressPool("192.168.0.0/16", path=path, journal_limit=10) as pool:
+                blocks = [pool.allocate(24) for _ in range(25)]
+                for block in blocks[::3]:
+                    pool.free(block)
+                expected = (pool.allocations(), pool.free_blocks())
+            # A torn trailing journal record is ignored
+            with open(path + '.journal', 'ab') as journal:
+                journal.write(b'A\x00')
+            with AddressPool("192.168.0.0/16", path=path) as pool:
+                self.assertEqual((pool.allocations(), pool.free_blocks()), expected)
+                pool.compact()
+            with AddressPool("192.168.0.0/16", path=path) as pool:
+                self.assertEqual((pool.allocations(), pool.free_blocks()), expected)
+            with self.assertRaises(ValueError):
+                AddressPool("10.0.0.0/8", path=path)
+        finally:
+            for name in os.listdir(directory):
+                os.remove(os.path.join(directory, name))
+            os.rmdir(directory)
+
+
+class TestFindOverlaps(unittest.TestCase):
+    """Test sweep-line overlap detection"""
+
+    def test_reports_containment_and_duplicates(self):
+        calc = IPCalculator()
+        pairs = list(calc.find_overlaps(["10.1.0.0/16", "10.0.0.0/8", "192.168.0.0/24",
+                                         "10.1.2.3/16", "2001:db8::/32", "2001:db8:1::/48", "10.2.0.0/16"]))
+        self.assertEqual(pairs, [
+            ("10.0.0.0/8", "10.1.0.0/16", 'contains'),
+            ("10.0.0.0/8", "10.1.2.3/16", 'contains'),
+            ("10.1.0.0/16", "10.1.2.3/16", 'equal'),
+            ("10.0.0.0/8", "10.2.0.0/16", 'contains'),
+            ("2001:db8::/32", "2001:db8:1::/48", 'contains'),
+        ])
+        self.assertEqual(calc.get_history()[-1], "Find overlaps in 7 networks = 5 overlapping pairs")
+        with self.assertRaises(ValueError):
+            calc.find_overlaps(["10.0.0.0/8", "not-a-network"])
+
+    def test_matches_pairwise_check(self):
+        rng = random.Random(16)
+        networks = [f"10.{rng.randrange(4)}.{rng.randrange(4)}.0/{rng.choice([14, 16, 22, 24])}" for _ in range(300)]
+        objects = [ipaddress.ip_network(network, strict=False) for network in networks]
+        expected = sorted(
+            (networks[i], networks[j], 'equal' if objects[i] == objects[j] else 'contains')
+            for i in range(len(objects)) for j in range(len(objects))
+            if i != j and objects[j].subnet_of(objects[i]) and (objects[i] != objects[j] or i < j))
+        self.assertEqual(sorted(IPCalculator().find_overlaps(networks)), expected)
+
+
+class TestPrefixDiff(unittest.TestCase):
+    """Test merge-walk prefix table diffs"""
+
+    def test_diff_categories(self):
+        old = [("10.0.0.0/24", "a"), "10.0.1.0/25", "10.0.1.128/25", ("10.1.0.0/16", "hop1"),
+               "192.168.0.0/16", "2001:db8::/32", ("172.16.0.5/12", "hop2")]
+        new = ["10.0.0.0/25", "10.0.0.128/25", "10.0.1.0/24", ("10.1.0.0/16", "hop9"),
+               "2001:0db8:0000::/32", ("172.16.0.0/12", "hop2"), "8.8.8.0/24"]
+        calc = IPCalculator()
+        diff = calc.diff_prefix_sets(old, new)
+        self.assertEqual(diff['added'], [("8.8.8.0/24", None)])
+        self.assertEqual(diff['removed'], [("192.168.0.0/16", None)])
+        self.assertEqual(diff['changed'], [("10.1.0.0/16", "hop1", "hop9")])
+        self.assertEqual(diff['aggregated'], [("10.0.1.0/24", ["10.0.1.0/25", "10.0.1.128/25"])])
+        self.assertEqual(diff['deaggregated'], [("10.0.0.0/24", ["10.0.0.0/25", "10.0.0.128/25"])])
+        self.assertEqual(diff['unchanged'], 2)
+        self.assertEqual(calc.get_history()[-1], "Diff 7 old and 7 new prefixes = 1 added, 1 removed, 1 changed")
+
+    def test_partial_cover_is_not_aggregation(self):
+        diff = IPCalculator().diff_prefix_sets(["10.0.0.0/26", "10.0.0.128/25"], ["10.0.0.0/24"])
+        self.assertEqual(diff['aggregated'], [])
+        self.assertEqual(diff['added'], [("10.0.0.0/24", None)])
+        self.assertEqual(len(diff['removed']), 2)
+        with self.assertRaises(ValueError):
+            IPCalculator().diff_prefix_sets(["10.0.0.0/33"], [])
+
+
+class TestLossyAggregation(unittest.TestCase):
+    """Test heap-driven lossy aggregation"""
+
+    NETWORKS = ["10.0.0.0/25", "10.0.0.128/26", "10.0.1.0/24", "192.168.1.0/24", "192.168.3.0/24"]
+
+    def test_entry_limit(self):
+        calc = IPCalculator()
+        result = calc.subnet_summary_lossy(self.NETWORKS, max_entries=2)
+        self.assertEqual(result['networks'], ["10.0.0.0/23", "192.168.0.0/22"])
+        self.assertEqual(result['original_entries'], 5)
+        self.assertEqual(result['over_covered'].to_cidrs(), ["10.0.0.192/26", "192.168.0.0/24", "192.168.2.0/24"])
+        self.assertEqual(result['overshoot'], 64 + 512)
+        self.assertEqual(calc.get_history()[-1], "Lossy summary of 5 networks = 2 entries, 576 extra addresses")
+
+    def test_overshoot_budget(self):
+        result = aggregate_lossy(self.NETWORKS, max_overshoot=100)
+        self.assertEqual(result['networks'], ["10.0.0.0/23", "192.168.1.0/24", "192.168.3.0/24"])
+        self.assertEqual(result['over_covered'].to_cidrs(), ["10.0.0.192/26"])
+        with self.assertRaises(ValueError):
+            aggregate_lossy(self.NETWORKS, max_entries=1, max_overshoot=100)
+        with self.assertRaises(ValueError):
+            aggregate_lossy(self.NETWORKS)
+        with self.assertRaisesRegex(ValueError, "at least 2 are needed"):
+            aggregate_lossy(["10.0.0.0/24", "10.0.2.0/24", "2001:db8::/48"], max_entries=1)
+
+    def test_random_inputs_stay_consistent(self):
+        rng = random.Random(18)
+        networks = [f"10.{rng.randrange(8)}.{rng.randrange(256)}.0/{rng.randint(22, 28)}" for _ in range(500)]
+        exact = IPSet(networks)
+        result = aggregate_lossy(networks, max_entries=20)
+        covered = IPSet(result['networks'])
+        self.assertLessEqual(result['entries'], 20)
+        self.assertTrue(exact.issubset(covered))
+        self.assertEqual(covered - exact, result['over_covered'])
+        self.assertEqual(result['over_covered'].num_addresses, result['overshoot'])
+
+
+class TestRouteCompression(unittest.TestCase):
+    """Test ORTC route table minimization"""
+
+    def test_minimal_equivalent_table(self):
+        calc = IPCalculator()
+        routes = [("10.0.0.0/8", "a"), ("10.0.0.0/9", "b"), ("10.128.0.0/9", "b"),
+                  ("10.1.0.0/16", "a"), ("0.0.0.0/0", None), ("2001:db8::/33", "x"), ("2001:db8:8000::/33", "x")]
+        result = calc.compress_routes(routes)
+        self.assertEqual(result['routes'], [("10.0.0.0/8", "b"), ("10.1.0.0/16", "a"), ("2001:db8::/32", "x")])
+        self.assertEqual(result['original_entries'], 7)
+        self.assertAlmostEqual(result['compression_ratio'], 3 / 7)
+        self.assertTrue(result['equivalent'])
+        self.assertEqual(calc.get_history()[-1], "Compress route table: 7 -> 3 routes")
+
+    def test_none_is_an_explicit_reject(self):
+        result = compress_routes([("0.0.0.0/1", "a"), ("128.0.0.0/1", "a"), ("10.0.0.0/8", None)])
+        self.assertEqual(result['routes'], [("0.0.0.0/0", "a"), ("10.0.0.0/8", None)])
+        self.assertEqual(forwarding_intervals(result['routes'])[4],
+                         [(0, 0x09FFFFFF, "a"), (0x0B000000, 0xFFFFFFFF, "a")])
+
+    def test_random_tables_forward_identically(self):
+        rng = random.Random(19)
+        for _ in range(50):
+            routes = []
+            for _ in range(rng.randint(1, 40)):
+                prefixlen = rng.randint(0, 12)
+                routes.append((f"{rng.randrange(256)}.{rng.randrange(256)}.0.0/{prefixlen}", rng.choice("ab")))
+            result = compress_routes(routes)
+            self.assertTrue(result['equivalent'])
+            self.assertLessEqual(result['entries'], result['original_entries'])
+            original, compressed = RouteTable(routes), RouteTable(result['routes'])
+            for _ in range(50):
+                ip = f"{rng.randrange(256)}.{rng.randrange(256)}.0.1"
+                self.assertEqual(original.lookup(ip), compressed.lookup(ip))
+
+
+class TestPrefixTables(unittest.TestCase):
+    """Test the precomputed per-prefix tables"""
+
+    def test_tables_match_ipaddress(self):
+        self.assertEqual((len(PREFIX_TABLES[4]), len(PREFIX_TABLES[6])), (33, 129))
+        for version, max_bits in ((4, 32), (6, 128)):
+            for prefixlen in range(max_bits + 1):
+                network = ipaddress.ip_network(f"{'0.0.0.0' if version == 4 else '::'}/{prefixlen}")
+                entry = PREFIX_TABLES[version][prefixlen]
+                self.assertEqual(entry['netmask'], str(network.netmask))
+                self.assertEqual(entry['wildcard'], str(network.hostmask))
+                self.assertEqual(entry['total_addresses'], network.num_addresses)
+                self.assertEqual(NETMASK_PREFIXES[version][entry['netmask']], prefixlen)
+                self.assertEqual(entry['subnets_in_parent'],
+                                 len(list(ipaddress.ip_network("0.0.0.0/0").subnets(new_prefix=prefixlen)))
+                                 if version == 4 and prefixlen <= 12 else 1 << prefixlen)
+
+    def test_netmask_to_prefix(self):
+        self.assertEqual(netmask_to_prefix("255.255.240.0"), (4, 20))
+        self.assertEqual(netmask_to_prefix("ffff:ffff:0000:0000:0000:0000:0000:0000"), (6, 32))
+        with self.assertRaises(ValueError):
+            netmask_to_prefix("255.0.255.0")
+        calc = IPCalculator()
+        self.assertEqual(calc.wildcard_mask("255.255.252.0"), "0.0.3.255")
+        with self.assertRaises(ValueError):
+            calc.wildcard_mask("255.0.255.0")
+        self.assertEqual(calc.calculate_hosts(30)['usable_hosts'], 2)
+        self.assertEqual(calc.calculate_hosts(64, version=6)['total_addresses'], 1 << 64)
+        self.assertEqual(calc.calculate_hosts(24)['subnets_in_parent'], PREFIX_TABLES[4][24]['subnets_in_parent'])
+        self.assertEqual(calc.calculate_hosts(0)['subnets_in_parent'], 1)
+        self.assertEqual(parse_network_int("10.1.2.3/255.255.255.0"), (4, 0x0A010200, 24))
+
+
+class TestIPv4FastPath(unittest.TestCase):
+    """Test the object-free IPv4 parsing path against ipaddress"""
+
+    CASES = ["192.168.1.1", "0.0.0.0", "255.255.255.255", "01.2.3.4", "1.2.3", "1.2.3.4.5", "256.1.1.1",
+             "1.2.3.4 ", "", "::1", "::ffff:1.2.3.4", "1.2.3.4\x00", b"\x01\x02\x03\x04", 3232235777]
+
+    def test_matches_ipaddress(self):
+        calc = IPCalculator()
+        for case in self.CASES:
+            try:
+                expected = int(ipaddress.ip_address(case))
+            except ValueError:
+                expected = None
+            self.assertEqual(calc.validate_ip(case), expected is not None, case)
+            if expected is None:
+                with self.assertRaises(ValueError):
+                    calc.ip_to_decimal(case)
+            else:
+                self.assertEqual(calc.ip_to_decimal(case), expected)
+                if isinstance(case, str) and '.' in case and ':' not in case:
+                    self.assertEqual(parse_ipv4_int(case), expected)
+
+    def test_invalid_ipv4_is_parsed_once(self):
+        calc = IPCalculator()
+
+        def no_retry(ip_str):
+            raise AssertionError(f"ipaddress retry for {ip_str!r}")
+
+        calc.parse_address = no_retry
+        self.assertFalse(calc.validate_ip("bogus"))
+        self.assertFalse(calc.validate_ip("256.1.1.1"))
+        with self.assertRaises(ValueError):
+            calc.ip_to_decimal("10.0.0")
+
+    def test_network_class_table(self):
+        calc = IPCalculator()
+        self.assertEqual(calc._get_network_class(ipaddress.IPv4Address("10.0.0.1")), "A")
+        self.assertEqual(calc._get_network_class(0xE0000001), "D (Multicast)")
+        self.assertEqual(NETWORK_CLASS_BY_OCTET[0], "Invalid")
+
+
+class TestAddressRegistry(unittest.TestCase):
+    """Test the compiled special-purpose address registry"""
+
+    def test_builtin_tags(self):
+        calc = IPCalculator()
+        self.assertEqual(calc.classify("10.1.2.3"), ('bogon', 'private-use'))
+        self.assertEqual(calc.classify("192.0.0.9"),
+                         ('bogon', 'ietf-protocol-assignments', 'port-control-protocol-anycast'))
+        self.assertEqual(calc.classify("2001:db8::/48"), ('bogon', 'documentation'))
+        self.assertEqual(calc.classify("8.8.8.8"), ())
+        # A network only gets the tags covering all of it
+        self.assertEqual(calc.classify("10.0.0.0/7"), ())
+        self.assertEqual(calc.get_history()[0], "Classify 10.1.2.3 = bogon, private-use")
+        with self.assertRaises(ValueError):
+            calc.classify("10.0.0.300")
+
+    def test_bulk_update_compiles_once(self):
+        registry = AddressRegistry(defaults=False)
+        self.assertEqual(registry.classify("10.0.0.1"), ())
+        with mock.patch.object(AddressRegistry, '_compile', autospec=True, side_effect=AddressRegistry._compile) as compile_:
+            registry.update((f"10.{i}.0.0/16", ("site", f"site-{i}")) for i in range(200))
+            registry.add("10.0.0.0/8", "corp")
+            self.assertEqual(registry.classify("10.7.1.1"), ('corp', 'site', 'site-7'))
+            self.assertEqual(registry.classify("10.250.0.1"), ('corp',))
+        self.assertEqual(compile_.call_count, 1)
+        self.assertEqual(len(registry), 201)
+
+    def test_instances_do_not_share_additions(self):
+        calc, other = IPCalculator(), IPCalculator()
+        calc.classify("8.8.8.8")
+        calc.registry.add("8.8.8.0/24", "public-dns")
+        self.assertEqual(calc.classify("8.8.8.8"), ('public-dns',))
+        self.assertEqual(other.classify("8.8.8.8"), ())
+        self.assertEqual(IPCalculator().classify("8.8.8.8"), ())
+
+    def test_user_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'internal.txt')
+            with open(path, 'w', encoding='utf-8') as handle:
+                handle.write("# internal ranges\n10.20.0.0/16\tcorp-dc,corp\n8.8.8.0/24 public-dns\n")
+            calc = IPCalculator()
+            registry = calc.load_registry(path)
+            self.assertEqual(calc.classify("10.20.1.1"), ('bogon', 'corp', 'corp-dc', 'private-use'))
+            self.assertEqual(calc.classify("8.8.8.8"), ('public-dns',))
+            self.assertEqual(AddressRegistry.from_file(path, defaults=False).classify("10.20.1.1"),
+                             ('corp', 'corp-dc'))
+            registry.add("8.8.9.0/24", "public-dns")
+            self.assertEqual(calc.classify("8.8.8.0/23"), ('public-dns',))
+
+
+class TestBulkConvert(unittest.TestCase):
+    """Test table-driven bulk address conversion"""
+
+    def test_round_trips_match_per_call_api(self):
+        calc = IPCalculator()
+        rng = random.Random(23)
+        for version, bits in ((4, 32), (6, 128)):
+            ints = [rng.getrandbits(bits) for _ in range(200)] + [0, (1 << bits) - 1]
+            dotted = [format_ip_int(version, value) for value in ints]
+            forms = {
+                'dotted': dotted,
+                'int': ints,
+                'binary': [calc.ip_to_binary(ip) for ip in dotted],
+                'hex': [format(value, f'0{bits // 4}x') for value in ints],
+                'packed': b''.join(value.to_bytes(bits // 8, 'big') for value in ints),
+            }
+            for source in FORMATS:
+                for target in FORMATS:
+                    result = convert(forms[source], source, target, version)
+                    self.assertEqual(list(result) if target == 'int' else result, forms[target],
+                                     (version, source, target))
+        self.assertEqual(calc.bulk_convert(array('I', [3232235777]), 'int', 'dotted'), ["192.168.1.1"])
+        self.assertEqual(calc.get_history()[-1], "Convert 1 IPv4 addresses from int to dotted")
+
+    def test_invalid_input(self):
+        for values, source in ((["1.2.3"], 'dotted'), ([1 << 32], 'int'), (["c0a8010g"], 'hex'),
+                               (["0101"], 'binary'), (b"\x01\x02\x03", 'packed')):
+            with self.assertRaises(ValueError):
+                convert(values, source, 'dotted')
+        with self.assertRaises(ValueError):
+            convert([], 'dotted', 'octal')
+
+    def test_convert_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'addresses.txt')
+            packed = os.path.join(tmp, 'addresses.bin')
+            binary = os.path.join(tmp, 'addresses.binary')
+            with open(source, 'w') as handle:
+                handle.write("10.0.0.1\n\n192.168.1.1\n255.255.255.255\n")
+            self.assertEqual(convert_file(source, packed, 'dotted', 'packed', chunk_size=2), 3)
+            with open(packed, 'rb') as handle:
+                self.assertEqual(handle.read(), bytes([10, 0, 0, 1, 192, 168, 1, 1, 255, 255, 255, 255]))
+            convert_file(packed, binary, 'packed', 'binary', chunk_size=2)
+            with open(binary) as handle:
+                self.assertEqual(handle.read().split(), [IPCalculator().ip_to_binary(ip)
+                                                         for ip in ("10.0.0.1", "192.168.1.1", "255.255.255.255")])
+            v6_packed = os.path.join(tmp, 'v6.bin')
+            v6_text = os.path.join(tmp, 'v6.txt')
+            with open(v6_packed, 'wb') as handle:
+                handle.write(ipaddress.ip_address("::ffff:1.2.3.4").packed + ipaddress.ip_address("2001:db8::1").packed)
+            self.assertEqual(convert_file(v6_packed, v6_text, 'packed', 'dotted', version=6, chunk_size=1), 2)
+            with open(v6_text, encoding='utf-8') as handle:
+                self.assertEqual(handle.read().split(), ["::ffff:102:304", "2001:db8::1"])
+            # A truncated packed file is rejected before anything is written
+            with open(packed, 'ab') as handle:
+                handle.write(b'\x01')
+            with self.assertRaises(ValueError):
+                convert_file(packed, os.path.join(tmp, 'never.txt'), 'packed', 'dotted', chunk_size=1)
+            self.assertFalse(os.path.exists(os.path.join(tmp, 'never.txt')))
+
+
+class TestIPv6Bulk(unittest.TestCase):
+    """Test streaming IPv6 normalization and translation"""
+
+    def test_canonical_and_expanded_forms(self):
+        calc = IPCalculator()
+        spellings = ["2001:0DB8:0000:0000:0000:0000:0000:0001", "[2001:db8::1]", "2001:db8:0:0::1",
+                     "2001:db8:0:1:1:1:1:1", "::FFFF:192.0.2.1", "fe80::0001%eth0"]
+        self.assertEqual(list(calc.normalize_ipv6(spellings)),
+                         ["2001:db8::1", "2001:db8::1", "2001:db8::1", "2001:db8:0:1:1:1:1:1",
+                          "::ffff:192.0.2.1", "fe80::1%eth0"])
+        self.assertEqual(next(calc.normalize_ipv6(["2001:db8::1"], form='expanded')),
+                         "2001:0db8:0000:0000:0000:0000:0000:0001")
+        self.assertEqual(list(canonicalize(["not-an-address", "::"], strict=False)), [None, "::"])
+        for bad in ("::1\x00", "fe80::1%", "[fe80::1%]"):
+            self.assertEqual(list(canonicalize([bad], strict=False)), [None])
+            self.assertEqual(list(expand([bad], strict=False)), [None])
+            with self.assertRaises(ValueError):
+                list(canonicalize([bad]))
+        self.assertEqual(list(canonicalize(["FE80::1%eth0"])), ["fe80::1%eth0"])
+        self.assertEqual(list(to_nat64(["1.2.3.4\x00"], strict=False)), [None])
+        with self.assertRaises(ValueError):
+            list(canonicalize(["1.2.3.4"]))
+        rng = random.Random(24)
+        for _ in range(500):
+            address = ipaddress.IPv6Address(rng.choice([0, 1, rng.getrandbits(16)]) << (16 * rng.randrange(8))
+                                            | rng.choice([0, rng.getrandbits(64)]))
+            if address.ipv4_mapped is None:
+                self.assertEqual(next(canonicalize([address.exploded.upper()])), str(address))
+
+    def test_eui64_and_translations(self):
+        self.assertEqual(list(eui64_addresses(["00:1A:2B:3C:4D:5E", "001a.2b3c.4d5e"], "2001:db8:1:2::/64")),
+                         ["2001:db8:1:2:21a:2bff:fe3c:4d5e"] * 2)
+        with self.assertRaises(ValueError):
+            list(eui64_addresses(["00:1a:2b"], "2001:db8::/64"))
+        with self.assertRaises(ValueError):
+            list(eui64_addresses([], "2001:db8::/48"))
+        self.assertEqual(list(to_ipv4_mapped(["192.0.2.1"])), ["::ffff:192.0.2.1"])
+        self.assertEqual(list(from_ipv4_mapped(["::ffff:c000:201"])), ["192.0.2.1"])
+        # RFC 6052 section 2.4 examples
+        for prefix, expected in (("2001:db8::/32", "2001:db8:c000:221::"),
+                                 ("2001:db8:122::/48", "2001:db8:122:c000:2:2100::"),
+                                 ("2001:db8:122:344::/64", "2001:db8:122:344:c0:2:2100:0"),
+                                 ("64:ff9b::/96", "64:ff9b::c000:221")):
+            self.assertEqual(list(to_nat64(["192.0.2.33"], prefix)), [expected])
+            self.assertEqual(list(from_nat64([expected], prefix)), ["192.0.2.33"])
+
+
+class TestSampling(unittest.TestCase):
+    """Test enumeration-free random sampling"""
+
+    def test_unique_addresses_cover_small_networks(self):
+        calc = IPCalculator()
+        sample = list(calc.sample_addresses("10.0.0.0/28", 16, seed=1))
+        self.assertEqual(sorted(sample, key=ipaddress.IPv4Address),
+                         [str(ip) for ip in ipaddress.ip_network("10.0.0.0/28")])
+        self.assertEqual(sample, list(sample_addresses("10.0.0.0/28", 16, seed=1)))
+        self.assertNotEqual(sample, list(sample_addresses("10.0.0.0/28", 16, seed=2)))
+
+    def test_exclusions_and_limits(self):
+        exclude = ["10.0.0.0/32", "10.0.0.255/32", "10.0.0.64/26"]
+        sample = list(sample_addresses("10.0.0.0/24", 190, seed=3, exclude=exclude))
+        self.assertEqual(len(set(sample)), 190)
+        self.assertTrue(IPSet(sample).isdisjoint(IPSet(exclude)))
+        with self.assertRaises(ValueError):
+            sample_addresses("10.0.0.0/24", 191, exclude=exclude)
+        repeated = list(sample_addresses("10.0.0.0/30", 50, unique=False, seed=4, exclude=["10.0.0.1"]))
+        self.assertEqual(len(repeated), 50)
+        self.assertNotIn("10.0.0.1", repeated)
+
+    def test_subnets_and_large_ipv6(self):
+        subnets = list(sample_subnets("10.0.0.0/16", 24, 127, seed=5, exclude=["10.0.5.7", "10.0.128.0/17"]))
+        self.assertEqual(len(set(subnets)), 127)
+        self.assertNotIn("10.0.5.0/24", subnets)
+        self.assertTrue(all(int(subnet.split('.')[2]) < 128 for subnet in subnets))
+        with self.assertRaises(ValueError):
+            sample_subnets("10.0.0.0/16", 15, 1)
+        sample = list(IPCalculator().sample_subnets("2001:db8::/32", 64, 1000, seed=6))
+        self.assertEqual(len(set(sample)), 1000)
+        self.assertTrue(all(ipaddress.ip_network(subnet).subnet_of(ipaddress.ip_network("2001:db8::/32"))
+                            for subnet in sample))
+
+    @staticmethod
+    def _chi_square(counts, cells: int, draws: int) -> float:
+        expected = draws / cells
+        return sum((counts.get(cell, 0) - expected) ** 2 / expected for cell in range(cells))
+
+    def test_unique_draws_are_uniform(self):
+        # Chi-square against p = 0.001 critical values; seeds are fixed, so this is deterministic
+        addresses = [str(ip) for ip in ipaddress.ip_network("10.0.0.0/29")]
+        singles = Counter(addresses.index(next(sample_addresses("10.0.0.0/29", 1, seed=seed)))
+                          for seed in range(4000))
+        self.assertLess(self._chi_square(singles, 8, 4000), 24.3)
+        pairs = list(itertools.combinations(range(16), 2))
+        addresses = [str(ip) for ip in ipaddress.ip_network("10.0.0.0/28")]
+        drawn = Counter(pairs.index(tuple(sorted(addresses.index(ip) for ip in
+                                                 sample_addresses("10.0.0.0/28", 2, seed=seed))))
+                        for seed in range(6000))
+        self.assertLess(self._chi_square(drawn, len(pairs), 6000), 173.0)
+
+    def test_large_draws_and_argument_checks(self):
+        k = 20000
+        exclude = ["10.0.0.0/17", "10.1.255.255"]
+        sample = list(sample_addresses("10.0.0.0/15", k, seed=7, exclude=exclude))
+        self.assertEqual(len(set(sample)), k)
+        self.assertTrue(IPSet(sample).isdisjoint(IPSet(exclude)))
+        halves = Counter(int(ipaddress.ip_address(ip)) >> 16 & 1 for ip in sample)
+        self.assertLess(abs(halves[0] / k - (1 << 15) / ((1 << 17) - (1 << 15) - 1)), 0.01)
+        everything = list(sample_addresses("10.0.0.0/20", 4096, seed=9))
+        self.assertEqual(len(set(everything)), 4096)
+        huge = list(sample_addresses("2001:db8::/32", 3, seed=8))
+        self.assertEqual(len(set(huge)), 3)
+        with self.assertRaises(TypeError):
+            sample_addresses("10.0.0.0/24", 2.5)
+        with self.assertRaises(TypeError):
+            sample_subnets("10.0.0.0/16", 24, "3")
+        with self.assertRaises(ValueError):
+            sample_addresses("10.0.0.0/24", -1)
+
+
+if __name__ == "__main__":
+    unittest.main()